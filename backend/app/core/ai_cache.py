@@ -0,0 +1,243 @@
+# backend/app/core/ai_cache.py
+"""
+كاش نتائج تحليل الذكاء الاصطناعي (نص / صورة) بمفتاح محتوى.
+
+- المفتاح: sha256(النوع + النموذج + إصدار الـ prompt + المدخل بعد التطبيع).
+- طبقة ساخنة: LRU داخل العملية.
+- طبقة دائمة: جدول ai_cache في Postgres مع TTL وحد أقصى لعدد الصفوف.
+- عدّاد الاستخدام (hits / last_hit_at) يُجمع في الذاكرة ويُكتب دفعة واحدة كل
+  AI_CACHE_HIT_FLUSH_SECONDS، بدل UPDATE و commit عند كل قراءة.
+"""
+import os, json, hashlib, threading, time, unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.app.database import SessionLocal
+from backend.app.models import AiCacheEntry
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "1") == "1"
+AI_CACHE_LRU_SIZE = int(os.getenv("AI_CACHE_LRU_SIZE", "2048"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+AI_CACHE_MAX_ROWS = int(os.getenv("AI_CACHE_MAX_ROWS", "200000"))
+# تنظيف الجدول (TTL + الحجم) مرة كل N عمليات كتابة
+AI_CACHE_EVICT_EVERY = int(os.getenv("AI_CACHE_EVICT_EVERY", "500"))
+# أقصى مدة قبل كتابة عدّادات الاستخدام المتراكمة إلى الجدول
+AI_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("AI_CACHE_HIT_FLUSH_SECONDS", "60"))
+
+_lru: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evicted_rows": 0, "errors": 0}
+_writes_since_evict = 0
+_pending_hits: dict = {}  # key -> [hits, last_hit_at]
+_hits_flushed_at = time.monotonic()
+
+
+# =====================================================
+# 🔑 المفتاح
+# =====================================================
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split())
+
+
+def make_key(kind: str, model: str, prompt_version: str, value: str) -> str:
+    raw = json.dumps([kind, model, prompt_version, normalize_text(value)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+# =====================================================
+# 🔥 الطبقة الساخنة (LRU)
+# =====================================================
+def _lru_get(key: str):
+    with _lock:
+        item = _lru.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.time():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return value
+
+
+def _lru_put(key: str, value: dict):
+    with _lock:
+        _lru[key] = (time.time() + AI_CACHE_TTL_SECONDS, value)
+        _lru.move_to_end(key)
+        while len(_lru) > AI_CACHE_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+# =====================================================
+# 📈 عدّادات الاستخدام (تُكتب دفعة واحدة)
+# =====================================================
+def _record_hit(key: str):
+    now = datetime.utcnow()
+    with _lock:
+        pending = _pending_hits.setdefault(key, [0, now])
+        pending[0] += 1
+        pending[1] = now
+        due = time.monotonic() - _hits_flushed_at >= AI_CACHE_HIT_FLUSH_SECONDS
+    if due:
+        flush_hits()
+
+
+def flush_hits() -> int:
+    """كتابة العدّادات المتراكمة في UPDATE واحد (executemany). يُستدعى أيضاً قبل التنظيف وعند الإيقاف."""
+    global _pending_hits, _hits_flushed_at
+    with _lock:
+        pending, _pending_hits = _pending_hits, {}
+        _hits_flushed_at = time.monotonic()
+    if not pending:
+        return 0
+
+    table = AiCacheEntry.__table__
+    stmt = (
+        update(table)
+        .where(table.c.key == bindparam("b_key"))
+        .values(
+            hits=table.c.hits + bindparam("b_hits"),
+            last_hit_at=func.greatest(table.c.last_hit_at, bindparam("b_last_hit_at")),
+        )
+    )
+    db = SessionLocal()
+    try:
+        db.connection().execute(
+            stmt, [{"b_key": k, "b_hits": n, "b_last_hit_at": at} for k, (n, at) in pending.items()]
+        )
+        db.commit()
+    except Exception as e:
+        # العدّاد تقريبي (لترتيب التنظيف فقط)، فلا نعيد المحاولة
+        db.rollback()
+        _count("errors")
+        print("⚠️ AI cache hit flush failed:", e)
+        return 0
+    finally:
+        db.close()
+    return len(pending)
+
+
+# =====================================================
+# 📦 الواجهة العامة
+# =====================================================
+def get(key: str):
+    """إرجاع النتيجة المخزنة أو None."""
+    if not AI_CACHE_ENABLED:
+        return None
+
+    value = _lru_get(key)
+    if value is not None:
+        _count("memory_hits")
+        _record_hit(key)
+        return value
+
+    db = SessionLocal()
+    try:
+        entry = db.query(AiCacheEntry).filter(AiCacheEntry.key == key).first()
+        expired_before = datetime.utcnow() - timedelta(seconds=AI_CACHE_TTL_SECONDS)
+        if entry is None or (entry.created_at and entry.created_at < expired_before):
+            _count("misses")
+            return None
+        value = entry.value
+    except Exception as e:
+        _count("errors")
+        print("⚠️ AI cache read failed:", e)
+        _count("misses")
+        return None
+    finally:
+        db.close()
+
+    _lru_put(key, value)
+    _count("db_hits")
+    _record_hit(key)
+    return value
+
+
+def put(key: str, kind: str, value: dict):
+    global _writes_since_evict
+    if not AI_CACHE_ENABLED:
+        return
+
+    _lru_put(key, value)
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stmt = insert(AiCacheEntry).values(key=key, kind=kind, value=value, hits=0, created_at=now, last_hit_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AiCacheEntry.key],
+            set_={"value": stmt.excluded.value, "created_at": now, "last_hit_at": now},
+        )
+        db.execute(stmt)
+        db.commit()
+        _count("stores")
+    except Exception as e:
+        db.rollback()
+        _count("errors")
+        print("⚠️ AI cache write failed:", e)
+    finally:
+        db.close()
+
+    with _lock:
+        _writes_since_evict += 1
+        due = _writes_since_evict >= AI_CACHE_EVICT_EVERY
+        if due:
+            _writes_since_evict = 0
+    if due:
+        evict()
+
+
+def evict() -> int:
+    """حذف الصفوف المنتهية ثم الأقل استخداماً إذا تجاوز الجدول الحد الأقصى."""
+    flush_hits()  # ترتيب last_hit_at يجب أن يشمل الاستخدام الأخير
+    db = SessionLocal()
+    try:
+        expired_before = datetime.utcnow() - timedelta(seconds=AI_CACHE_TTL_SECONDS)
+        removed = db.query(AiCacheEntry).filter(AiCacheEntry.created_at < expired_before).delete(synchronize_session=False)
+
+        overflow = db.query(AiCacheEntry).count() - AI_CACHE_MAX_ROWS
+        if overflow > 0:
+            oldest = (
+                db.query(AiCacheEntry.key)
+                .order_by(AiCacheEntry.last_hit_at)
+                .limit(overflow)
+                .subquery()
+            )
+            removed += (
+                db.query(AiCacheEntry)
+                .filter(AiCacheEntry.key.in_(oldest.select()))
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        _count("errors")
+        print("⚠️ AI cache eviction failed:", e)
+        return 0
+    finally:
+        db.close()
+
+    with _lock:
+        _stats["evicted_rows"] += removed
+    return removed
+
+
+def stats() -> dict:
+    with _lock:
+        data = dict(_stats)
+        data["memory_entries"] = len(_lru)
+        data["pending_hit_keys"] = len(_pending_hits)
+    lookups = data["memory_hits"] + data["db_hits"] + data["misses"]
+    data["hit_ratio"] = round((data["memory_hits"] + data["db_hits"]) / lookups, 4) if lookups else 0.0
+    return data
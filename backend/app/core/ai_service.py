@@ -1,7 +1,8 @@
 import os, base64, pathlib, time
 from dotenv import load_dotenv
 from openai import OpenAI
-from PIL import Image, ImageDraw, ImageFont
+
+from backend.app.core import ai_cache, keywords
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -10,12 +11,30 @@ if not OPENAI_API_KEY:
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+
+def _client(timeout: float | None = None):
+    """
+    مع timeout يُلغى طلب HTTP نفسه عند انتهاء المهلة (فلا يبقى يستهلك thread ويُحتسب تكلفته)،
+    وبدون إعادة محاولات تضاعف المدة.
+    """
+    return client.with_options(timeout=timeout, max_retries=0) if timeout else client
+
 # =====================================================
 # 🔍 تحليل نص الإعلان
 # =====================================================
-def analyze_ad_text(ad_text: str) -> dict:
-    response = client.chat.completions.create(
-        model="gpt-4o",
+TEXT_ANALYSIS_MODEL = "gpt-4o"
+TEXT_ANALYSIS_PROMPT_VERSION = "v1"  # غيّره عند تعديل الـ prompt أو طريقة حساب الـ score
+
+
+def analyze_ad_text(ad_text: str, platform: str | None = None, timeout: float | None = None) -> dict:
+    # الـ score يُحسب من المعجم في كل مرة (رخيص)، فتغيير المعجم لا يتطلب إبطال الكاش
+    cache_key = ai_cache.make_key("text", TEXT_ANALYSIS_MODEL, TEXT_ANALYSIS_PROMPT_VERSION, ad_text)
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "input_text": ad_text, "score": keywords.score("ad_text", ad_text, platform)}
+
+    response = _client(timeout).chat.completions.create(
+        model=TEXT_ANALYSIS_MODEL,
         messages=[
             {"role": "system", "content": "أنت خبير تسويق رقمي وتحليل إعلانات سوشيال ميديا."},
             {"role": "user", "content": f"حلل الإعلان التالي:\n{ad_text}"}
@@ -24,32 +43,30 @@ def analyze_ad_text(ad_text: str) -> dict:
 
     analysis_text = response.choices[0].message.content.strip()
 
-    # حساب Score تقريبي بناءً على وجود كلمات إيجابية/تحفيزية
-    score = 70
-    if any(word in ad_text.lower() for word in ["offer", "deal", "save", "best", "discount"]):
-        score += 15
-    elif any(word in ad_text.lower() for word in ["bad", "boring", "slow"]):
-        score -= 15
-
-    score = max(0, min(score, 100))  # التأكد أن النتيجة بين 0 و 100
-
-    return {
+    # حساب Score تقريبي من الكلمات الإيجابية/السلبية في النص (معجم ad_text، بين 0 و 100)
+    result = {
         "input_text": ad_text,
         "analysis": analysis_text,
-        "score": score
+        "score": keywords.score("ad_text", ad_text, platform)
     }
+    ai_cache.put(cache_key, "text", result)
+    return result
 
 
 # =====================================================
 # ✨ توليد نص إعلان جديد
 # =====================================================
-def generate_new_ad(ad_text: str, tone="friendly", platform="instagram") -> dict:
-    prompt = (
+def build_new_ad_prompt(ad_text: str, platform="instagram") -> str:
+    return (
         f"أنشئ جملة إعلانية قصيرة لا تتجاوز 7 كلمات بالعربية الفصحى، جذابة ومقنعة. "
         f"النص الأصلي: «{ad_text}». "
         f"احرص أن تكون بسيطة ومناسبة لمنصة {platform}. "
         f"بدون رموز، وبدون تكرار كلمات."
     )
+
+
+def generate_new_ad(ad_text: str, tone="friendly", platform="instagram") -> dict:
+    prompt = build_new_ad_prompt(ad_text, platform)
     resp = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": prompt}], max_tokens=40)
     return {"generated_text": resp.choices[0].message.content.strip()}
 
@@ -105,49 +122,20 @@ def generate_ad_image(prompt: str, size: str = "1024x1024") -> dict:
 
 
 # =====================================================
-# 📝 كتابة النص العربي على الصورة
+# 🧠 تحليل الصورة الإعلانية (GPT-4o Vision)
 # =====================================================
-def render_arabic_text_on_image(
-    image_path: str,
-    text: str,
-    font_path: str = "C:/Windows/Fonts/Arial.ttf",
-    font_size: int = 64,
-):
-    import arabic_reshaper
-    from bidi.algorithm import get_display
-
-    try:
-        im = Image.open(image_path).convert("RGBA")
-    except Exception:
-        return None
-
-    W, H = im.size
-    txt_layer = Image.new("RGBA", im.size, (255, 255, 255, 0))
-    draw = ImageDraw.Draw(txt_layer)
-    font = ImageFont.truetype(font_path, font_size)
-
-    reshaped_text = arabic_reshaper.reshape(text)
-    bidi_text = get_display(reshaped_text)
-    bbox = draw.textbbox((0, 0), bidi_text, font=font)
-    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    x = (W - tw) / 2
-    y = H * 0.82
-
-    draw.rectangle([(x - 20, y - 10), (x + tw + 20, y + th + 10)], fill=(0, 0, 0, 120))
-    draw.text((x, y), bidi_text, font=font, fill=(255, 255, 255, 255))
+IMAGE_ANALYSIS_MODEL = "gpt-4o-mini"
+IMAGE_ANALYSIS_PROMPT_VERSION = "v1"
 
-    combined = Image.alpha_composite(im, txt_layer)
-    out = pathlib.Path(image_path).with_name("final_" + pathlib.Path(image_path).name)
-    combined.convert("RGB").save(out, "PNG")
-    return str(out.resolve())
 
+def analyze_ad_image(image_url: str, platform: str | None = None, timeout: float | None = None) -> dict:
+    cache_key = ai_cache.make_key("image", IMAGE_ANALYSIS_MODEL, IMAGE_ANALYSIS_PROMPT_VERSION, image_url)
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "score": keywords.score("image_analysis", cached["visual_analysis"], platform)}
 
-# =====================================================
-# 🧠 تحليل الصورة الإعلانية (GPT-4o Vision)
-# =====================================================
-def analyze_ad_image(image_url: str) -> dict:
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    response = _client(timeout).chat.completions.create(
+        model=IMAGE_ANALYSIS_MODEL,
         messages=[
             {"role": "system", "content": "أنت خبير تسويق بصري تحلل الصور الإعلانية."},
             {
@@ -162,17 +150,11 @@ def analyze_ad_image(image_url: str) -> dict:
 
     visual_analysis = response.choices[0].message.content.strip()
 
-    # توليد Score تقديري بناءً على الكلمات المفتاحية
-    score = 70
-    if any(word in visual_analysis.lower() for word in ["attractive", "professional", "eye-catching", "vivid"]):
-        score += 20
-    elif any(word in visual_analysis.lower() for word in ["blurry", "dark", "unclear"]):
-        score -= 20
-
-    score = max(0, min(score, 100))
-
-    return {
+    # توليد Score تقديري بناءً على الكلمات المفتاحية في التحليل (معجم image_analysis)
+    result = {
         "image_url": image_url,
         "visual_analysis": visual_analysis,
-        "score": score
+        "score": keywords.score("image_analysis", visual_analysis, platform)
     }
+    ai_cache.put(cache_key, "image", result)
+    return result
@@ -0,0 +1,52 @@
+# backend/app/core/ai_utils.py
+import os, asyncio, base64
+from openai import AsyncOpenAI
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.ai_service import OPENAI_API_KEY
+
+# =====================================================
+# ⚙️ إعدادات التوازي
+# =====================================================
+# الحد الأقصى لعدد طلبات OpenAI المتزامنة داخل كل worker
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "100"))
+
+async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+ai_slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
+
+# =====================================================
+# 💬 استدعاء نموذج المحادثة (غير متزامن)
+# =====================================================
+async def chat_completions(model: str, messages: list, n: int = 1, **kwargs) -> list:
+    """n نص مرشح من نفس الطلب (n= في استدعاء واحد)."""
+    async with ai_slots:
+        resp = await async_client.chat.completions.create(model=model, messages=messages, n=n, **kwargs)
+    return [c.message.content.strip() for c in resp.choices if c.message.content]
+
+
+async def chat_completion_stream(model: str, messages: list, **kwargs):
+    """إرجاع أجزاء النص (tokens) فور وصولها من النموذج."""
+    async with ai_slots:
+        stream = await async_client.chat.completions.create(
+            model=model, messages=messages, stream=True, **kwargs
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+# =====================================================
+# 🖼️ توليد صورة وإرجاع البايتات
+# =====================================================
+async def generate_images_bytes(prompt: str, size: str = "1024x1024", n: int = 1) -> list:
+    """n صورة من استدعاء واحد."""
+    async with ai_slots:
+        resp = await async_client.images.generate(model="gpt-image-1", prompt=prompt, size=size, n=n)
+
+    encoded = [d.b64_json for d in (resp.data or []) if d.b64_json] if resp else []
+    if not encoded:
+        raise ValueError("⚠️ استجابة الصورة فارغة (b64_json مفقود)")
+
+    # فك الترميز خارج حلقة الأحداث لأن الصور بحجم عدة ميغابايت
+    return await run_in_threadpool(lambda: [base64.b64decode(b) for b in encoded])
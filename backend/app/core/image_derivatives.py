@@ -0,0 +1,68 @@
+# backend/app/core/image_derivatives.py
+"""
+نسخ مصغّرة مضغوطة (WebP / AVIF) من الصور المولدة لعرضها في القوائم.
+
+- تُنشأ مرة واحدة عند توليد الصورة بالعروض IMAGE_DERIVATIVE_WIDTHS.
+- تُحفظ في image_store مثل الأصل (بعنوان المحتوى وكاش دائم).
+- الناتج خريطة srcset: {"webp": {"320": url, "640": url}, "avif": {...}}
+- AVIF اختياري: يتطلب Pillow مبنياً بدعم AVIF أو حزمة pillow-avif-plugin.
+"""
+import os, io
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core import image_store
+
+IMAGE_DERIVATIVE_WIDTHS = sorted(
+    int(w) for w in os.getenv("IMAGE_DERIVATIVE_WIDTHS", "320,640").split(",") if w.strip()
+)
+IMAGE_DERIVATIVE_FORMATS = [
+    f.strip().lower() for f in os.getenv("IMAGE_DERIVATIVE_FORMATS", "webp").split(",") if f.strip()
+]
+IMAGE_DERIVATIVE_QUALITY = {
+    "webp": int(os.getenv("WEBP_QUALITY", "78")),
+    "avif": int(os.getenv("AVIF_QUALITY", "55")),
+}
+
+if "avif" in IMAGE_DERIVATIVE_FORMATS:
+    try:
+        import pillow_avif  # noqa: F401  (يسجّل AVIF في Pillow القديم)
+    except ImportError:
+        pass
+    if "AVIF" not in Image.SAVE:
+        print("⚠️ AVIF not supported by this Pillow build, skipping AVIF derivatives")
+        IMAGE_DERIVATIVE_FORMATS.remove("avif")
+
+
+def build_derivatives(data: bytes) -> list:
+    """[(format, width, bytes)] لكل عرض أصغر من عرض الصورة الأصلية."""
+    im = Image.open(io.BytesIO(data))
+    im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+    W, H = im.size
+
+    out = []
+    for width in IMAGE_DERIVATIVE_WIDTHS:
+        if width >= W:
+            continue
+        resized = im.resize((width, max(1, round(H * width / W))), Image.LANCZOS)
+        for fmt in IMAGE_DERIVATIVE_FORMATS:
+            buf = io.BytesIO()
+            resized.save(buf, format=fmt.upper(), quality=IMAGE_DERIVATIVE_QUALITY.get(fmt, 75), method=4)
+            out.append((fmt, width, buf.getvalue()))
+    return out
+
+
+def store_derivatives_sync(data: bytes) -> dict | None:
+    srcset = {}
+    for fmt, width, encoded in build_derivatives(data):
+        srcset.setdefault(fmt, {})[str(width)] = image_store.put_bytes(encoded, ext=fmt)
+    return srcset or None
+
+
+async def store_derivatives(data: bytes) -> dict | None:
+    """إنشاء النسخ وحفظها (خارج حلقة الأحداث) وإرجاع خريطة srcset، أو None عند الفشل."""
+    try:
+        return await run_in_threadpool(store_derivatives_sync, data)
+    except Exception as e:
+        print("⚠️ Image derivatives failed:", e)
+        return None
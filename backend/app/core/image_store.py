@@ -0,0 +1,199 @@
+# backend/app/core/image_store.py
+"""
+مخزن الصور المولدة بعنوان المحتوى (Content-Addressed).
+
+- اسم الملف = sha256 للمحتوى، فالصور المتطابقة تُخزَّن مرة واحدة ولا تتعارض الأسماء.
+- الملفات موزعة على مجلدات فرعية: ab/cd/abcd....png
+- الملف لا يتغير بعد كتابته، لذلك يُخدم بـ Cache-Control: immutable و ETag = الهاش.
+
+مكان التخزين قابل للتبديل عبر IMAGE_STORAGE_BACKEND:
+- local: مجلد static/generated على القرص (كتابة ذرّية: ملف مؤقت ثم os.replace).
+- s3: أي تخزين متوافق مع S3 (AWS / MinIO / R2). الرابط المخزن يبقى /static/generated/<key>
+  ويُحوَّل (307) إلى رابط موقّع مؤقت، أو يكون رابطاً عاماً مباشراً إذا ضُبط S3_PUBLIC_BASE_URL،
+  فلا تمر بايتات الصور عبر عملية بايثون عند العرض.
+"""
+import os, io, re, hashlib, pathlib, shutil, tempfile
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+IMAGE_STORAGE_BACKEND = os.getenv("IMAGE_STORAGE_BACKEND", "local")
+
+STATIC_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent / "static"
+IMAGE_STORE_DIR = STATIC_ROOT / "generated"
+IMAGE_STORE_URL = "/static/generated"
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # مثل http://minio:9000 (فارغ = AWS)
+S3_REGION = os.getenv("S3_REGION")
+S3_PREFIX = os.getenv("S3_PREFIX", "generated/")
+S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL")  # CDN أو bucket عام
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "3600"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "avif": "image/avif", "jpg": "image/jpeg"}
+_HASHED_NAME = re.compile(r"^[0-9a-f]{64}$")
+_CHUNK = 1024 * 1024
+
+
+def content_key(digest: str, ext: str = "png") -> str:
+    """المسار النسبي داخل المخزن: ab/cd/<sha256>.<ext>"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+# =====================================================
+# 💽 التخزين المحلي
+# =====================================================
+class LocalImageStorage:
+    serves_locally = True
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+    def put(self, key: str, fileobj, content_type: str):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(fileobj, f, _CHUNK)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def url(self, key: str) -> str:
+        return f"{IMAGE_STORE_URL}/{key}"
+
+
+# =====================================================
+# ☁️ تخزين متوافق مع S3
+# =====================================================
+class S3ImageStorage:
+    serves_locally = False
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT_URL,
+            region_name=S3_REGION,
+            config=Config(signature_version="s3v4", retries={"max_attempts": 3, "mode": "standard"}),
+        )
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, fileobj, content_type: str):
+        # upload_fileobj يرفع على أجزاء (multipart) للملفات الكبيرة بدون قراءتها كاملة
+        self.client.upload_fileobj(
+            fileobj, self.bucket, self.prefix + key,
+            ExtraArgs={"ContentType": content_type, "CacheControl": IMMUTABLE_CACHE_CONTROL},
+        )
+
+    def url(self, key: str) -> str:
+        if S3_PUBLIC_BASE_URL:
+            return f"{S3_PUBLIC_BASE_URL.rstrip('/')}/{self.prefix}{key}"
+        # رابط ثابت يُخزن في قاعدة البيانات؛ يتحول إلى رابط موقّع عند الطلب
+        return f"{IMAGE_STORE_URL}/{key}"
+
+    def presigned_url(self, key: str) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.prefix + key},
+            ExpiresIn=S3_PRESIGN_EXPIRES,
+        )
+
+
+def _create_storage():
+    if IMAGE_STORAGE_BACKEND == "s3":
+        if not S3_BUCKET:
+            raise RuntimeError("S3_BUCKET is required when IMAGE_STORAGE_BACKEND=s3")
+        return S3ImageStorage(S3_BUCKET, S3_PREFIX)
+    if IMAGE_STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown IMAGE_STORAGE_BACKEND: {IMAGE_STORAGE_BACKEND}")
+    return LocalImageStorage(IMAGE_STORE_DIR)
+
+
+storage = _create_storage()
+
+
+# =====================================================
+# 🔐 الواجهة العامة
+# =====================================================
+def put_bytes(data: bytes, ext: str = "png") -> str:
+    key = content_key(hashlib.sha256(data).hexdigest(), ext)
+    if not storage.exists(key):
+        storage.put(key, io.BytesIO(data), CONTENT_TYPES.get(ext, "application/octet-stream"))
+    return storage.url(key)
+
+
+async def save_image(data: bytes, ext: str = "png") -> str:
+    return await run_in_threadpool(put_bytes, data, ext)
+
+
+# =====================================================
+# 📤 خدمة الروابط /static/generated
+# =====================================================
+class ImmutableStaticFiles(StaticFiles):
+    """
+    مثل StaticFiles، لكن الملفات المسماة بالهاش تُرسل مع Cache-Control: immutable
+    و ETag قوي = الهاش (يُرجع 304 عند If-None-Match مطابق).
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        name = pathlib.PurePath(full_path).stem
+        if _HASHED_NAME.match(name):
+            response.headers["etag"] = f'"{name}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+redirect_router = APIRouter(include_in_schema=False)
+
+
+@redirect_router.get(IMAGE_STORE_URL + "/{key:path}")
+def redirect_to_object(key: str):
+    """مع S3: تحويل إلى رابط موقّع بدل تمرير الصورة عبر الـ API."""
+    if not _HASHED_NAME.match(pathlib.PurePath(key).stem):
+        raise HTTPException(status_code=404, detail="Not found")
+    # الرابط الموقّع صالح لـ S3_PRESIGN_EXPIRES، فنسمح بكاش التحويل لنصف المدة
+    return RedirectResponse(
+        storage.presigned_url(key),
+        status_code=307,
+        headers={"Cache-Control": f"private, max-age={S3_PRESIGN_EXPIRES // 2}"},
+    )
+
+
+def mount(app):
+    """ربط /static/generated حسب نوع التخزين (يجب أن يسبق ربط /static)."""
+    if storage.serves_locally:
+        app.mount(IMAGE_STORE_URL, ImmutableStaticFiles(directory=IMAGE_STORE_DIR), name="generated")
+    else:
+        app.include_router(redirect_router)
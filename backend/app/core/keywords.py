@@ -0,0 +1,195 @@
+# backend/app/core/keywords.py
+"""
+محرك الكلمات المفتاحية الموزونة (عربي + إنجليزي) لحساب درجات التحليل.
+
+- المعاجم في ملف JSON (KEYWORD_LEXICONS_PATH): لكل معجم base و cap وكلمات موزونة
+  لكل منصة ("all" للجميع) ولكل لغة.
+- النص والكلمات يُطبَّعان بنفس الطريقة: حروف صغيرة، حذف التشكيل والتطويل،
+  توحيد الألف (أإآٱ → ا) والياء (ى → ي) والتاء المربوطة (ة → ه) والهمزات (ؤ → و، ئ → ي).
+- المطابقة بمرور واحد على النص عبر Aho-Corasick، مع حدود الكلمة
+  (لا تطابق "deal" داخل "ideal") والسماح بالسوابق العربية (ال، و، ب، ...).
+- عند التداخل تفوز الأطول ("غير واضحة" بدل "واضحة").
+- الـ automata تُبنى مرة واحدة عند بدء التطبيق (load) وتُستخدم لكل الطلبات.
+"""
+import os, re, json, threading, unicodedata
+from collections import deque
+from pathlib import Path
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+KEYWORD_LEXICONS_PATH = Path(os.getenv(
+    "KEYWORD_LEXICONS_PATH",
+    Path(__file__).resolve().parent.parent.parent / "assets" / "lexicons" / "ad_keywords.json",
+))
+ALL_PLATFORMS = "all"
+
+# سوابق عربية متصلة بالكلمة (بعد التطبيع)
+AR_PROCLITICS = frozenset({
+    "ال", "و", "ف", "ب", "ك", "ل", "لل", "وال", "فال", "بال", "كال", "ولل", "فلل", "وب", "ول", "وبال",
+})
+
+
+# =====================================================
+# 🔤 التطبيع
+# =====================================================
+# التشكيل (فتحة، ضمة، كسرة، شدة، سكون، ...) + الألف الخنجرية + العلامات القرآنية + التطويل ـ
+_STRIP_RE = re.compile("[\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_FOLD = (("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"), ("ى", "ي"), ("ة", "ه"), ("ؤ", "و"), ("ئ", "ي"))
+
+
+def normalize(text: str) -> str:
+    # sub + replace أسرع بكثير من str.translate بجدول للنصوص غير اللاتينية
+    text = _STRIP_RE.sub("", unicodedata.normalize("NFKC", text or "").casefold())
+    for src, dst in _FOLD:
+        if src in text:
+            text = text.replace(src, dst)
+    return " ".join(text.split())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+# =====================================================
+# 🤖 Aho-Corasick
+# =====================================================
+class KeywordAutomaton:
+    """
+    مطابقة كل الكلمات دفعة واحدة: O(طول النص + عدد التطابقات) بدل مسح النص لكل كلمة.
+    terms: {الكلمة بعد التطبيع: (الوزن, اللغة)}
+    """
+
+    def __init__(self, terms: dict):
+        self.terms = terms
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+        for term in terms:
+            state = 0
+            for ch in term:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(term)
+
+        # روابط الفشل بالعرض (BFS) ودمج المخرجات من حالة الفشل
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def _raw_matches(self, text: str):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for term in out[state]:
+                yield i + 1 - len(term), i + 1, term
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int) -> bool:
+        if end < len(text) and _is_word_char(text[end]):
+            return False
+        word_start = start
+        while word_start > 0 and _is_word_char(text[word_start - 1]):
+            word_start -= 1
+        return word_start == start or text[word_start:start] in AR_PROCLITICS
+
+    def matches(self, normalized: str) -> list:
+        """[(start, end, term)] على حدود الكلمات، بدون تداخل (الأطول أولاً عند نفس البداية)."""
+        found = sorted(
+            (m for m in self._raw_matches(normalized) if self._at_boundary(normalized, m[0], m[1])),
+            key=lambda m: (m[0], m[0] - m[1]),
+        )
+        selected, last_end = [], 0
+        for start, end, term in found:
+            if start >= last_end:
+                selected.append((start, end, term))
+                last_end = end
+        return selected
+
+
+# =====================================================
+# 📚 المعاجم
+# =====================================================
+class Lexicon:
+    def __init__(self, name: str, config: dict):
+        self.name = name
+        self.base = config.get("base", 70)
+        self.cap = config.get("cap")
+        self.automata = {}
+        shared = config.get("terms", {}).get(ALL_PLATFORMS, {})
+        for platform, languages in config.get("terms", {}).items():
+            terms = {}
+            # كلمات المنصة تضاف إلى كلمات "all" (وتغلبها عند التكرار)
+            for source in ([shared, languages] if platform != ALL_PLATFORMS else [languages]):
+                for lang, words in source.items():
+                    for word, weight in words.items():
+                        terms[normalize(word)] = (weight, lang)
+            self.automata[platform.lower()] = KeywordAutomaton(terms)
+        self.automata.setdefault(ALL_PLATFORMS, KeywordAutomaton({}))
+
+    def automaton(self, platform: str | None = None) -> KeywordAutomaton:
+        return self.automata.get((platform or ALL_PLATFORMS).lower()) or self.automata[ALL_PLATFORMS]
+
+    def match(self, text: str, platform: str | None = None) -> list:
+        """الكلمات المطابقة (كل كلمة مرة واحدة): [{"term", "weight", "lang"}]"""
+        automaton = self.automaton(platform)
+        seen = {}
+        for _, _, term in automaton.matches(normalize(text)):
+            if term not in seen:
+                weight, lang = automaton.terms[term]
+                seen[term] = {"term": term, "weight": weight, "lang": lang}
+        return list(seen.values())
+
+    def score(self, text: str, platform: str | None = None) -> int | float:
+        """base + مجموع أوزان الكلمات المطابقة (محدود بـ ±cap)، بين 0 و 100."""
+        delta = sum(m["weight"] for m in self.match(text, platform))
+        if self.cap is not None:
+            delta = max(-self.cap, min(delta, self.cap))
+        return max(0, min(self.base + delta, 100))
+
+
+_lexicons: dict | None = None
+_load_lock = threading.Lock()
+
+
+def load(path: Path = KEYWORD_LEXICONS_PATH) -> dict:
+    """قراءة المعاجم وبناء الـ automata (عند بدء التطبيق، أو لإعادة التحميل)."""
+    global _lexicons
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    lexicons = {name: Lexicon(name, cfg) for name, cfg in config.items()}
+    _lexicons = lexicons
+    summary = ", ".join(f"{name}: {len(lex.automata)} platforms" for name, lex in lexicons.items())
+    print(f"🔤 Keyword lexicons loaded ({summary})")
+    return lexicons
+
+
+def get_lexicon(name: str) -> Lexicon:
+    lexicons = _lexicons
+    if lexicons is None:
+        with _load_lock:
+            lexicons = _lexicons or load()
+    if name not in lexicons:
+        raise KeyError(f"Unknown keyword lexicon: {name}")
+    return lexicons[name]
+
+
+def score(lexicon: str, text: str, platform: str | None = None) -> int | float:
+    return get_lexicon(lexicon).score(text, platform)
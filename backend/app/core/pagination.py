@@ -0,0 +1,80 @@
+# backend/app/core/pagination.py
+"""
+ترقيم صفحات بالمؤشر (Keyset Pagination) على (created_at, id).
+
+- الترتيب دائماً: الأحدث أولاً ثم id تنازلياً لكسر التعادل.
+- المؤشر نص مشفّر (base64) لا يعتمد عليه العميل في شيء سوى إرجاعه كما هو.
+- المؤشر التالي يُرسل في الهيدر X-Next-Cursor حتى يبقى شكل الاستجابة كما هو.
+"""
+import base64, json, uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import tuple_
+
+PAGE_LIMIT_DEFAULT = 50
+PAGE_LIMIT_MAX = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+        limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset(stmt, created_col, id_col, page: PageParams):
+    if page.cursor:
+        created_at, row_id = decode_cursor(page.cursor)
+        stmt = stmt.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+    return stmt.order_by(created_col.desc(), id_col.desc()).limit(page.limit + 1)
+
+
+def _split_page(rows, page: PageParams, key):
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        created_at, row_id = key(rows[-1])
+        next_cursor = encode_cursor(created_at, row_id)
+    return rows, next_cursor
+
+
+def paginate(query, created_col, id_col, page: PageParams, key=None):
+    """
+    تطبيق المؤشر والترتيب والحد على استعلام ORM.
+    key(row) -> (created_at, id) عند إرجاع صفوف مركبة (مثل join).
+    """
+    rows = _keyset(query, created_col, id_col, page).all()
+    return _split_page(rows, page, key or (lambda row: (row.created_at, row.id)))
+
+
+async def paginate_select_async(db, stmt, created_col, id_col, page: PageParams, key):
+    """
+    نفس paginate لكن لاستعلام Core (select) بأعمدة محددة عبر AsyncSession،
+    وتُرجع الصفوف كـ mappings بدون كائنات ORM.
+    """
+    rows = (await db.execute(_keyset(stmt, created_col, id_col, page))).mappings().all()
+    return _split_page(rows, page, key)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
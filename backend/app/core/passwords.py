@@ -0,0 +1,116 @@
+# backend/app/core/passwords.py
+"""
+تجزئة كلمات المرور (bcrypt) في مجموعة عمليات منفصلة.
+
+bcrypt يستهلك ~250ms من المعالج لكل عملية ويحجز الـ GIL،
+لذلك نرسله إلى ProcessPoolExecutor محدود، ونرفض بسرعة (429) عند امتلاء الطابور.
+
+قياس الأداء:
+    python -m backend.app.core.passwords
+"""
+import os, multiprocessing, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+# أقصى عدد عمليات (جارية + منتظرة) قبل الرد بـ 429
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", str(PASSWORD_WORKERS * 8)))
+
+# تغيير BCRYPT_ROUNDS يجعل التجزئات القديمة "deprecated" فتُعاد تجزئتها عند الدخول
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_QUEUE_LIMIT)
+
+
+# =====================================================
+# 🧮 دوال تُنفَّذ داخل عمليات المجموعة
+# =====================================================
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain: str, hashed: str):
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+# =====================================================
+# 🏊 مجموعة العمليات
+# =====================================================
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn وليس fork: العملية الأم فيها threads (threadpool، عمّال الطابور) وقد يرث الابن قفلاً محجوزاً فيتجمد
+                _pool = ProcessPoolExecutor(
+                    max_workers=PASSWORD_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many password operations in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return _get_pool().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# =====================================================
+# 🔐 الواجهة العامة
+# =====================================================
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+
+def verify_and_update(plain: str, hashed: str | None):
+    """
+    إرجاع (صحيحة؟, تجزئة جديدة أو None).
+    التجزئة الجديدة تُرجع فقط إذا كانت القديمة بتكلفة مختلفة عن BCRYPT_ROUNDS.
+    """
+    if not hashed:
+        return False, None
+    return _run(_verify_and_update, plain, hashed)
+
+
+def verify_password(plain: str, hashed: str | None) -> bool:
+    return verify_and_update(plain, hashed)[0]
+
+
+# =====================================================
+# 📈 قياس الأداء: عمليات تحقق في الثانية حسب عدد العمليات
+# =====================================================
+def _benchmark(total: int = 64):
+    hashed = pwd_context.hash("Admin#12345")
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, {total} verifications per run")
+    for workers in counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_verify_and_update, ["warmup"] * workers, [hashed] * workers))
+            start = time.perf_counter()
+            list(pool.map(_verify_and_update, ["Admin#12345"] * total, [hashed] * total))
+            elapsed = time.perf_counter() - start
+        print(f"  workers={workers:>2}  {total / elapsed:8.1f} logins/s")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,279 @@
+# backend/app/core/renderer.py
+"""
+كتابة النص العربي على الصور الإعلانية.
+
+- سجل خطوط يُحمَّل مرة واحدة لكل عملية: الخطوط المرفقة في assets/fonts أولاً
+  ثم خطوط النظام، مع كاش لكائنات ImageFont لكل (خط, حجم).
+- كاش لتشكيل النص العربي (arabic_reshaper + bidi) لأن نفس النص يُرسم عدة مرات.
+- الرسم يتم في ProcessPoolExecutor حتى لا يحجز المعالج أو الـ GIL عن الطلبات.
+
+قياس الأداء:
+    python -m backend.app.core.renderer
+"""
+import os, multiprocessing, io, asyncio, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 2)))
+FONTS_DIR = Path(os.getenv("RENDER_FONTS_DIR", Path(__file__).resolve().parent.parent.parent / "assets" / "fonts"))
+
+# لكل نوع خط: أسماء الملفات المرفقة ثم بدائل النظام (Linux / Windows / macOS).
+# المستودع يرفق NotoNaskhArabic-Regular.otf فقط (OFL، انظر assets/fonts/OFL.txt)،
+# فيُستخدم للعريض أيضاً ما لم يُضف ملف Bold إلى المجلد.
+FONT_CANDIDATES = {
+    "bold": [
+        FONTS_DIR / "NotoNaskhArabic-Bold.ttf",
+        FONTS_DIR / "Cairo-Bold.ttf",
+        FONTS_DIR / "NotoNaskhArabic-Regular.otf",
+        Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+        Path("C:/Windows/Fonts/arialbd.ttf"),
+        Path("/Library/Fonts/Arial Bold.ttf"),
+    ],
+    "regular": [
+        FONTS_DIR / "NotoNaskhArabic-Regular.otf",
+        FONTS_DIR / "Cairo-Regular.ttf",
+        Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"),
+        Path("C:/Windows/Fonts/Arial.ttf"),
+        Path("/Library/Fonts/Arial.ttf"),
+    ],
+}
+PRELOAD_SIZES = (48, 64)
+
+# المقاسات المطلوبة من صورة مولدة واحدة: (عرض, ارتفاع) النسبة وموضع النص (نسبة من الارتفاع)
+AD_FORMATS = {
+    "1:1": {"ratio": (1, 1), "text_y": 0.82},    # Feed
+    "4:5": {"ratio": (4, 5), "text_y": 0.80},    # Portrait
+    "9:16": {"ratio": (9, 16), "text_y": 0.70},  # Story: فوق منطقة أزرار التطبيق السفلية
+}
+
+
+# =====================================================
+# 🔤 سجل الخطوط وكاش التشكيل (داخل كل عملية)
+# =====================================================
+@lru_cache(maxsize=None)
+def font_path(name: str = "bold") -> str | None:
+    for candidate in FONT_CANDIDATES.get(name, []):
+        if candidate.is_file():
+            return str(candidate)
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font(name: str = "bold", size: int = 64):
+    path = font_path(name)
+    if path is None:
+        print(f"⚠️ No TrueType font found for '{name}', using Pillow default")
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=4096)
+def shape_text(text: str) -> str:
+    """تشكيل الحروف العربية وترتيبها من اليمين لليسار للرسم."""
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    return get_display(arabic_reshaper.reshape(text))
+
+
+@lru_cache(maxsize=4096)
+def text_size(text: str, font_name: str, size: int):
+    """(عرض, ارتفاع) النص المشكَّل بالخط المحدد."""
+    bbox = get_font(font_name, size).getbbox(shape_text(text))
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def preload():
+    """تحميل الخطوط الشائعة مسبقاً (يُستدعى عند بدء كل عملية في المجموعة)."""
+    for name in FONT_CANDIDATES:
+        for size in PRELOAD_SIZES:
+            get_font(name, size)
+
+
+# =====================================================
+# 🖌️ الرسم (يُنفَّذ داخل عمليات المجموعة)
+# =====================================================
+def render_text(image: bytes, text: str, style: str = "shadow", font_name: str = "bold", font_size: int = 64) -> bytes:
+    """
+    كتابة النص على الصورة وإرجاعها PNG.
+    style:
+      - shadow: نص أبيض بظل أسفل الصورة.
+      - box: نص أبيض فوق شريط شفاف داكن عند 82% من الارتفاع.
+    """
+    im = Image.open(io.BytesIO(image)).convert("RGBA")
+    W, H = im.size
+    font = get_font(font_name, font_size)
+    shaped = shape_text(text)
+    tw, th = text_size(text, font_name, font_size)
+    x = (W - tw) / 2
+
+    if style == "box":
+        layer = Image.new("RGBA", im.size, (255, 255, 255, 0))
+        draw = ImageDraw.Draw(layer)
+        y = H * 0.82
+        draw.rectangle([(x - 20, y - 10), (x + tw + 20, y + th + 10)], fill=(0, 0, 0, 120))
+        draw.text((x, y), shaped, font=font, fill=(255, 255, 255, 255))
+        im = Image.alpha_composite(im, layer)
+    else:
+        draw = ImageDraw.Draw(im)
+        y = H - th - 60
+        draw.text((x + 3, y + 3), shaped, font=font, fill=(0, 0, 0, 180))
+        draw.text((x, y), shaped, font=font, fill=(255, 255, 255, 255))
+
+    out = io.BytesIO()
+    im.convert("RGB").save(out, format="PNG")
+    return out.getvalue()
+
+
+# =====================================================
+# 📐 مقاسات متعددة من صورة واحدة
+# =====================================================
+def _best_offset(energy: np.ndarray, window: int) -> int:
+    """بداية النافذة (بطول window) ذات أعلى مجموع طاقة على محور واحد."""
+    if window >= len(energy):
+        return 0
+    sums = np.convolve(energy, np.ones(window), mode="valid")
+    return int(np.argmax(sums))
+
+
+def smart_crop(im: Image.Image, width: int, height: int) -> Image.Image:
+    """قص إلى (width, height) حول المنطقة الأكثر تفصيلاً (حواف) بدل المنتصف دائماً."""
+    W, H = im.size
+    scale = 256 / max(W, H)
+    small = im.convert("L").resize((max(1, int(W * scale)), max(1, int(H * scale))))
+    edges = np.asarray(small.filter(ImageFilter.FIND_EDGES), dtype=np.float32)
+    x = int(_best_offset(edges.sum(axis=0), max(1, int(width * scale))) / scale)
+    y = int(_best_offset(edges.sum(axis=1), max(1, int(height * scale))) / scale)
+    x, y = min(x, W - width), min(y, H - height)
+    return im.crop((x, y, x + width, y + height))
+
+
+def extend(im: Image.Image, width: int, height: int, anchor: float = 0.35) -> Image.Image:
+    """
+    توسيع اللوحة إلى (width, height): خلفية من نفس الصورة مكبّرة ومموّهة،
+    والصورة الأصلية فوقها (anchor = موضعها العمودي في المساحة الزائدة).
+    """
+    W, H = im.size
+    cover = max(width / W, height / H)
+    bg = im.resize((int(W * cover) + 1, int(H * cover) + 1)).filter(ImageFilter.GaussianBlur(40))
+    left, top = (bg.width - width) // 2, (bg.height - height) // 2
+    canvas = bg.crop((left, top, left + width, top + height))
+    canvas = Image.blend(canvas, Image.new(canvas.mode, canvas.size, (0, 0, 0, 255)), 0.35)
+    canvas.paste(im, ((width - W) // 2, int((height - H) * anchor)))
+    return canvas
+
+
+def reframe(im: Image.Image, ratio) -> Image.Image:
+    """نفس العرض بالنسبة المطلوبة: قص ذكي إذا كانت الصورة أطول، وتوسيع إذا كانت أقصر."""
+    W, H = im.size
+    rw, rh = ratio
+    target_h = round(W * rh / rw)
+    if target_h == H:
+        return im
+    if target_h < H:
+        return smart_crop(im, W, target_h)
+    return extend(im, W, target_h)
+
+
+def _draw_text(im: Image.Image, text: str, y_ratio: float, style: str, font_name: str) -> Image.Image:
+    W, H = im.size
+    font_size = max(24, W // 16)  # 64 عند عرض 1024
+    font = get_font(font_name, font_size)
+    shaped = shape_text(text)
+    tw, th = text_size(text, font_name, font_size)
+    x, y = (W - tw) / 2, min(H * y_ratio, H - th - 20)
+
+    layer = Image.new("RGBA", im.size, (255, 255, 255, 0))
+    draw = ImageDraw.Draw(layer)
+    if style == "box":
+        draw.rectangle([(x - 20, y - 10), (x + tw + 20, y + th + 10)], fill=(0, 0, 0, 120))
+    else:
+        draw.text((x + 3, y + 3), shaped, font=font, fill=(0, 0, 0, 180))
+    draw.text((x, y), shaped, font=font, fill=(255, 255, 255, 255))
+    return Image.alpha_composite(im, layer)
+
+
+def render_formats(image: bytes, text: str | None, formats=tuple(AD_FORMATS), style: str = "shadow",
+                   font_name: str = "bold") -> dict:
+    """
+    إنتاج عدة مقاسات من صورة مولدة واحدة، مع النص (إن وُجد) في موضع مناسب لكل مقاس.
+    يُرجع {"1:1": PNG bytes, "4:5": ..., "9:16": ...}.
+    """
+    source = Image.open(io.BytesIO(image)).convert("RGBA")
+    out = {}
+    for name in formats:
+        layout = AD_FORMATS[name]
+        im = reframe(source, layout["ratio"])
+        if text:
+            im = _draw_text(im, text, layout["text_y"], style, font_name)
+        buf = io.BytesIO()
+        im.convert("RGB").save(buf, format="PNG")
+        out[name] = buf.getvalue()
+    return out
+
+
+# =====================================================
+# 🏊 مجموعة العمليات
+# =====================================================
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn وليس fork: العملية الأم فيها threads (threadpool، عمّال الطابور) وقد يرث الابن قفلاً محجوزاً فيتجمد
+                _pool = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS, initializer=preload, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def render_text_async(image: bytes, text: str, **kwargs) -> bytes:
+    return await asyncio.wrap_future(_get_pool().submit(render_text, image, text, **kwargs))
+
+
+async def render_formats_async(image: bytes, text: str | None, **kwargs) -> dict:
+    return await asyncio.wrap_future(_get_pool().submit(render_formats, image, text, **kwargs))
+
+
+# =====================================================
+# 📈 قياس الأداء: عمليات رسم في الثانية حسب عدد العمليات
+# =====================================================
+def _sample_image(size: int = 1024) -> bytes:
+    out = io.BytesIO()
+    Image.linear_gradient("L").resize((size, size)).convert("RGB").save(out, format="PNG")
+    return out.getvalue()
+
+
+def _benchmark(total: int = 48):
+    image = _sample_image()
+    text = "عرض خاص لفترة محدودة! خصم ٥٠٪"
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"font={font_path('bold')}, 1024x1024 PNG, {total} renders per run")
+    for workers in counts:
+        with ProcessPoolExecutor(max_workers=workers, initializer=preload) as pool:
+            list(pool.map(render_text, [image] * workers, [text] * workers))
+            start = time.perf_counter()
+            list(pool.map(render_text, [image] * total, [text] * total))
+            elapsed = time.perf_counter() - start
+        rate = total / elapsed
+        print(f"  workers={workers:>2}  {rate:7.1f} renders/s  ({rate / min(workers, os.cpu_count() or 1):6.1f} per core)")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -6,6 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from backend.app.models import User
+from backend.app.services.auth_service import get_principal
 
 SECRET_KEY = "super_secret_key_Adm!rr0r_2025"
 ALGORITHM = "HS256"
@@ -33,7 +34,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_principal(db, user_id, by="id")
     if user is None:
         raise credentials_exception
     return user
@@ -1,7 +1,10 @@
 # backend/app/database.py
-import os
+import os, threading, time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # ------------------------
@@ -16,9 +19,69 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("❌ DATABASE_URL not set in .env file")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# إعدادات مجمّع الاتصالات (تنطبق على المحرك المتزامن وغير المتزامن)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# 0 لتعطيل كاش الـ prepared statements (مطلوب خلف pgbouncer بوضع transaction)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ------------------------
+# المحرك غير المتزامن (asyncpg)
+# ------------------------
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(
+    drivername="postgresql+asyncpg"
+)
+
+def _create_async_engine(url):
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args={
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# ------------------------
+# نسخة القراءة (Read Replica) — اختيارية
+# ------------------------
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+# أقصى تأخر مسموح للنسخة قبل تحويل القراءات إلى القاعدة الأساسية
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "1"))
+
+replica_engine = None
+ReplicaSessionLocal = None
+if REPLICA_DATABASE_URL:
+    replica_engine = _create_async_engine(
+        make_url(REPLICA_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    )
+    ReplicaSessionLocal = async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+
+_last_write_at = 0.0  # آخر كتابة معروفة لهذه العملية (epoch)
+_replica_fresh_as_of = None  # النسخة محدّثة حتى هذه اللحظة (epoch)
+_replica_checked_at = 0.0
+_write_lock = threading.Lock()
 Base = declarative_base()
 
 
@@ -34,26 +97,93 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """نفس get_db لكن بجلسة AsyncSession للمسارات غير المتزامنة."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def mark_write(at: datetime | None = None):
+    """
+    تسجيل كتابة حتى تُقرأ نتائجها من القاعدة الأساسية إلى أن تلحق بها النسخة.
+    at: وقت الكتابة بتوقيت UTC (افتراضياً الآن).
+    """
+    global _last_write_at
+    ts = at.replace(tzinfo=timezone.utc).timestamp() if at else time.time()
+    with _write_lock:
+        _last_write_at = max(_last_write_at, ts)
+
+
+async def _replica_fresh_until():
+    """متى كانت النسخة مطابقة للأساسية (يُقاس كل REPLICA_LAG_CHECK_INTERVAL ثانية)."""
+    global _replica_fresh_as_of, _replica_checked_at
+    now = time.monotonic()
+    if now - _replica_checked_at < REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_fresh_as_of
+    _replica_checked_at = now
+
+    try:
+        async with replica_engine.connect() as conn:
+            # إذا طُبّق كل ما استُقبل من WAL فالنسخة محدّثة الآن، وإلا فحتى آخر معاملة طُبّقت
+            _replica_fresh_as_of = (await conn.execute(text(
+                "SELECT extract(epoch FROM CASE "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN now() "
+                "ELSE pg_last_xact_replay_timestamp() END)"
+            ))).scalar()
+    except Exception as e:
+        print("⚠️ Replica lag check failed:", e)
+        _replica_fresh_as_of = None
+    return _replica_fresh_as_of
+
+
+async def replica_is_usable() -> bool:
+    if ReplicaSessionLocal is None:
+        return False
+    fresh_as_of = await _replica_fresh_until()
+    if fresh_as_of is None:
+        return False
+    fresh_as_of = float(fresh_as_of)
+    return fresh_as_of >= _last_write_at and time.time() - fresh_as_of <= REPLICA_MAX_LAG_SECONDS
+
+
+async def get_read_db():
+    """
+    جلسة للقراءة فقط: من النسخة إن كانت موجودة ومحدّثة بما يكفي،
+    وإلا من القاعدة الأساسية (قراءة ما كُتب للتو).
+    """
+    session_factory = ReplicaSessionLocal if await replica_is_usable() else AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
 # ------------------------
-# تهيئة قاعدة البيانات (إنشاء الجداول)
+# تهيئة قاعدة البيانات (ترحيلات Alembic)
 # ------------------------
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+BASELINE_REVISION = "0001_baseline"
+# عطّلها إذا كانت الترحيلات تُشغَّل كخطوة منفصلة في النشر (alembic upgrade head)
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
+
+
+def _alembic_config():
+    from alembic.config import Config
+    cfg = Config()
+    cfg.set_main_option("script_location", MIGRATIONS_DIR)
+    return cfg
+
+
 def init_db():
-    """إنشاء جميع الجداول إذا لم تكن موجودة."""
-    from backend.app import models
-    print("🛠️ Initializing database...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ All tables created or verified.")
+    """ترقية قاعدة البيانات إلى آخر ترحيل."""
+    if not DB_AUTO_MIGRATE:
+        return
+    from alembic import command
 
-    # فحص الجداول الموجودة وعرض الأعمدة الأساسية في جدول users
-    try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        print(f"📦 Found tables: {tables}")
-
-        if "users" in tables:
-            columns = [col["name"] for col in inspector.get_columns("users")]
-            print(f"📋 Columns in 'users': {columns}")
-        else:
-            print("⚠️ Table 'users' not found yet.")
-    except Exception as e:
-        print(f"⚠️ Could not inspect tables: {e}")
+    print("🛠️ Running database migrations...")
+    cfg = _alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # قاعدة أنشأها create_all قبل الترحيلات: نعتبرها على النسخة الأساسية
+        print("📌 Existing schema without alembic_version, stamping", BASELINE_REVISION)
+        command.stamp(cfg, BASELINE_REVISION)
+    command.upgrade(cfg, "head")
+    print("✅ Database is at the latest migration.")
@@ -17,7 +17,9 @@ if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 
 # -------- استيراد التهيئة وقاعدة البيانات --------
-from backend.app.database import init_db
+from backend.app.database import init_db, async_engine, replica_engine
+from backend.app.services import job_queue, engagement_model
+from backend.app.core import ai_cache, passwords, image_store, renderer, keywords
 from backend.app.routers import (
     users,
     admin,
@@ -44,11 +46,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # مؤشر الصفحة التالية في قوائم الترقيم
 )
 
 # -------- تهيئة static للصور --------
-STATIC_DIR = os.path.join(BASE_DIR, "static", "generated")
-os.makedirs(STATIC_DIR, exist_ok=True)
+# الصور المولدة: من القرص بكاش دائم، أو تحويل إلى S3 (يجب ربطها قبل /static)
+image_store.mount(app)
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
 
 # -------- عند تشغيل التطبيق --------
@@ -56,6 +59,48 @@ app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), na
 def on_startup():
     init_db()
 
+# -------- معاجم الكلمات المفتاحية (تُبنى مرة واحدة لكل الطلبات) --------
+@app.on_event("startup")
+def load_keyword_lexicons():
+    keywords.load()
+
+# -------- نموذج توقع التفاعل المحلي (إن وُجد ملف مدرَّب) --------
+@app.on_event("startup")
+def load_engagement_model():
+    engagement_model.load_model()
+
+# -------- عمّال طابور المهام (توليد / تحليل) --------
+@app.on_event("startup")
+async def start_job_workers():
+    if job_queue.JOB_WORKERS_ENABLED:
+        job_queue.start_workers()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop_workers()
+
+# -------- إغلاق اتصالات المحرك غير المتزامن --------
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+# -------- مجموعة عمليات bcrypt --------
+@app.on_event("shutdown")
+def stop_password_pool():
+    passwords.shutdown_pool()
+
+# -------- مجموعة عمليات رسم النص على الصور --------
+@app.on_event("shutdown")
+def stop_render_pool():
+    renderer.shutdown_pool()
+
+# -------- عدّادات استخدام كاش الذكاء الاصطناعي --------
+@app.on_event("shutdown")
+def flush_ai_cache_hits():
+    ai_cache.flush_hits()
+
 # -------- تضمين الراوترات --------
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -0,0 +1,140 @@
+"""baseline: the schema previously created by Base.metadata.create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+قواعد البيانات القديمة (التي أنشأها create_all بدون جدول alembic_version)
+تُختم على هذه النسخة في init_db بدل تنفيذها.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+user_role = postgresql.ENUM("user", "admin", name="userrole", create_type=False)
+plan_type = postgresql.ENUM("free", "pro", "agency", name="plantype", create_type=False)
+request_status = postgresql.ENUM("pending", "processing", "completed", name="requeststatus", create_type=False)
+generation_type = postgresql.ENUM("text", "image", "video", "full", name="generationtype", create_type=False)
+payment_status = postgresql.ENUM("pending", "paid", "failed", name="paymentstatus", create_type=False)
+
+ENUMS = [user_role, plan_type, request_status, generation_type, payment_status]
+
+
+def upgrade():
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table(
+        "plans",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+        sa.Column("price", sa.DECIMAL(), nullable=False),
+        sa.Column("monthly_limit", sa.Integer(), nullable=False),
+        sa.Column("features", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.Text(), nullable=True),
+        sa.Column("full_name", sa.String(120), nullable=True),
+        sa.Column("role", user_role, nullable=False),
+        sa.Column("plan_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("plans.id"), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_user_email", "users", ["email"])
+
+    op.create_table(
+        "categories",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "ads_library",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("platform_ad_id", sa.String(255), nullable=False),
+        sa.Column("platform", sa.String(50), nullable=False),
+        sa.Column("ad_text", sa.Text(), nullable=True),
+        sa.Column("media_url", sa.Text(), nullable=True),
+        sa.Column("engagement_score", sa.Float(), nullable=True),
+        sa.Column("ad_metadata", postgresql.JSONB(), nullable=True),
+        sa.Column("category_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("categories.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_ads_library_platform_ad_id", "ads_library", ["platform_ad_id"])
+    op.create_index("ix_ads_platform_ad_id", "ads_library", ["platform_ad_id"])
+
+    op.create_table(
+        "ad_requests",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("category_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("categories.id"), nullable=True),
+        sa.Column("status", request_status, nullable=False),
+        sa.Column("input_query", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "ad_results",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("ad_request_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("ad_requests.id"), nullable=True, unique=True),
+        sa.Column("source_ad_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("ads_library.id"), nullable=True),
+        sa.Column("analysis_json", postgresql.JSONB(), nullable=True),
+        sa.Column("generated_assets", postgresql.JSONB(), nullable=True),
+        sa.Column("score", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "generated_ads",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("based_on_ad_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("ads_library.id"), nullable=True),
+        sa.Column("generation_type", generation_type, nullable=False),
+        sa.Column("ad_text", sa.Text(), nullable=True),
+        sa.Column("hashtags", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("design_url", sa.Text(), nullable=True),
+        sa.Column("video_url", sa.Text(), nullable=True),
+        sa.Column("recommendations", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "transactions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("plan", plan_type, nullable=False),
+        sa.Column("amount", sa.DECIMAL(), nullable=False),
+        sa.Column("currency", sa.String(10), nullable=True),
+        sa.Column("stripe_session_id", sa.String(255), nullable=True),
+        sa.Column("status", payment_status, nullable=True),
+        sa.Column("payment_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "feedback",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("ad_request_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("ad_requests.id"), nullable=True),
+        sa.Column("rating", sa.Integer(), nullable=True),
+        sa.Column("comment", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    for table in ["feedback", "transactions", "generated_ads", "ad_results", "ad_requests",
+                  "ads_library", "categories", "users", "plans"]:
+        op.drop_table(table)
+    bind = op.get_bind()
+    for enum in reversed(ENUMS):
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,62 @@
+"""job queue columns, generated_ads.ad_request_id, ai_cache, keyset indexes
+
+Revision ID: 0002_job_queue_and_ai_cache
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+هذه التغييرات أُضيفت سابقاً عبر create_all، لذلك قد يكون بعضها موجوداً
+في قواعد مختومة على 0001 — كل الأوامر هنا بصيغة IF NOT EXISTS.
+"""
+from alembic import op
+
+revision = "0002_job_queue_and_ai_cache"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TYPE requeststatus ADD VALUE IF NOT EXISTS 'failed'")
+
+    op.execute("""
+        ALTER TABLE ad_requests
+            ADD COLUMN IF NOT EXISTS job_type VARCHAR(50),
+            ADD COLUMN IF NOT EXISTS payload JSONB,
+            ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS error TEXT,
+            ADD COLUMN IF NOT EXISTS started_at TIMESTAMP WITHOUT TIME ZONE,
+            ADD COLUMN IF NOT EXISTS finished_at TIMESTAMP WITHOUT TIME ZONE
+    """)
+    op.execute("""
+        ALTER TABLE generated_ads
+            ADD COLUMN IF NOT EXISTS ad_request_id UUID REFERENCES ad_requests (id)
+    """)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS ai_cache (
+            key VARCHAR(64) PRIMARY KEY,
+            kind VARCHAR(20) NOT NULL,
+            value JSONB NOT NULL,
+            hits INTEGER NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            last_hit_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.create_index("ix_ai_cache_last_hit_at", "ai_cache", ["last_hit_at"], if_not_exists=True)
+
+    op.create_index("ix_ad_results_created_at_id", "ad_results", ["created_at", "id"], if_not_exists=True)
+    op.create_index(
+        "ix_generated_ads_user_created_at_id", "generated_ads", ["user_id", "created_at", "id"], if_not_exists=True
+    )
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_users_created_at_id", table_name="users")
+    op.drop_index("ix_generated_ads_user_created_at_id", table_name="generated_ads")
+    op.drop_index("ix_ad_results_created_at_id", table_name="ad_results")
+    op.drop_table("ai_cache")
+    op.drop_column("generated_ads", "ad_request_id")
+    for column in ["finished_at", "started_at", "error", "attempts", "payload", "job_type"]:
+        op.drop_column("ad_requests", column)
+    # لا يمكن حذف قيمة من ENUM في Postgres؛ 'failed' تبقى في requeststatus
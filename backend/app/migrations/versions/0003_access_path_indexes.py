@@ -0,0 +1,49 @@
+"""indexes matching the hot query paths; drop duplicate indexes
+
+Revision ID: 0003_access_path_indexes
+Revises: 0002_job_queue_and_ai_cache
+Create Date: 2026-10-18
+
+- ad_results: (created_at, id) جزئي على generated_assets IS NOT NULL لـ /latest و /all،
+  و source_ad_id للحذف والتحليل الدفعي (NOT EXISTS).
+- ad_requests: طابور المهام (pending / processing) مرتب بـ created_at.
+- حذف ix_user_email و ix_ads_platform_ad_id لأنهما نسخة من ix_users_email و ix_ads_library_platform_ad_id.
+
+الفهارس تُنشأ CONCURRENTLY حتى لا تُقفل الجداول أثناء الكتابة.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_access_path_indexes"
+down_revision = "0002_job_queue_and_ai_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_ad_results_generated_created_at_id", "ad_results", ["created_at", "id"],
+            postgresql_where=sa.text("generated_assets IS NOT NULL"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_ad_results_source_ad_id", "ad_results", ["source_ad_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_ad_requests_queue", "ad_requests", ["created_at"],
+            postgresql_where=sa.text("job_type IS NOT NULL AND status IN ('pending', 'processing')"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index("ix_user_email", table_name="users", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_ads_platform_ad_id", table_name="ads_library", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_ads_platform_ad_id", "ads_library", ["platform_ad_id"], postgresql_concurrently=True)
+        op.create_index("ix_user_email", "users", ["email"], postgresql_concurrently=True)
+        op.drop_index("ix_ad_requests_queue", table_name="ad_requests", postgresql_concurrently=True)
+        op.drop_index("ix_ad_results_source_ad_id", table_name="ad_results", postgresql_concurrently=True)
+        op.drop_index("ix_ad_results_generated_created_at_id", table_name="ad_results", postgresql_concurrently=True)
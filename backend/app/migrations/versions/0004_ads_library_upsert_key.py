@@ -0,0 +1,51 @@
+"""ads_library: unique (platform, platform_ad_id) and updated_at
+
+Revision ID: 0004_ads_library_upsert_key
+Revises: 0003_access_path_indexes
+Create Date: 2026-10-18
+
+الإعلانات المكررة (نفس المنصة ونفس platform_ad_id) تُدمج في أقدم صف:
+تُنقل إليه النتائج والإعلانات المولدة المرتبطة ثم تُحذف النسخ.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_ads_library_upsert_key"
+down_revision = "0003_access_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ads_library", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE ads_library SET updated_at = created_at")
+
+    op.execute("""
+        CREATE TEMP TABLE ads_library_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY platform, platform_ad_id ORDER BY created_at NULLS LAST, id
+            ) AS keep_id
+            FROM ads_library
+        ) d
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE ad_results r SET source_ad_id = d.keep_id
+        FROM ads_library_duplicates d WHERE r.source_ad_id = d.id
+    """)
+    op.execute("""
+        UPDATE generated_ads g SET based_on_ad_id = d.keep_id
+        FROM ads_library_duplicates d WHERE g.based_on_ad_id = d.id
+    """)
+    op.execute("DELETE FROM ads_library a USING ads_library_duplicates d WHERE a.id = d.id")
+
+    op.create_unique_constraint("uq_ads_library_platform_ad", "ads_library", ["platform", "platform_ad_id"])
+    # لا يوجد استعلام على platform_ad_id وحده؛ القيد الجديد يغطي البحث بالمفتاح
+    op.drop_index("ix_ads_library_platform_ad_id", table_name="ads_library", if_exists=True)
+
+
+def downgrade():
+    op.create_index("ix_ads_library_platform_ad_id", "ads_library", ["platform_ad_id"])
+    op.drop_constraint("uq_ads_library_platform_ad", "ads_library", type_="unique")
+    op.drop_column("ads_library", "updated_at")
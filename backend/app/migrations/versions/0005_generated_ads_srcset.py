@@ -0,0 +1,22 @@
+"""generated_ads.design_srcset
+
+Revision ID: 0005_generated_ads_srcset
+Revises: 0004_ads_library_upsert_key
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_generated_ads_srcset"
+down_revision = "0004_ads_library_upsert_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("generated_ads", sa.Column("design_srcset", postgresql.JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("generated_ads", "design_srcset")
@@ -0,0 +1,22 @@
+"""generated_ads.design_formats
+
+Revision ID: 0006_generated_ads_formats
+Revises: 0005_generated_ads_srcset
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006_generated_ads_formats"
+down_revision = "0005_generated_ads_srcset"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("generated_ads", sa.Column("design_formats", postgresql.JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("generated_ads", "design_formats")
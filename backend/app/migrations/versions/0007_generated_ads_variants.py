@@ -0,0 +1,22 @@
+"""generated_ads.variants
+
+Revision ID: 0007_generated_ads_variants
+Revises: 0006_generated_ads_formats
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007_generated_ads_variants"
+down_revision = "0006_generated_ads_formats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("generated_ads", sa.Column("variants", postgresql.JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("generated_ads", "variants")
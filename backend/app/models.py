@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import (
     Column, String, Integer, DateTime, Enum, Float, ForeignKey,
-    Boolean, DECIMAL, Text, Index
+    Boolean, DECIMAL, Text, Index, UniqueConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from sqlalchemy.orm import relationship
@@ -40,6 +40,7 @@ class RequestStatus(PyEnum):
     pending = "pending"
     processing = "processing"
     completed = "completed"
+    failed = "failed"
 
 
 class GenerationType(PyEnum):
@@ -118,7 +119,7 @@ class AdLibrary(Base):
     __tablename__ = "ads_library"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    platform_ad_id = Column(String(255), nullable=False, index=True)
+    platform_ad_id = Column(String(255), nullable=False)
     platform = Column(String(50), nullable=False, default="instagram")
     ad_text = Column(Text, nullable=True)
     media_url = Column(Text, nullable=True)
@@ -126,6 +127,12 @@ class AdLibrary(Base):
     ad_metadata = Column(JSONB, nullable=True)
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # يتغير فقط عندما يغيّر الـ upsert محتوى الإعلان فعلاً
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("platform", "platform_ad_id", name="uq_ads_library_platform_ad"),
+    )
 
     category = relationship("Category", back_populates="ads")
     analysis_reports = relationship("AdResult", back_populates="source_ad")
@@ -144,6 +151,14 @@ class AdRequest(Base):
     input_query = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # حقول طابور المهام (generate / regenerate / analyze)
+    job_type = Column(String(50), nullable=True)
+    payload = Column(JSONB, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
     user = relationship("User", back_populates="ad_requests")
     category = relationship("Category", back_populates="ad_requests")
     ad_result = relationship("AdResult", back_populates="ad_request", uselist=False, cascade="all, delete-orphan")
@@ -175,11 +190,18 @@ class GeneratedAd(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    ad_request_id = Column(UUID(as_uuid=True), ForeignKey("ad_requests.id"), nullable=True)
     based_on_ad_id = Column(UUID(as_uuid=True), ForeignKey("ads_library.id"), nullable=True)
     generation_type = Column(Enum(GenerationType), nullable=False, default=GenerationType.full)
     ad_text = Column(Text, nullable=True)
     hashtags = Column(ARRAY(String), nullable=True)
     design_url = Column(Text, nullable=True)
+    # نسخ مصغّرة للعرض في القوائم: {"webp": {"320": url, ...}}
+    design_srcset = Column(JSONB, nullable=True)
+    # نفس الإعلان بعدة مقاسات: {"1:1": {"image_url", "image_srcset"}, "4:5": ..., "9:16": ...}
+    design_formats = Column(JSONB, nullable=True)
+    # البدائل المرشحة (وضع variants): {"texts": [{"text", "score"}], "images": [...]}
+    variants = Column(JSONB, nullable=True)
     video_url = Column(Text, nullable=True)
     recommendations = Column(JSONB, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -222,9 +244,41 @@ class Feedback(Base):
     user = relationship("User", back_populates="feedbacks")
 
 
+# --------------------
+# AI Result Cache
+# --------------------
+class AiCacheEntry(Base):
+    __tablename__ = "ai_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256(kind + model + prompt version + normalized input)
+    kind = Column(String(20), nullable=False)
+    value = Column(JSONB, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 # --------------------
 # Indexes
 # --------------------
-Index("ix_ads_platform_ad_id", AdLibrary.platform_ad_id)
-Index("ix_user_email", User.email)
+# أي تعديل هنا يحتاج ترحيلاً جديداً في app/migrations/versions
+
+# ترقيم الصفحات بالمؤشر على (created_at, id)
+Index("ix_ad_results_created_at_id", AdResult.created_at, AdResult.id)
+Index("ix_generated_ads_user_created_at_id", GeneratedAd.user_id, GeneratedAd.created_at, GeneratedAd.id)
+Index("ix_users_created_at_id", User.created_at, User.id)
+
+# /latest و /all: الإعلانات المولدة فقط، الأحدث أولاً
+Index(
+    "ix_ad_results_generated_created_at_id", AdResult.created_at, AdResult.id,
+    postgresql_where=AdResult.generated_assets.isnot(None),
+)
+Index("ix_ad_results_source_ad_id", AdResult.source_ad_id)
+
+# طابور المهام: claim_next_job
+Index(
+    "ix_ad_requests_queue", AdRequest.created_at,
+    postgresql_where=AdRequest.job_type.isnot(None)
+    & AdRequest.status.in_([RequestStatus.pending, RequestStatus.processing]),
+)
 
@@ -1,9 +1,14 @@
 # backend/app/routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
+from backend.app.database import get_read_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.models import User
-from backend.app.routers.users import require_role  # لإعادة استخدام حماية المسؤول
+from backend.app.routers.users import require_claims  # لإعادة استخدام حماية المسؤول
+from backend.app.core import ai_cache
+from backend.app.services import stats_service
+from backend.app.core.pagination import PageParams, paginate, set_next_cursor
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -11,10 +16,17 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # عرض جميع المستخدمين (Admin only)
 # -----------------------------
 @router.get("/users")
-def get_all_users(db: Session = Depends(get_db), current_user: User = Depends(require_role("admin"))):
-    users = db.query(User).all()
+def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    claims=Depends(require_claims("admin")),
+):
+    users, next_cursor = paginate(db.query(User), User.created_at, User.id, page)
+    set_next_cursor(response, next_cursor)
     return {
         "count": len(users),
+        "next_cursor": next_cursor,
         "users": [
             {
                 "id": str(u.id),
@@ -31,12 +43,14 @@ def get_all_users(db: Session = Depends(get_db), current_user: User = Depends(re
 # إحصاءات عامة للنظام (Admin only)
 # -----------------------------
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db), current_user: User = Depends(require_role("admin"))):
-    total_users = db.query(User).count()
-    
-    # يمكنك إضافة مزيد من الجداول لاحقاً مثل الإعلانات أو الطلبات
-    stats = {
-        "total_users": total_users,
-        "active_users": db.query(User).filter(User.is_active == True).count(),
-    }
+async def get_stats(db: AsyncSession = Depends(get_read_db), claims=Depends(require_claims("admin"))):
+    # استعلام واحد للمستخدمين (الكل + النشطين) مع كاش قصير المدة
+    stats = await stats_service.users_stats(db)
     return {"message": "Dashboard stats fetched successfully", "data": stats}
+
+# -----------------------------
+# إحصاءات كاش تحليل الذكاء الاصطناعي (Admin only)
+# -----------------------------
+@router.get("/ai-cache")
+def get_ai_cache_stats(claims=Depends(require_claims("admin"))):
+    return {"message": "AI cache stats fetched successfully", "data": ai_cache.stats()}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from typing import Optional, List
@@ -6,7 +6,10 @@ from uuid import UUID
 
 from backend.app.database import get_db
 from backend.app.models import User, Plan, UserRole
-from backend.app.routers.users import require_role
+from backend.app.routers.users import require_claims
+from backend.app.services.auth_service import invalidate_principal
+from backend.app.services.stats_service import invalidate_users_stats
+from backend.app.core.pagination import PageParams, paginate, set_next_cursor
 
 router = APIRouter(prefix="/admin/users", tags=["Admin • Users"])
 
@@ -40,12 +43,19 @@ class UserOut(BaseModel):
 
 # ===== Endpoints =====
 @router.get("/", response_model=List[UserOut])
-def list_users(db: Session = Depends(get_db), _=Depends(require_role("admin"))):
-    return db.query(User).order_by(User.created_at.desc()).all()
+def list_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    _=Depends(require_claims("admin")),
+):
+    users, next_cursor = paginate(db.query(User), User.created_at, User.id, page)
+    set_next_cursor(response, next_cursor)
+    return users
 
 
 @router.post("/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(payload: UserCreate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+def create_user(payload: UserCreate, db: Session = Depends(get_db), _=Depends(require_claims("admin"))):
     exists = db.query(User).filter(User.email == payload.email).first()
     if exists:
         raise HTTPException(status_code=409, detail="Email already exists")
@@ -64,12 +74,13 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db), _=Depends(re
     )
     db.add(user)
     db.commit()
+    invalidate_users_stats()
     db.refresh(user)
     return user
 
 
 @router.patch("/{user_id}", response_model=UserOut)
-def update_user(user_id: UUID, payload: UserUpdate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+def update_user(user_id: UUID, payload: UserUpdate, db: Session = Depends(get_db), _=Depends(require_claims("admin"))):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -90,14 +101,18 @@ def update_user(user_id: UUID, payload: UserUpdate, db: Session = Depends(get_db
 
     db.commit()
     db.refresh(user)
+    invalidate_principal(user)
+    invalidate_users_stats()
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: UUID, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+def delete_user(user_id: UUID, db: Session = Depends(get_db), _=Depends(require_claims("admin"))):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    invalidate_principal(user)
+    invalidate_users_stats()
     return None
@@ -1,83 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select, func
 from uuid import UUID
 from typing import Optional, Any, Dict
 from datetime import datetime
-import base64, pathlib, time, os
 from backend.app.models import User
 from backend.app.routers.users import get_current_user
 
 from app.database import get_db
 from backend.app.models import AdLibrary, AdResult, AdRequest, RequestStatus
 from app.core.ai_service import analyze_ad_text, analyze_ad_image, generate_new_ad
-from backend.app.routers.users import require_role, get_current_user
-from openai import OpenAI
-from fastapi import Request
-client = OpenAI()
+from backend.app.routers.users import require_claims, get_current_user
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import json
+from backend.app.database import SessionLocal, get_read_db, mark_write
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.services.ad_service import stream_enhanced, clamp_variants, AD_VARIANTS_MAX
+from backend.app.services import stats_service, ingest_service
+from backend.app.services.job_queue import (
+    enqueue, job_result, JOB_GENERATE, JOB_REGENERATE, JOB_ANALYZE, JOB_ANALYZE_BATCH,
+)
+from backend.app.schemas.ad_schema import AdCreate
+from backend.app.schemas.analysis_schema import BatchAnalyzeRequest
+from backend.app.core.pagination import PageParams, paginate_select_async, set_next_cursor
 router = APIRouter(prefix="/ads-library", tags=["Ads Library"])
 
-# ===== إعداد المسار الثابت لحفظ الصور =====
-STATIC_DIR = pathlib.Path(__file__).resolve().parent.parent.parent / "static" / "generated"
-STATIC_DIR.mkdir(parents=True, exist_ok=True)
-
-# ====== توليد الصورة ======
-def generate_ad_image(prompt: str, size: str = "1024x1024") -> dict:
-    safe_prompt = (
-        "High-quality commercial ad photo, cinematic lighting, realistic composition. "
-        "Social media style, no text, no logos. "
-        f"Concept: {prompt}"
-    )
-    resp = client.images.generate(model="gpt-image-1", prompt=safe_prompt, size=size)
-    b64 = resp.data[0].b64_json
-    img_bytes = base64.b64decode(b64)
-
-    filename = f"ad_{int(time.time()*1000)}.png"
-    out_path = STATIC_DIR / filename
-    out_path.write_bytes(img_bytes)
-
-    public_url = f"/static/generated/{filename}"
-    return {"prompt": prompt, "image_url": public_url}
-
-# ====== دمج النص العربي على الصورة ======
-def render_arabic_text_on_image(image_path: str, text: str):
-    from PIL import Image, ImageDraw, ImageFont
-    import arabic_reshaper
-    from bidi.algorithm import get_display
-
-    im = Image.open(image_path).convert("RGBA")
-    W, H = im.size
-    draw = ImageDraw.Draw(im)
-    font = ImageFont.truetype("C:/Windows/Fonts/arialbd.ttf", 64)
-
-    reshaped = arabic_reshaper.reshape(text)
-    bidi_text = get_display(reshaped)
-
-    bbox = draw.textbbox((0, 0), bidi_text, font=font)
-    text_w, text_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    x = (W - text_w) / 2
-    y = H - text_h - 60
-
-    draw.text((x + 3, y + 3), bidi_text, font=font, fill=(0, 0, 0, 180))
-    draw.text((x, y), bidi_text, font=font, fill=(255, 255, 255, 255))
-
-    output_path = pathlib.Path(image_path).with_name("final_" + pathlib.Path(image_path).name)
-    im.convert("RGB").save(output_path, format="PNG")
-    return output_path
-
 # ============================
 # إنشاء إعلان جديد
 # ============================
-class AdCreate(BaseModel):
-    platform_ad_id: str
-    platform: str
-    ad_text: Optional[str] = None
-    media_url: Optional[str] = None
-    engagement_score: Optional[float] = None
-    ad_metadata: Optional[Dict[str, Any]] = None
-    category_id: Optional[UUID] = None
-
 class AdResponse(BaseModel):
     id: UUID
     platform_ad_id: str
@@ -88,152 +41,176 @@ class AdResponse(BaseModel):
     ad_metadata: Optional[Dict[str, Any]]
     category_id: Optional[UUID]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
 @router.post("/", response_model=AdResponse)
 def create_ad(ad: AdCreate, db: Session = Depends(get_db)):  # ← أزل require_role("admin")
-    new_ad = AdLibrary(**ad.dict())
-    db.add(new_ad)
+    # upsert على (platform, platform_ad_id): إعادة جلب نفس الإعلان تحدّثه بدل تكراره
+    written = db.execute(ingest_service.upsert_ad_values(ad)).first()
     db.commit()
-    db.refresh(new_ad)
-    return new_ad
+    if written:
+        mark_write()
+        stats_service.invalidate_ads_stats()
+        return db.get(AdLibrary, written.id)
+    return (
+        db.query(AdLibrary)
+        .filter(AdLibrary.platform == ad.platform, AdLibrary.platform_ad_id == ad.platform_ad_id)
+        .first()
+    )
+
+
+# ============================
+# إدخال دفعي (NDJSON / CSV متدفق)
+# ============================
+@router.post("/bulk")
+async def bulk_ingest_ads(
+    request: Request,
+    format: Optional[str] = None,
+    current_user=Depends(require_claims("admin")),
+):
+    """
+    جسم الطلب: سطر JSON لكل إعلان (application/x-ndjson)،
+    أو CSV بسطر عناوين بأسماء حقول AdCreate (text/csv).
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    reader = ingest_service.iter_csv if fmt == "csv" else ingest_service.iter_ndjson
+    report = await ingest_service.ingest_ads(reader(request.stream()))
+    if report["inserted"]:
+        mark_write()
+        stats_service.invalidate_ads_stats()
+    return report
 
 
 # ============================
 # توليد إعلان محسّن (نص + صورة)
 # ============================
-@router.post("/{ad_id}/regenerate")
-def regenerate_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(require_role("admin"))):
+@router.post("/{ad_id}/regenerate", status_code=status.HTTP_202_ACCEPTED)
+def regenerate_ad(
+    ad_id: UUID,
+    variants: int = Query(1, ge=1, le=AD_VARIANTS_MAX, description="عدد البدائل المرشحة (نصوص وصور)"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_claims("admin")),
+):
     ad = db.query(AdLibrary).filter(AdLibrary.id == ad_id).first()
     if not ad:
         raise HTTPException(status_code=404, detail="Ad not found")
 
-    text_result = generate_new_ad(ad.ad_text or "", tone="engaging", platform=ad.platform or "instagram")
-    new_text = text_result.get("generated_text", "").strip()
-
-    # توليد الصورة
-    image_result = generate_ad_image(f"إعلان واقعي مستوحى من النص التالي: {new_text}")
-    new_image_path = pathlib.Path(STATIC_DIR) / pathlib.Path(image_result["image_url"]).name
-
-    # دمج النص العربي
-    try:
-        final_path = render_arabic_text_on_image(new_image_path, new_text)
-        new_image_url = f"/static/generated/{final_path.name}"
-    except Exception:
-        new_image_url = image_result["image_url"]
-
-    # حفظ في قاعدة البيانات
-    ad_req = AdRequest(
+    # إضافة مهمة التوليد (نص + صورة) إلى الطابور
+    job = enqueue(
+        db,
         user_id=current_user.id,
+        job_type=JOB_REGENERATE,
+        payload={"ad_id": str(ad.id), "variants": variants},
         category_id=ad.category_id,
-        status=RequestStatus.completed,
         input_query=f"Regenerated ad (text+image) for {ad.id}",
     )
-    db.add(ad_req)
-    db.flush()
-
-    ad_res = AdResult(
-        ad_request_id=ad_req.id,
-        source_ad_id=ad.id,
-        generated_assets={"new_ad_text": new_text, "new_image_url": new_image_url},
-        score=(ad.engagement_score or 80) + 5.0,
-    )
-    db.add(ad_res)
-    db.commit()
 
     return {
-        "message": "✅ تم توليد إعلان جديد محسّن بنجاح",
-        "new_text": new_text,
-        "new_image_url": new_image_url,
-        "score": ad_res.score,
+        "message": "⏳ تمت إضافة طلب التوليد إلى قائمة الانتظار",
+        "request_id": str(job.id),
+        "status": job.status.value,
     }
 
 # ============================
 # إحصائيات عامة + آخر إعلان
 # ============================
 @router.get("/stats")
-def get_ads_stats(db: Session = Depends(get_db)):
-    total_ads = db.query(AdLibrary).count()
-    analyzed_ads = db.query(AdResult).count()
-    generated_ads = db.query(AdResult).filter(AdResult.generated_assets.isnot(None)).count()
-
-    # توزيع المنصات (إحصائية بسيطة)
-    platform_counts = (
-        db.query(AdLibrary.platform)
-        .distinct()
-        .all()
-    )
-
-    platforms = [p[0] for p in platform_counts]
-
-    return {
-        "total_ads": total_ads,
-        "analyzed_ads": analyzed_ads,
-        "generated_ads": generated_ads,
-        "platforms": platforms,
-    }
+async def get_ads_stats(estimate: bool = False, db: AsyncSession = Depends(get_read_db)):
+    """
+    إحصائيات عامة في استعلام واحد (مع كاش قصير المدة).
+    estimate=true يستخدم تقديرات Postgres (reltuples / pg_stats) للجداول الكبيرة جداً.
+    """
+    return await stats_service.ads_stats(db, estimate=estimate)
 
 
 @router.get("/latest")
-def get_latest_generated_ad(request: Request, db: Session = Depends(get_db)):
+async def get_latest_generated_ad(request: Request, db: AsyncSession = Depends(get_read_db)):
     """
     إرجاع أحدث إعلان تم توليده مع رابط صورة كامل.
     """
-    ad = (
-        db.query(AdResult)
-        .filter(AdResult.generated_assets.isnot(None))
+    assets = AdResult.generated_assets
+    ad = (await db.execute(
+        select(
+            AdResult.source_ad_id,
+            assets["new_ad_text"].astext.label("text"),
+            assets["new_image_url"].astext.label("image_url"),
+            assets["image_srcset"].label("srcset"),
+            assets["formats"].label("formats"),
+            AdResult.score,
+        )
+        .where(assets.isnot(None))
         .order_by(desc(AdResult.created_at))
-        .first()
-    )
+        .limit(1)
+    )).first()
     if not ad:
         return {"message": "لا يوجد إعلان بعد"}
 
-    image_path = ad.generated_assets.get("new_image_url")
+    image_path = ad.image_url
     if image_path and not image_path.startswith("http"):
         # تأكيد تكوين رابط مطلق
         base_url = str(request.base_url).rstrip("/")
         image_path = f"{base_url}{image_path}"
 
     return {
-        "text": ad.generated_assets.get("new_ad_text"),
+        "text": ad.text,
         "image": image_path,
+        "srcset": ad.srcset,
+        "formats": ad.formats,
         "score": ad.score,
         "ad_id": str(ad.source_ad_id),
     }
 
 @router.get("/all")
-def get_all_ads(db: Session = Depends(get_db)):
+async def get_all_ads(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     """
-    إرجاع جميع الإعلانات المحفوظة في قاعدة البيانات مرتبة بالأحدث أولاً.
+    إرجاع الإعلانات المولدة مرتبة بالأحدث أولاً (صفحة واحدة، والمؤشر التالي في X-Next-Cursor).
+    يُقرأ فقط ما نحتاجه من generated_assets عبر ->> بدون تحميل كائنات ORM.
     """
-    ads = (
-        db.query(AdResult)
-        .order_by(desc(AdResult.created_at))
-        .all()
+    assets = AdResult.generated_assets
+    stmt = (
+        select(
+            AdResult.id,
+            AdResult.source_ad_id,
+            func.coalesce(assets["new_ad_text"].astext, "").label("text"),
+            func.coalesce(assets["new_image_url"].astext, "").label("image_url"),
+            assets["image_srcset"].label("srcset"),
+            AdResult.score,
+            AdResult.created_at,
+        )
+        .where(assets.isnot(None))
+    )
+    ads, next_cursor = await paginate_select_async(
+        db, stmt, AdResult.created_at, AdResult.id, page,
+        key=lambda r: (r["created_at"], r["id"]),
     )
+    set_next_cursor(response, next_cursor)
 
-    if not ads:
+    if not ads and not page.cursor:
         return {"message": "لا توجد إعلانات بعد"}
 
-    formatted = []
-    for ad in ads:
-        if not ad.generated_assets:
-            continue  # تجاهل أي إعلان بدون بيانات توليد
-        formatted.append({
-            "id": str(ad.source_ad_id),
-            "text": ad.generated_assets.get("new_ad_text", ""),
-            "image_url": ad.generated_assets.get("new_image_url", ""),
-            "score": ad.score,
-            "created_at": ad.created_at.isoformat()
-        })
-    return formatted
+    return [
+        {
+            "id": str(ad["source_ad_id"]),
+            "text": ad["text"],
+            "image_url": ad["image_url"],
+            "srcset": ad["srcset"],
+            "score": ad["score"],
+            "created_at": ad["created_at"].isoformat()
+        }
+        for ad in ads
+    ]
 
 # ============================
 # حذف إعلان
 # ============================
 @router.delete("/delete/{ad_id}")
-def delete_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(require_role("admin"))):
+def delete_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(require_claims("admin"))):
     """
     حذف إعلان نهائيًا من قاعدة البيانات وجميع نتائجه المرتبطة به.
     """
@@ -246,11 +223,11 @@ def delete_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(r
 
     db.delete(ad)
     db.commit()
+    mark_write()
+    stats_service.invalidate_ads_stats()
     return {"message": "تم حذف الإعلان بنجاح"}
 
-from fastapi import Request
-
-@router.post("/generate-enhanced")
+@router.post("/generate-enhanced", status_code=status.HTTP_202_ACCEPTED)
 def generate_enhanced_ad(
     payload: dict,
     db: Session = Depends(get_db),
@@ -258,175 +235,221 @@ def generate_enhanced_ad(
 ):
     """
     ✅ 1. يتحقق من صلاحية الاشتراك قبل التوليد
-    ✅ 2. يحسّن النص الإعلاني باستخدام GPT
-    ✅ 3. يولد الصورة الإعلانية عبر DALL·E
-    ✅ 4. يخزن الإعلان الجديد في قاعدة البيانات
-    ✅ 5. يسجّل استهلاك الإعلان من الخطة
-    ✅ 6. يعيد النتيجة في JSON جاهز للواجهة الأمامية
+    ✅ 2. يضيف مهمة (تحسين النص + توليد الصورة) إلى الطابور
+    ✅ 3. يعيد request_id لمتابعة الحالة عبر /ads-library/jobs/{request_id}
+    variants (اختياري، حتى AD_VARIANTS_MAX): عدة نصوص وصور مرشحة، الأفضل هو الرئيسي.
     """
-    import base64, time, pathlib
-    from openai import OpenAI
-    from datetime import datetime
-    from backend.app.models import GeneratedAd
-
-    client = OpenAI()
     prompt = payload.get("text", "")
     platform = payload.get("platform", "instagram")
+    variants = clamp_variants(payload.get("variants", 1))
 
     if not prompt.strip():
         raise HTTPException(status_code=400, detail="Ad text is required")
 
-    
-    # --- تحسين النص ---
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert Arabic marketing copywriter specialized in short, emotional, conversion-optimized ads."},
-                {"role": "user", "content": f"حسّن هذا النص الإعلاني بأسلوب احترافي وجذاب لمنصة {platform}: {prompt}"}
-            ],
-            max_tokens=300
-        )
-        enhanced_text = response.choices[0].message.content.strip()
-    except Exception as e:
-        print("❌ Text enhancement failed:", e)
-        enhanced_text = prompt
-
-    # --- توليد الصورة ---
-    STATIC_DIR = pathlib.Path(__file__).resolve().parent.parent.parent / "static" / "generated"
-    STATIC_DIR.mkdir(parents=True, exist_ok=True)
-
-    try:
-        img_resp = client.images.generate(
-            model="gpt-image-1",
-            prompt=f"Professional social media ad visual showing: {enhanced_text}",
-            size="1024x1024"
-        )
-        img_b64 = img_resp.data[0].b64_json
-        img_bytes = base64.b64decode(img_b64)
-        filename = f"enhanced_{int(time.time() * 1000)}.png"
-        img_path = STATIC_DIR / filename
-        img_path.write_bytes(img_bytes)
-        image_url = f"/static/generated/{filename}"
-    except Exception as e:
-        print("❌ Image generation failed:", e)
-        image_url = "/static/placeholder.png"
-
-    # --- حفظ الإعلان الجديد في قاعدة البيانات ---
-    try:
-        new_ad = GeneratedAd(
-            user_id=current_user.id,
-            ad_text=enhanced_text,
-            design_url=image_url,
-            generation_type="full",
-            created_at=datetime.utcnow(),
-        )
-        db.add(new_ad)
-        db.commit()
-        db.refresh(new_ad)
-
-    except Exception as e:
-        db.rollback()
-        print("❌ Failed to save generated ad:", e)
-        raise HTTPException(status_code=500, detail="Failed to save generated ad")
+    job = enqueue(
+        db,
+        user_id=current_user.id,
+        job_type=JOB_GENERATE,
+        payload={"text": prompt, "platform": platform, "variants": variants},
+        input_query=prompt,
+    )
 
     return {
-        "message": "✅ تم توليد الإعلان بنجاح",
-        "text": enhanced_text,
-        "image_url": image_url,
-        "ad_id": str(new_ad.id),
+        "message": "⏳ تمت إضافة طلب التوليد إلى قائمة الانتظار",
+        "request_id": str(job.id),
+        "status": job.status.value,
     }
 
 
-@router.post("/{ad_id}/analyze", tags=["Ads Library"])
-def analyze_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(require_role("admin"))):
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/generate-enhanced/stream")
+async def generate_enhanced_ad_stream(
+    payload: dict,
+    current_user: User = Depends(get_current_user),
+):
     """
-    تحليل إعلان (نص + صورة) مع حفظ النتائج في AdResult بشكل صحيح.
+    نسخة بث مباشر (Server-Sent Events) من generate-enhanced:
+    - event: token → أجزاء النص المحسّن فور وصولها
+    - event: text  → النص النهائي
+    - event: image → رابط الصورة و image_srcset + ad_id بعد الحفظ
     """
-    from app.core.ai_service import analyze_ad_text, analyze_ad_image
-    from backend.app.models import AdRequest, AdResult, RequestStatus, AdLibrary
+    from backend.app.models import GeneratedAd
 
-    ad = db.query(AdLibrary).filter(AdLibrary.id == ad_id).first()
-    if not ad:
-        raise HTTPException(status_code=404, detail="الإعلان غير موجود")
+    prompt = payload.get("text", "")
+    platform = payload.get("platform", "instagram")
+
+    if not prompt.strip():
+        raise HTTPException(status_code=400, detail="Ad text is required")
 
-    # ✅ تحليل النص
-    text_analysis = analyze_ad_text(ad.ad_text or "")
+    user_id = current_user.id
 
-    # ✅ تحليل الصورة (اختياري)
-    image_analysis = None
-    if ad.media_url:
+    def save_generated_ad(enhanced_text: str, image: dict) -> str:
+        db = SessionLocal()
         try:
-            image_analysis = analyze_ad_image(ad.media_url)
-        except Exception:
-            image_analysis = {"image_url": ad.media_url, "visual_analysis": "❌ فشل تحليل الصورة", "score": 50}
+            new_ad = GeneratedAd(
+                user_id=user_id,
+                ad_text=enhanced_text,
+                design_url=image["image_url"],
+                design_srcset=image["image_srcset"],
+                design_formats=image["formats"],
+                generation_type="full",
+                created_at=datetime.utcnow(),
+            )
+            db.add(new_ad)
+            db.commit()
+            mark_write()
+            return str(new_ad.id)
+        finally:
+            db.close()
+
+    async def events():
+        yield sse_event("start", {"platform": platform})
+        enhanced_text = prompt
+        async for event, data in stream_enhanced(prompt, platform):
+            if event == "token":
+                yield sse_event("token", data)
+            elif event == "text":
+                enhanced_text = data
+                yield sse_event("text", data)
+            elif event == "image":
+                try:
+                    ad_id = await run_in_threadpool(save_generated_ad, enhanced_text, data)
+                except Exception as e:
+                    print("❌ Failed to save generated ad:", e)
+                    yield sse_event("error", {"detail": "Failed to save generated ad"})
+                    return
+                yield sse_event("image", {**data, "ad_id": ad_id})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # ✅ حساب النتيجة الإجمالية
-    score = text_analysis.get("score", 50)
-    if image_analysis:
-        score = round((text_analysis["score"] + image_analysis["score"]) / 2, 2)
 
-    # ✅ إنشاء طلب تحليل مرتبط بالإعلان
-    ad_request = AdRequest(
+@router.post("/{ad_id}/analyze", tags=["Ads Library"], status_code=status.HTTP_202_ACCEPTED)
+def analyze_ad(ad_id: UUID, db: Session = Depends(get_db), current_user=Depends(require_claims("admin"))):
+    """
+    إضافة مهمة تحليل إعلان (نص + صورة) إلى الطابور، وتُحفظ النتيجة في AdResult.
+    """
+    ad = db.query(AdLibrary).filter(AdLibrary.id == ad_id).first()
+    if not ad:
+        raise HTTPException(status_code=404, detail="الإعلان غير موجود")
+
+    job = enqueue(
+        db,
         user_id=current_user.id,
+        job_type=JOB_ANALYZE,
+        payload={"ad_id": str(ad.id)},
         category_id=ad.category_id,
-        status=RequestStatus.completed,
         input_query=f"تحليل إعلان {ad_id}",
     )
-    db.add(ad_request)
-    db.flush()  # ضروري للحصول على ID قبل الإنشاء التالي
-
-    # ✅ حفظ النتيجة في AdResult
-    ad_result = AdResult(
-        ad_request_id=ad_request.id,
-        source_ad_id=ad.id,
-        analysis_json={"text": text_analysis, "image": image_analysis},
-        score=score,
+
+    return {
+        "message": "⏳ تمت إضافة طلب التحليل إلى قائمة الانتظار",
+        "request_id": str(job.id),
+        "status": job.status.value,
+    }
+
+
+# ============================
+# تحليل مجموعة إعلانات (Batch)
+# ============================
+@router.post("/analyze-batch", tags=["Ads Library"], status_code=status.HTTP_202_ACCEPTED)
+def analyze_ads_batch(
+    options: BatchAnalyzeRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_claims("admin")),
+):
+    """
+    تحليل كل الإعلانات المطابقة للفلاتر (فئة / منصة / تاريخ / غير المحللة فقط)
+    بتوازٍ محدود وحد للمعدل، مع حفظ نقطة استئناف بعد كل دفعة.
+    """
+    job = enqueue(
+        db,
+        user_id=current_user.id,
+        job_type=JOB_ANALYZE_BATCH,
+        payload=options.model_dump(mode="json"),
+        category_id=options.category_id,
+        input_query="تحليل مجموعة إعلانات",
     )
-    db.add(ad_result)
-    db.commit()
 
     return {
-        "message": "✅ تم تحليل الإعلان بنجاح",
-        "ad_id": str(ad.id),
-        "score": score,
-        "text_analysis": text_analysis,
-        "image_analysis": image_analysis,
+        "message": "⏳ تمت إضافة طلب التحليل الجماعي إلى قائمة الانتظار",
+        "request_id": str(job.id),
+        "status": job.status.value,
+    }
+
+
+# ============================
+# حالة مهمة (توليد / تحليل)
+# ============================
+@router.get("/jobs/{request_id}")
+def get_job_status(request_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    job = db.query(AdRequest).filter(AdRequest.id == request_id).first()
+    if not job or (job.user_id != current_user.id and current_user.role.value != "admin"):
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    if job.status.value == "completed" and job.finished_at:
+        # قد يكون العامل في عملية أخرى: نضمن قراءة نتيجته من الأساسية حتى تلحق النسخة
+        mark_write(job.finished_at)
+
+    return {
+        "request_id": str(job.id),
+        "job_type": job.job_type,
+        "status": job.status.value,
+        "attempts": job.attempts,
+        "error": job.error if job.status.value == "failed" else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "progress": (job.payload or {}).get("progress") if job.job_type == JOB_ANALYZE_BATCH else None,
+        "result": job_result(db, job),
     }
 
 @router.get("/analytics/all", tags=["Analytics"])
-def get_all_ad_analytics(db: Session = Depends(get_db)):
+async def get_all_ad_analytics(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     """
-    إرجاع جميع نتائج التحليل المحفوظة في قاعدة البيانات (ad_results)
-    مع تفاصيل الإعلان المرتبط بها.
+    إرجاع نتائج التحليل المحفوظة في قاعدة البيانات (ad_results)
+    مع تفاصيل الإعلان المرتبط بها (صفحة واحدة، والمؤشر التالي في X-Next-Cursor).
     """
-    from backend.app.models import AdResult, AdLibrary
-
-    results = (
-        db.query(AdResult, AdLibrary)
-        .join(AdLibrary, AdLibrary.id == AdResult.source_ad_id)
-        .order_by(AdResult.created_at.desc())
-        .all()
+    analysis = AdResult.analysis_json
+    stmt = (
+        select(
+            AdResult.id.label("result_id"),
+            AdLibrary.id.label("ad_id"),
+            AdLibrary.ad_text,
+            AdLibrary.media_url,
+            AdResult.score,
+            analysis["text"].label("text_analysis"),
+            analysis["image"].label("image_analysis"),
+            AdResult.created_at,
+        )
+        .join_from(AdResult, AdLibrary, AdLibrary.id == AdResult.source_ad_id)
+    )
+    results, next_cursor = await paginate_select_async(
+        db, stmt, AdResult.created_at, AdResult.id, page,
+        key=lambda r: (r["created_at"], r["result_id"]),
     )
+    set_next_cursor(response, next_cursor)
 
-    output = []
-    for r in results:
-        analysis_json = r.AdResult.analysis_json or {}  # ✅ التعامل مع القيم الفارغة
-        text_analysis = analysis_json.get("text", {})
-        image_analysis = analysis_json.get("image", {})
-
-        output.append({
-            "result_id": str(r.AdResult.id),
-            "ad_id": str(r.AdLibrary.id),
-            "text": r.AdLibrary.ad_text,
-            "image_url": r.AdLibrary.media_url,
-            "score": r.AdResult.score or 0,
-            "text_analysis": text_analysis,
-            "image_analysis": image_analysis,
-            "created_at": r.AdResult.created_at.isoformat(),
-        })
-
-    return output
+    return [
+        {
+            "result_id": str(r["result_id"]),
+            "ad_id": str(r["ad_id"]),
+            "text": r["ad_text"],
+            "image_url": r["media_url"],
+            "score": r["score"] or 0,
+            "text_analysis": r["text_analysis"] or {},  # ✅ التعامل مع القيم الفارغة
+            "image_analysis": r["image_analysis"] or {},
+            "created_at": r["created_at"].isoformat(),
+        }
+        for r in results
+    ]
 
 # ============================
 # إعلانات المستخدم الحالي
@@ -438,18 +461,33 @@ from backend.app.database import get_db
 from sqlalchemy.orm import Session
 
 @router.get("/user")
-def get_user_ads(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    ads = db.query(GeneratedAd).filter(GeneratedAd.user_id == current_user.id).all()
+async def get_user_ads(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = (
+        select(
+            GeneratedAd.id, GeneratedAd.ad_text, GeneratedAd.design_url, GeneratedAd.design_srcset,
+            GeneratedAd.design_formats, GeneratedAd.created_at,
+        )
+        .where(GeneratedAd.user_id == current_user.id)
+    )
+    ads, next_cursor = await paginate_select_async(
+        db, stmt, GeneratedAd.created_at, GeneratedAd.id, page,
+        key=lambda r: (r["created_at"], r["id"]),
+    )
+    set_next_cursor(response, next_cursor)
     return [
         {
-            "id": ad.id,
-            "ad_text": ad.ad_text,
-            "design_url": ad.design_url,
-            "created_at": ad.created_at.isoformat() if ad.created_at else None,
-            "score": getattr(ad, "score", 0)
+            "id": ad["id"],
+            "ad_text": ad["ad_text"],
+            "design_url": ad["design_url"],
+            "srcset": ad["design_srcset"],
+            "formats": ad["design_formats"],
+            "created_at": ad["created_at"].isoformat() if ad["created_at"] else None,
+            "score": 0,
         }
         for ad in ads
     ]
-
-
-
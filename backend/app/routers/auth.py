@@ -3,7 +3,7 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
+from backend.app.services.auth_service import authenticate
 import os
 
 from app.database import get_db
@@ -14,7 +14,6 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24h
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ------------------ Schemas ------------------
 class LoginRequest(BaseModel):
@@ -27,9 +26,6 @@ class TokenResponse(BaseModel):
     user: dict
 
 # ------------------ Helpers ------------------
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -39,8 +35,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 # ------------------ Routes ------------------
 @router.post("/login", response_model=TokenResponse)
 def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    user = authenticate(db, request.email, request.password)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token({"sub": str(user.id), "role": user.role.value})
@@ -62,7 +58,7 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
 from jose import jwt
-from passlib.context import CryptContext
+from backend.app.services.auth_service import authenticate
 from fastapi.security import OAuth2PasswordRequestForm  # ✅
 import os
 
@@ -74,7 +70,6 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -84,9 +79,6 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -96,8 +88,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 # للواجهة الأمامية JSON
 @router.post("/login", response_model=TokenResponse)
 def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    user = authenticate(db, request.email, request.password)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"sub": str(user.id), "role": user.role.value})
     return {"access_token": token, "token_type": "bearer"}
@@ -106,8 +98,8 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 @router.post("/token", response_model=TokenResponse)
 def token(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Swagger يرسل username = البريد
-    user = db.query(User).filter(User.email == form.username).first()
-    if not user or not verify_password(form.password, user.password_hash):
+    user = authenticate(db, form.username, form.password)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"sub": str(user.id), "role": user.role.value})
     return {"access_token": token, "token_type": "bearer"}
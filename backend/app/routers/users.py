@@ -1,18 +1,23 @@
 # backend/app/routers/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from typing import Optional, List
 from uuid import UUID
 
-from backend.app.database import get_db
+from backend.app.database import get_db, get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.models import User, UserRole
 from backend.app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.app.core.pagination import PageParams, paginate, set_next_cursor
+from backend.app.core.passwords import hash_password
+from backend.app.services.auth_service import Principal, TokenClaims, authenticate, get_principal, invalidate_principal
+from backend.app.services.stats_service import invalidate_users_stats
 
 router = APIRouter(prefix="/users", tags=["Users"])
 # --- Bootstrap one-time admin ---
@@ -48,25 +53,19 @@ def bootstrap_admin(
     )
     db.add(user)
     db.commit()
+    invalidate_users_stats()
     db.refresh(user)
     return {"detail": "admin_created", "email": admin_email}
 
 # =========================
 # الإعدادات الأمنية
 # =========================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 security = HTTPBearer()
 
 # =========================
 # دوال مساعدة
 # =========================
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -117,6 +116,7 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
     db.commit()
+    invalidate_users_stats()
     db.refresh(new_user)
 
     return new_user
@@ -125,11 +125,11 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = authenticate(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token({"sub": user.email, "role": user.role.value})
+    token = create_access_token({"sub": user.email, "uid": str(user.id), "role": user.role.value})
     return {
         "access_token": token,
         "token_type": "bearer",
@@ -139,14 +139,14 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_me(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
     token = credentials.credentials
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(User).filter(User.email == email).first()
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return user
@@ -166,7 +166,7 @@ def require_role(required_role: str):
                 raise HTTPException(status_code=401, detail="Invalid token")
             if role != required_role:
                 raise HTTPException(status_code=403, detail="Insufficient permissions")
-            user = db.query(User).filter(User.email == email).first()
+            user = get_principal(db, email)
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             return user
@@ -174,6 +174,33 @@ def require_role(required_role: str):
             raise HTTPException(status_code=401, detail="Invalid or expired token")
     return checker
 
+
+def require_claims(required_role: str):
+    """
+    مثل require_role لكن يعيد id و role فقط (TokenClaims) بدل الهوية الكاملة.
+    role و is_active تُقرأ من كاش الهوية وليس من التوكن: تعديل المستخدم يمسح الكاش
+    في هذه العملية فوراً، وفي العمليات الأخرى تسقط الصلاحية القديمة بعد PRINCIPAL_CACHE_TTL.
+    """
+    def checker(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenClaims:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        subject: str = payload.get("sub")
+        role: str = payload.get("role")
+        if not subject or not role:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        if role != required_role:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+        # توكنات قديمة بدون uid: البحث بالبريد
+        uid = payload.get("uid")
+        user = get_principal(db, UUID(uid), by="id") if uid else get_principal(db, subject)
+        if not user or not user.is_active or user.role.value != required_role:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        return TokenClaims(id=user.id, subject=subject, role=user.role.value)
+    return checker
+
 # =========================
 # مسارات الإدارة (للمشرف)
 # =========================
@@ -184,7 +211,7 @@ class UserAdminCreate(BaseModel):
     role: UserRole = UserRole.user
 
 @router.post("/create", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(payload: UserAdminCreate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+def create_user(payload: UserAdminCreate, db: Session = Depends(get_db), _=Depends(require_claims("admin"))):
     exists = db.query(User).filter(User.email == payload.email).first()
     if exists:
         raise HTTPException(status_code=409, detail="Email already exists")
@@ -198,12 +225,14 @@ def create_user(payload: UserAdminCreate, db: Session = Depends(get_db), _=Depen
     )
     db.add(user)
     db.commit()
+    invalidate_users_stats()
     db.refresh(user)
     return user
 
-@router.get("/all", response_model=List[UserOut], dependencies=[Depends(require_role("admin"))])
-def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(User).order_by(User.created_at.desc()).all()
+@router.get("/all", response_model=List[UserOut], dependencies=[Depends(require_claims("admin"))])
+def get_all_users(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    users, next_cursor = paginate(db.query(User), User.created_at, User.id, page)
+    set_next_cursor(response, next_cursor)
     out = []
     for u in users:
         out.append({
@@ -216,7 +245,7 @@ def get_all_users(db: Session = Depends(get_db)):
         })
     return out
 
-@router.delete("/{user_id}", status_code=204, dependencies=[Depends(require_role("admin"))])
+@router.delete("/{user_id}", status_code=204, dependencies=[Depends(require_claims("admin"))])
 def delete_user(user_id: UUID, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -224,10 +253,12 @@ def delete_user(user_id: UUID, db: Session = Depends(get_db)):
 
     db.delete(user)
     db.commit()
+    invalidate_principal(user)
+    invalidate_users_stats()
     return {"detail": "deleted"}
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> Principal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -236,7 +267,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) ->
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = get_principal(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -262,20 +293,24 @@ def user_stats(current_user: User = Depends(get_current_user), db: Session = Dep
 from backend.app.models import GeneratedAd
 
 @router.get("/my-ads")
-def get_user_generated_ads(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    ads = (
-        db.query(GeneratedAd)
-        .filter(GeneratedAd.user_id == current_user.id)
-        .order_by(GeneratedAd.created_at.desc())
-        .all()
-    )
+def get_user_generated_ads(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    query = db.query(GeneratedAd).filter(GeneratedAd.user_id == current_user.id)
+    ads, next_cursor = paginate(query, GeneratedAd.created_at, GeneratedAd.id, page)
+    set_next_cursor(response, next_cursor)
 
     return [
         {
             "id": ad.id,
-            "text": ad.text,
-            "image_url": ad.image_url,
-            "score": ad.score,
+            "text": ad.ad_text,
+            "image_url": ad.design_url,
+            "srcset": ad.design_srcset,
+            "formats": ad.design_formats,
+            "score": getattr(ad, "score", 0),
             "created_at": ad.created_at.isoformat() if ad.created_at else None,
         }
         for ad in ads
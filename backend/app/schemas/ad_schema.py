@@ -0,0 +1,17 @@
+# backend/app/schemas/ad_schema.py
+from pydantic import BaseModel, Field
+from typing import Optional, Any, Dict
+from uuid import UUID
+
+
+# =====================================================
+# إعلان في المكتبة (إدخال فردي أو دفعي)
+# =====================================================
+class AdCreate(BaseModel):
+    platform_ad_id: str = Field(..., min_length=1, max_length=255)
+    platform: str = Field(..., min_length=1, max_length=50)
+    ad_text: Optional[str] = None
+    media_url: Optional[str] = None
+    engagement_score: Optional[float] = None
+    ad_metadata: Optional[Dict[str, Any]] = None
+    category_id: Optional[UUID] = None
@@ -0,0 +1,23 @@
+# backend/app/schemas/analysis_schema.py
+from pydantic import BaseModel, Field
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+
+# =====================================================
+# تحليل مجموعة إعلانات من المكتبة (Batch)
+# =====================================================
+class BatchAnalyzeRequest(BaseModel):
+    # فلاتر اختيار الإعلانات
+    category_id: Optional[UUID] = None
+    platform: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    only_unanalyzed: bool = True
+    max_ads: Optional[int] = Field(None, ge=1)
+
+    # التحكم في التوازي والتكلفة
+    concurrency: int = Field(8, ge=1, le=64)
+    rate_per_minute: Optional[int] = Field(None, ge=1)  # عدد الإعلانات في الدقيقة
+    commit_every: int = Field(50, ge=1, le=1000)
@@ -0,0 +1,195 @@
+# backend/app/services/ad_service.py
+import os, asyncio
+
+from backend.app.core import image_store, image_derivatives, renderer
+from backend.app.core.ai_service import build_new_ad_prompt
+from backend.app.core.ai_utils import chat_completions, chat_completion_stream, generate_images_bytes
+from backend.app.services.ai_analyzer import score_ad_texts
+from backend.app.services.engagement_model import predict_engagement
+
+PLACEHOLDER_IMAGE_URL = "/static/placeholder.png"
+
+# مقاسات الإعلان المنتجة من صورة مولدة واحدة (الأول هو الصورة الرئيسية)
+AD_RENDER_FORMATS = [f.strip() for f in os.getenv("AD_RENDER_FORMATS", "1:1,4:5,9:16").split(",") if f.strip()]
+# صورة المصدر عمودية حتى تُقص منها 1:1 و 4:5 وتُوسّع منها 9:16 بأقل فقد
+AD_SOURCE_IMAGE_SIZE = os.getenv("AD_SOURCE_IMAGE_SIZE", "1024x1536")
+# وضع البدائل: أقصى عدد نصوص/صور مرشحة في الطلب الواحد
+AD_VARIANTS_MAX = int(os.getenv("AD_VARIANTS_MAX", "4"))
+
+ENHANCE_SYSTEM_PROMPT = (
+    "You are an expert Arabic marketing copywriter specialized in short, emotional, conversion-optimized ads."
+)
+
+
+# =====================================================
+# ✍️ تحسين النص الإعلاني
+# =====================================================
+def build_enhance_messages(prompt: str, platform: str) -> list:
+    return [
+        {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"حسّن هذا النص الإعلاني بأسلوب احترافي وجذاب لمنصة {platform}: {prompt}"},
+    ]
+
+
+async def enhance_ad_texts(prompt: str, platform: str = "instagram", n: int = 1) -> list:
+    """n صيغة محسّنة للنص من استدعاء واحد (النص الأصلي عند الفشل)."""
+    try:
+        return await chat_completions(
+            model="gpt-4o-mini",
+            messages=build_enhance_messages(prompt, platform),
+            n=n,
+            max_tokens=300,
+        ) or [prompt]
+    except Exception as e:
+        print("❌ Text enhancement failed:", e)
+        return [prompt]
+
+
+async def generate_short_ad_texts(ad_text: str, platform: str = "instagram", n: int = 1) -> list:
+    return await chat_completions(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": build_new_ad_prompt(ad_text, platform)}],
+        n=n,
+        max_tokens=40,
+    )
+
+
+def rank_texts(texts: list, platform: str | None = None) -> list:
+    """
+    ترتيب النصوص المرشحة محلياً بدرجة ai_analyzer (الأفضل أولاً، بدون تكرار)،
+    مع توقع التفاعل من النموذج المحلي لكل نص (None إذا لم يُدرَّب).
+    """
+    unique = list(dict.fromkeys(t for t in texts if t))
+    predicted = predict_engagement(unique, [platform] * len(unique)) or [None] * len(unique)
+    scored = [
+        {"text": t, "score": s, "predicted_engagement": p}
+        for t, s, p in zip(unique, score_ad_texts(unique).tolist(), predicted)
+    ]
+    return sorted(scored, key=lambda c: c["score"], reverse=True)
+
+
+def clamp_variants(variants) -> int:
+    try:
+        return max(1, min(int(variants or 1), AD_VARIANTS_MAX))
+    except (TypeError, ValueError):
+        return 1
+
+
+# =====================================================
+# 🖼️ توليد الصورة وحفظها
+# =====================================================
+async def store_generated_image(img_bytes: bytes) -> dict:
+    """حفظ الصورة ونسخها المصغّرة: {"image_url": ..., "image_srcset": {...} أو None}."""
+    image_url, image_srcset = await asyncio.gather(
+        image_store.save_image(img_bytes),
+        image_derivatives.store_derivatives(img_bytes),
+    )
+    return {"image_url": image_url, "image_srcset": image_srcset}
+
+
+async def store_ad_formats(img_bytes: bytes, text: str | None = None) -> dict:
+    """
+    كل مقاسات AD_RENDER_FORMATS من صورة واحدة (قص/توسيع + النص إن وُجد) ثم حفظها.
+    يُرجع {"image_url", "image_srcset"} للمقاس الرئيسي و formats: {مقاس: {"image_url", "image_srcset"}}.
+    """
+    try:
+        rendered = await renderer.render_formats_async(img_bytes, text, formats=tuple(AD_RENDER_FORMATS))
+    except Exception as e:
+        print("❌ Multi-format rendering failed:", e)
+        return {**await store_generated_image(img_bytes), "formats": None}
+
+    stored = await asyncio.gather(*(store_generated_image(b) for b in rendered.values()))
+    formats = dict(zip(rendered, stored))
+    return {**formats[AD_RENDER_FORMATS[0]], "formats": formats}
+
+
+# =====================================================
+# 🚀 خطوط التوليد الكاملة (نص + صورة)
+# =====================================================
+async def generate_enhanced_images(enhanced_text: str, n: int = 1) -> list:
+    """استدعاء واحد لتوليد n صورة ثم كل المقاسات من كل صورة."""
+    try:
+        images = await generate_images_bytes(
+            f"Professional social media ad visual showing: {enhanced_text}", size=AD_SOURCE_IMAGE_SIZE, n=n
+        )
+    except Exception as e:
+        print("❌ Image generation failed:", e)
+        return [{"image_url": PLACEHOLDER_IMAGE_URL, "image_srcset": None, "formats": None}]
+    return list(await asyncio.gather(*(store_ad_formats(b) for b in images)))
+
+
+async def generate_enhanced_image(enhanced_text: str) -> dict:
+    return (await generate_enhanced_images(enhanced_text))[0]
+
+
+async def generate_enhanced(prompt: str, platform: str = "instagram", variants: int = 1) -> dict:
+    """
+    تحسين النص ثم توليد الصورة المرافقة له: {"text", "image_url", "image_srcset", "formats", "predicted_engagement"}.
+    مع variants > 1: n نص مرشح و n صورة من نفس الاستدعاءين، الأفضل (حسب ai_analyzer) هو الرئيسي
+    والبقية في "variants": {"texts": [{"text", "score"}], "images": [...]}.
+    """
+    candidates = await enhance_ad_texts(prompt, platform, n=variants)
+    ranked = rank_texts(candidates, platform) or rank_texts([prompt], platform)
+    enhanced_text = ranked[0]["text"]
+    images = await generate_enhanced_images(enhanced_text, n=variants)
+    result = {"text": enhanced_text, **images[0], "predicted_engagement": ranked[0]["predicted_engagement"]}
+    if variants > 1:
+        result["variants"] = {"texts": ranked, "images": images}
+    return result
+
+
+async def stream_enhanced(prompt: str, platform: str = "instagram"):
+    """
+    نفس generate_enhanced لكن على شكل أحداث متتالية:
+    ("token", جزء نص) ... ثم ("text", النص النهائي) ثم ("image", {"image_url", "image_srcset", "formats"}).
+    """
+    parts = []
+    try:
+        async for token in chat_completion_stream(
+            model="gpt-4o-mini",
+            messages=build_enhance_messages(prompt, platform),
+            max_tokens=300,
+        ):
+            parts.append(token)
+            yield "token", token
+        enhanced_text = "".join(parts).strip() or prompt
+    except Exception as e:
+        print("❌ Text enhancement failed:", e)
+        enhanced_text = prompt
+
+    yield "text", enhanced_text
+
+    # توليد الصورة يبدأ مباشرة بعد اكتمال النص
+    yield "image", await generate_enhanced_image(enhanced_text)
+
+
+async def regenerate_from_ad(ad_text: str, platform: str = "instagram", variants: int = 1) -> dict:
+    """
+    توليد نص قصير جديد من إعلان موجود + صورة + دمج النص عليها بكل المقاسات.
+    مع variants > 1: أفضل نص من n مرشح يُدمج على كل صورة من n صورة (البدائل في "variants").
+    """
+    ranked = rank_texts(await generate_short_ad_texts(ad_text, platform, n=variants), platform)
+    if not ranked:
+        raise ValueError("No ad text generated")
+    new_text = ranked[0]["text"]
+
+    images_bytes = await generate_images_bytes(
+        "High-quality commercial ad photo, cinematic lighting, realistic composition. "
+        "Social media style, no text, no logos. "
+        f"Concept: إعلان واقعي مستوحى من النص التالي: {new_text}",
+        size=AD_SOURCE_IMAGE_SIZE,
+        n=variants,
+    )
+
+    images = await asyncio.gather(*(store_ad_formats(b, new_text) for b in images_bytes))
+    image = images[0]
+    result = {
+        "new_text": new_text,
+        "new_image_url": image["image_url"],
+        "image_srcset": image["image_srcset"],
+        "formats": image["formats"],
+        "predicted_engagement": ranked[0]["predicted_engagement"],
+    }
+    if variants > 1:
+        result["variants"] = {"texts": ranked, "images": list(images)}
+    return result
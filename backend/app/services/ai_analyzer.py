@@ -1,22 +1,59 @@
 # backend/app/services/ai_analyzer.py
-import re
+"""
+محلل نصي بسيط بدون استدعاء خارجي.
+
+- analyze_ad_text: نص واحد.
+- analyze_ad_texts: دفعة نصوص (آلاف الإعلانات) بنفس النتائج حرفياً؛ الأنماط مُجمّعة مسبقاً
+  والعدّ والتقييم والاقتراحات تُحسب على مصفوفات NumPy للدفعة كلها.
+
+قياس الأداء:
+    python -m backend.app.services.ai_analyzer
+"""
+import re, time, itertools
 from collections import Counter
+from functools import lru_cache
+import numpy as np
+
+# =====================================================
+# 🔎 الأنماط (تُجمّع مرة واحدة)
+# =====================================================
+HOOK_RE = re.compile(r"(?:^|\n)(.+?)(?:\!|\?|:)")
+CTA_PHRASES = (
+    "buy now", "shop now", "learn more", "sign up", "book now", "order now", "download",
+    "جرّب الآن", "اشتر الآن", "احجز الآن",
+)
+# فحص الحرف الأول قبل تجربة كل البدائل: نفس النتائج، وأسرع بكثير مع re.I
+CTA_RE = re.compile(
+    f"(?=[{''.join(sorted({p[0] for p in CTA_PHRASES}))}])({'|'.join(CTA_PHRASES)})", flags=re.I
+)
+HASHTAG_RE = re.compile(r"#(\w+)")
+EMOJI_RE = re.compile(r"[\U0001F300-\U0001FAFF]")
+WORD_RE = re.compile(r"\w+")
+SENTENCE_SPLIT_RE = re.compile(r"[\.!\?]+")
+
+SUGGESTIONS = {
+    "cta": "أضف CTA واضحًا مثل: جرّب الآن / احجز الآن / تعرّف أكثر.",
+    "hashtags": "استخدم 3–7 هاشتاغات دقيقة لزيادة الاكتشاف.",
+    "hook": "ابدأ بجملة خطّاف قصيرة توضح الفائدة خلال أول 2–3 كلمات.",
+    "sentences": "قصّر الجمل. اجعل الجملة 8–15 كلمة لقراءة أسرع.",
+    "words": "بسّط المفردات وقلّل الكلمات المركبة.",
+}
+
 
-# محلل نصي بسيط بدون استدعاء خارجي
 def analyze_ad_text(text: str) -> dict:
     if not text:
         text = ""
 
     # مؤشرات أسلوب
-    hooks = re.findall(r"(?:^|\n)(.+?)(?:\!|\?|:)", text)[:3]
-    ctas = re.findall(r"(buy now|shop now|learn more|sign up|book now|order now|download|جرّب الآن|اشتر الآن|احجز الآن)", text, flags=re.I)
-    hashtags = re.findall(r"#(\w+)", text)
-    emojis = re.findall(r"[\U0001F300-\U0001FAFF]", text)
+    hooks = HOOK_RE.findall(text)[:3]
+    ctas = CTA_RE.findall(text)
+    hashtags = HASHTAG_RE.findall(text)
+    emojis = EMOJI_RE.findall(text)
 
     # بساطة القراءة تقديرية
-    words = re.findall(r"\w+", text)
+    words = WORD_RE.findall(text)
     avg_word_len = sum(len(w) for w in words)/len(words) if words else 0
-    sentences = re.split(r"[\.!\?]+", text)
+    sentences = SENTENCE_SPLIT_RE.split(text)
     avg_sent_len = sum(len(s.split()) for s in sentences if s.strip())/max(1, len([s for s in sentences if s.strip()]))
 
     # الكلمات المفتاحية
@@ -34,11 +71,11 @@ def analyze_ad_text(text: str) -> dict:
     score = round(min(100, score), 2)
 
     suggestions = []
-    if len(ctas) == 0: suggestions.append("أضف CTA واضحًا مثل: جرّب الآن / احجز الآن / تعرّف أكثر.")
-    if len(hashtags) < 3: suggestions.append("استخدم 3–7 هاشتاغات دقيقة لزيادة الاكتشاف.")
-    if not hooks: suggestions.append("ابدأ بجملة خطّاف قصيرة توضح الفائدة خلال أول 2–3 كلمات.")
-    if avg_sent_len > 18: suggestions.append("قصّر الجمل. اجعل الجملة 8–15 كلمة لقراءة أسرع.")
-    if avg_word_len > 6: suggestions.append("بسّط المفردات وقلّل الكلمات المركبة.")
+    if len(ctas) == 0: suggestions.append(SUGGESTIONS["cta"])
+    if len(hashtags) < 3: suggestions.append(SUGGESTIONS["hashtags"])
+    if not hooks: suggestions.append(SUGGESTIONS["hook"])
+    if avg_sent_len > 18: suggestions.append(SUGGESTIONS["sentences"])
+    if avg_word_len > 6: suggestions.append(SUGGESTIONS["words"])
 
     return {
         "tone": "informational" if avg_sent_len > 10 else "direct",
@@ -54,3 +91,266 @@ def analyze_ad_text(text: str) -> dict:
         "score": score,
         "suggestions": suggestions,
     }
+
+
+# =====================================================
+# 📦 التحليل الدفعي
+# =====================================================
+# النصوص تُدمج في نص واحد (كل نص يليه \n) وتُمسح الأنماط عليه مرة واحدة،
+# والعدّ لكل إعلان يتم على مصفوفة رموز Unicode (NumPy) بدل حلقات بايثون.
+ANALYZE_BATCH_SIZE = 5000
+_SEP = "\n"
+_PUNCT = np.array([ord(c) for c in ".!?"], dtype=np.uint32)
+_EMOJI_RANGE = (0x1F300, 0x1FAFF)
+
+
+def _char_classes(codepoints) -> tuple:
+    """(حرف كلمة \\w = isalnum أو _, مسافة str.isspace) لقائمة رموز."""
+    chars = [chr(c) for c in codepoints]
+    return (
+        np.array([c.isalnum() or c == "_" for c in chars], dtype=bool),
+        np.array([c.isspace() for c in chars], dtype=bool),
+    )
+
+
+@lru_cache(maxsize=1)
+def _bmp_classes() -> tuple:
+    """جدول التصنيف لكل رموز BMP (يُبنى مرة واحدة)."""
+    return _char_classes(range(0x10000))
+
+
+def _classify(cp: np.ndarray):
+    """تصنيف كل رمز بجدول BMP، والرموز خارجه (الإيموجي مثلاً) تُصنف بالقيم المختلفة فقط."""
+    word_lut, space_lut = _bmp_classes()
+    bmp = cp < 0x10000
+    index = np.where(bmp, cp, 0)
+    is_word, is_space = word_lut[index], space_lut[index]
+    if not bmp.all():
+        astral = ~bmp
+        uniq, inverse = np.unique(cp[astral], return_inverse=True)
+        word, space = _char_classes(uniq.tolist())
+        is_word[astral], is_space[astral] = word[inverse], space[inverse]
+    return is_word, is_space
+
+
+def _starts(mask: np.ndarray) -> np.ndarray:
+    """بداية كل تتابع True."""
+    prev = np.empty_like(mask)
+    prev[0] = False
+    prev[1:] = mask[:-1]
+    return mask & ~prev
+
+
+def _group(rows: np.ndarray, values: list, n: int, limit: int | None = None) -> list:
+    """توزيع قيم مرتبة حسب الصف على قوائم لكل صف (أول limit فقط)."""
+    bounds = np.searchsorted(rows, np.arange(n + 1)).tolist()
+    return [values[a:b if limit is None else min(b, a + limit)] for a, b in zip(bounds, bounds[1:])]
+
+
+def _top_keywords(words: list, word_rows: np.ndarray, lengths: np.ndarray, n: int) -> list:
+    """
+    نفس Counter(الكلمات > 3 أحرف بحروف صغيرة).most_common(10) لكل صف:
+    الأعلى تكراراً أولاً، والتعادل بترتيب أول ظهور.
+    """
+    keep = lengths > 3
+    lowered = list(map(str.lower, itertools.compress(words, keep.tolist())))
+    if not lowered:
+        return [[] for _ in range(n)]
+    vocab = list(dict.fromkeys(lowered))
+    ids = np.fromiter(map(dict(zip(vocab, itertools.count())).__getitem__, lowered), dtype=np.int64, count=len(lowered))
+
+    rows = word_rows[keep]
+    keys, first, counts = np.unique(rows * len(vocab) + ids, return_index=True, return_counts=True)
+    key_rows = keys // len(vocab)
+    order = np.lexsort((first, -counts, key_rows))
+    key_rows = key_rows[order]
+    rank = np.arange(len(order)) - np.searchsorted(key_rows, key_rows)
+    top = rank < 10
+    top_words = [vocab[i] for i in (keys[order][top] % len(vocab)).tolist()]
+    return _group(key_rows[top], top_words, n)
+
+
+def _scan(texts: list) -> dict:
+    """مسح دفعة واحدة: النص المدمج + الأعداد لكل إعلان (مصفوفات بطول الدفعة)."""
+    n = len(texts)
+    lens = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=n)
+    offsets = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    corpus = "".join(t + _SEP for t in texts)
+    cp = np.frombuffer(corpus.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    row = np.repeat(np.arange(n), lens)
+    is_word, is_space = _classify(cp)
+
+    def per_row(mask):
+        return np.add.reduceat(mask, offsets, dtype=np.int64)
+
+    # الكلمات (\w+): الفاصل ليس حرف كلمة فلا تمتد كلمة بين نصين
+    word_start = _starts(is_word)
+    n_words, word_chars = per_row(word_start), per_row(is_word)
+
+    # الجمل: أجزاء بين [.!?] أو الفاصل، والكلمات داخلها = تتابعات بدون مسافة
+    boundary = np.isin(cp, _PUNCT)
+    boundary[offsets + lens - 1] = True
+    content = ~is_space & ~boundary
+    sent_words = per_row(_starts(content))
+    segment = np.cumsum(boundary)[content]
+    new_piece = np.ones(len(segment), dtype=bool)
+    new_piece[1:] = segment[1:] != segment[:-1]
+    n_sents = np.bincount(row[content][new_piece], minlength=n)
+
+    # الخطافات: (?:^|\n) يقابل بداية كل نص بعد الفاصل، و .+? لا تعبر \n
+    hook_matches = list(HOOK_RE.finditer(corpus))
+    cta_matches = list(CTA_RE.finditer(corpus))
+
+    def rows_of(matches):
+        # بداية المجموعة الأولى: تطابق الخطاف يبدأ بفاصل النص السابق
+        return np.searchsorted(offsets, np.fromiter((m.start(1) for m in matches), np.int64, len(matches)), "right") - 1
+
+    # الهاشتاغات: # يليها حرف كلمة، بنفس ترتيب findall
+    hashtag_rows = row[np.flatnonzero((cp[:-1] == ord("#")) & is_word[1:])]
+    hook_rows, cta_rows = rows_of(hook_matches), rows_of(cta_matches)
+
+    avg_word_len = np.divide(word_chars, n_words, out=np.zeros(n), where=n_words > 0)
+    avg_sent_len = sent_words / np.maximum(1, n_sents)
+    n_hooks = np.minimum(np.bincount(hook_rows, minlength=n), 3)
+    n_ctas = np.bincount(cta_rows, minlength=n)
+    n_hashtags = np.bincount(hashtag_rows, minlength=n)
+    n_emojis = per_row((cp >= _EMOJI_RANGE[0]) & (cp <= _EMOJI_RANGE[1]))
+
+    score = (
+        np.minimum(n_hooks, 3) * 10
+        + np.minimum(n_ctas, 3) * 8
+        + np.minimum(n_hashtags, 8) * 2
+        + np.minimum(n_emojis, 6)
+        + np.where((avg_sent_len >= 3) & (avg_sent_len <= 18), 12, 0)
+        + np.where(avg_word_len <= 6, 8, 0)
+    )
+    return {
+        "n": n, "corpus": corpus, "row": row, "is_word": is_word, "word_start": word_start,
+        "hook_matches": hook_matches, "hook_rows": hook_rows, "cta_matches": cta_matches, "cta_rows": cta_rows,
+        "hashtag_rows": hashtag_rows, "n_hooks": n_hooks, "n_ctas": n_ctas, "n_hashtags": n_hashtags,
+        "n_emojis": n_emojis, "n_words": n_words, "avg_word_len": avg_word_len, "avg_sent_len": avg_sent_len,
+        "score": np.minimum(100, score),
+    }
+
+
+def _analyze_chunk(texts: list) -> list:
+    scan = _scan(texts)
+    n, corpus, row, is_word = scan["n"], scan["corpus"], scan["row"], scan["is_word"]
+
+    hashtags = _group(scan["hashtag_rows"], HASHTAG_RE.findall(corpus), n, limit=12)
+    hooks = _group(scan["hook_rows"], [m.group(1) for m in scan["hook_matches"]], n, limit=3)
+    ctas = _group(scan["cta_rows"], [m.group(1) for m in scan["cta_matches"]], n)
+
+    start_idx = np.flatnonzero(scan["word_start"])
+    end_idx = np.flatnonzero(is_word & ~np.append(is_word[1:], False))
+    keywords = _top_keywords(WORD_RE.findall(corpus), row[start_idx], end_idx - start_idx + 1, n)
+
+    avg_word_len, avg_sent_len = scan["avg_word_len"], scan["avg_sent_len"]
+    flags = (
+        (scan["n_ctas"] == 0) * 1 + (scan["n_hashtags"] < 3) * 2 + (scan["n_hooks"] == 0) * 4
+        + (avg_sent_len > 18) * 8 + (avg_word_len > 6) * 16
+    ).tolist()
+    suggestions = [
+        tuple(s for bit, s in enumerate(SUGGESTIONS.values()) if mask >> bit & 1) for mask in range(32)
+    ]
+    informational = (avg_sent_len > 10).tolist()
+    has_words = (scan["n_words"] > 0).tolist()
+    score, n_emojis = scan["score"].tolist(), scan["n_emojis"].tolist()
+    avg_word_len, avg_sent_len = avg_word_len.tolist(), avg_sent_len.tolist()
+
+    return [
+        {
+            "tone": "informational" if informational[i] else "direct",
+            "hooks": hooks[i],
+            "ctas_detected": list(dict.fromkeys(ctas[i])),
+            "hashtags": hashtags[i],
+            "emojis_count": n_emojis[i],
+            "readability": {
+                # بدون كلمات تبقى 0 (int) مثل النسخة الفردية
+                "avg_word_length": round(avg_word_len[i], 2) if has_words[i] else 0,
+                "avg_sentence_words": round(avg_sent_len[i], 2),
+            },
+            "top_keywords": keywords[i],
+            "score": score[i],
+            "suggestions": list(suggestions[flags[i]]),
+        }
+        for i in range(n)
+    ]
+
+
+def _chunks(texts):
+    texts = [t or "" for t in texts]
+    for i in range(0, len(texts), ANALYZE_BATCH_SIZE):
+        yield texts[i:i + ANALYZE_BATCH_SIZE]
+
+
+def analyze_ad_texts(texts) -> list:
+    """نفس analyze_ad_text لقائمة نصوص (None أو "" مقبولة)، بنفس الترتيب."""
+    return [result for chunk in _chunks(texts) for result in _analyze_chunk(chunk)]
+
+
+# أعمدة text_features (ميزات رقمية لنماذج التعلم، مثل engagement_model)
+TEXT_FEATURE_NAMES = (
+    "hooks", "ctas", "hashtags", "emojis", "words", "avg_word_length", "avg_sentence_words", "score",
+)
+
+
+def text_features(texts) -> np.ndarray:
+    """مصفوفة (عدد النصوص × TEXT_FEATURE_NAMES) من نفس مسح الدفعة."""
+    blocks = []
+    for chunk in _chunks(texts):
+        scan = _scan(chunk)
+        blocks.append(np.column_stack([
+            scan["n_hooks"], scan["n_ctas"], scan["n_hashtags"], scan["n_emojis"], scan["n_words"],
+            scan["avg_word_len"], scan["avg_sent_len"], scan["score"],
+        ]).astype(np.float64))
+    return np.vstack(blocks) if blocks else np.zeros((0, len(TEXT_FEATURE_NAMES)))
+
+
+def score_ad_texts(texts) -> np.ndarray:
+    """درجة analyze_ad_text(t)["score"] فقط لكل نص (بدون بناء القوائم والقواميس)."""
+    scores = [_scan(chunk)["score"] for chunk in _chunks(texts)]
+    return np.concatenate(scores) if scores else np.zeros(0, dtype=np.int64)
+
+
+# =====================================================
+# 📈 قياس الأداء: صفوف في الثانية (فردي مقابل دفعي)
+# =====================================================
+def _sample_texts(total: int) -> list:
+    samples = [
+        "خصم 50% على كل المنتجات! اشتر الآن قبل نفاد الكمية 🔥🔥 #تخفيضات #عروض #تسوق",
+        "New collection is here: shop now and get free shipping on orders over $50. #fashion #style",
+        "تعرّف على خدماتنا المتكاملة لإدارة الحملات الإعلانية على منصات التواصل الاجتماعي بأسعار تنافسية وجودة عالية ونتائج مضمونة خلال شهر واحد فقط",
+        "Limited offer? Book now. Download the app 📱✨ and sign up today!",
+        "",
+        None,
+    ]
+    return [samples[i % len(samples)] and f"{samples[i % len(samples)]} {i}" for i in range(total)]
+
+
+def _benchmark(total: int = 20000):
+    texts = _sample_texts(total)
+    _bmp_classes()
+
+    start = time.perf_counter()
+    expected = [analyze_ad_text(t) for t in texts]
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = analyze_ad_texts(texts)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = score_ad_texts(texts)
+    scoring = time.perf_counter() - start
+
+    assert batch == expected, "batch results differ from analyze_ad_text"
+    assert scores.tolist() == [r["score"] for r in expected], "batch scores differ from analyze_ad_text"
+    print(f"{total} ad texts, identical results")
+    print(f"  analyze_ad_text   {total / scalar:10.0f} rows/s")
+    print(f"  analyze_ad_texts  {total / vectorized:10.0f} rows/s")
+    print(f"  score_ad_texts    {total / scoring:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    _benchmark()
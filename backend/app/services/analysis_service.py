@@ -0,0 +1,226 @@
+# backend/app/services/analysis_service.py
+import os, asyncio, time, uuid
+from datetime import datetime
+from functools import partial
+import anyio
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.ai_service import analyze_ad_text, analyze_ad_image
+from backend.app.database import SessionLocal, mark_write
+from backend.app.models import AdLibrary, AdRequest, AdResult, RequestStatus
+from backend.app.services.stats_service import invalidate_ads_stats
+from backend.app.services.engagement_model import predict_one
+
+# مهلة كل استدعاء تحليل (بالثواني)
+ANALYSIS_TEXT_TIMEOUT = float(os.getenv("ANALYSIS_TEXT_TIMEOUT", "45"))
+ANALYSIS_IMAGE_TIMEOUT = float(os.getenv("ANALYSIS_IMAGE_TIMEOUT", "45"))
+# أقصى مدة بين نبضتي حياة لمهمة التحليل الدفعي (يجب أن تكون أقل بكثير من JOB_STALE_AFTER_SECONDS)
+BATCH_HEARTBEAT_INTERVAL = float(os.getenv("BATCH_HEARTBEAT_INTERVAL", "30"))
+
+
+# هامش فوق مهلة طلب OpenAI نفسه (الكاش وقاعدة البيانات) قبل التخلي عن الانتظار
+ANALYSIS_TIMEOUT_GRACE = 5.0
+
+# أقصى عدد threads لاستدعاءات التحليل المتزامنة في كل عملية (لكل المهام معاً).
+# كل استدعاء قد يحجز thread حتى ANALYSIS_*_TIMEOUT، فلها حد مستقل عن threadpool
+# الافتراضي (40) الذي تستخدمه المسارات المتزامنة، وإلا توقف الـ API كله أثناء التحليل الدفعي.
+ANALYSIS_MAX_THREADS = int(os.getenv("ANALYSIS_MAX_THREADS", "16"))
+_analysis_threads = anyio.CapacityLimiter(ANALYSIS_MAX_THREADS)
+
+
+async def _call_with_timeout(fn, arg, timeout: float, **kwargs) -> dict | None:
+    """None عند الفشل أو انتهاء المهلة."""
+    # wait_for وحده لا يوقف الاستدعاء المتزامن في الـ thread، لذلك تُمرر المهلة لطلب OpenAI أيضاً
+    try:
+        return await asyncio.wait_for(
+            anyio.to_thread.run_sync(partial(fn, arg, timeout=timeout, **kwargs), limiter=_analysis_threads),
+            timeout=timeout + ANALYSIS_TIMEOUT_GRACE,
+        )
+    except Exception as e:
+        print(f"⚠️ {fn.__name__} failed or timed out:", repr(e))
+        return None
+
+
+# =====================================================
+# 🔍 تحليل إعلان من المكتبة (نص + صورة بالتوازي)
+# =====================================================
+async def analyze_library_ad(ad: AdLibrary) -> dict:
+    """
+    تحليل نص الإعلان وصورته (إن وُجدت) بالتوازي وحساب النتيجة الإجمالية.
+    فشل أو انتهاء مهلة أي طرف يعطي نتيجة افتراضية (50) دون تأخير الطرف الآخر،
+    ويُعلَّم الناتج بـ failed=True حتى لا يُحفظ كتحليل مكتمل.
+    """
+    ad_text = ad.ad_text or ""
+
+    calls = [_call_with_timeout(analyze_ad_text, ad_text, ANALYSIS_TEXT_TIMEOUT, platform=ad.platform)]
+    if ad.media_url:
+        calls.append(_call_with_timeout(analyze_ad_image, ad.media_url, ANALYSIS_IMAGE_TIMEOUT, platform=ad.platform))
+
+    results = await asyncio.gather(*calls)
+    failed = any(r is None for r in results)
+    text_analysis = results[0] or {"input_text": ad_text, "analysis": "❌ فشل تحليل النص", "score": 50}
+    image_analysis = None
+    if ad.media_url:
+        image_analysis = results[1] or {"image_url": ad.media_url, "visual_analysis": "❌ فشل تحليل الصورة", "score": 50}
+
+    # ✅ حساب النتيجة الإجمالية بعد اكتمال الطرفين
+    score = text_analysis.get("score", 50)
+    if image_analysis:
+        score = round((text_analysis["score"] + image_analysis["score"]) / 2, 2)
+
+    return {
+        "text_analysis": text_analysis,
+        "image_analysis": image_analysis,
+        "score": score,
+        # توقع التفاعل من النموذج المحلي (None إذا لم يُدرَّب بعد)
+        "predicted_engagement": predict_one(ad_text, ad.platform),
+        "failed": failed,
+    }
+
+
+# =====================================================
+# 📚 تحليل مجموعة من إعلانات المكتبة (Batch)
+# =====================================================
+class RateLimiter:
+    """توزيع الطلبات بالتساوي بحيث لا يتجاوز عددها per_minute في الدقيقة."""
+
+    def __init__(self, per_minute: int | None):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _heartbeat(job_id):
+    """تحديث started_at في جلسة مستقلة دون لمس الدفعة الجارية (غير المحفوظة) في جلسة المهمة."""
+    db = SessionLocal()
+    try:
+        db.query(AdRequest).filter(AdRequest.id == job_id).update(
+            {AdRequest.started_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def batch_ads_query(db: Session, filters: dict):
+    """بناء استعلام الإعلانات المطلوب تحليلها وفق الفلاتر."""
+    query = db.query(AdLibrary)
+    if filters.get("category_id"):
+        query = query.filter(AdLibrary.category_id == filters["category_id"])
+    if filters.get("platform"):
+        query = query.filter(AdLibrary.platform == filters["platform"])
+    if filters.get("created_from"):
+        query = query.filter(AdLibrary.created_at >= datetime.fromisoformat(filters["created_from"]))
+    if filters.get("created_to"):
+        query = query.filter(AdLibrary.created_at < datetime.fromisoformat(filters["created_to"]))
+    if filters.get("only_unanalyzed"):
+        analyzed = (
+            db.query(AdResult.id)
+            .filter(AdResult.source_ad_id == AdLibrary.id)
+            .filter(AdResult.analysis_json.isnot(None))
+            # إعلان تغيّر محتواه بعد آخر تحليل يُعاد تحليله
+            .filter(AdResult.created_at >= func.coalesce(AdLibrary.updated_at, AdLibrary.created_at))
+        )
+        query = query.filter(~analyzed.exists())
+    return query
+
+
+async def run_batch_analysis(db: Session, job: AdRequest):
+    """
+    تحليل الإعلانات على دفعات مرتبة حسب id.
+    بعد كل دفعة تُحفظ النتائج ونقطة الاستئناف (checkpoint) في نفس الـ commit،
+    لذلك عند إعادة تشغيل المهمة تكمل من حيث توقفت دون إعادة دفع تكلفة ما اكتمل.
+    """
+    job_id = job.id
+    options = job.payload
+    progress = {"processed": 0, "failed": 0, "checkpoint": None, **(options.get("progress") or {})}
+    # توازي أعلى من عدد threads التحليل لا يسرّع شيئاً، فقط يطيل الانتظار على الحد
+    semaphore = asyncio.Semaphore(min(options.get("concurrency", 8), ANALYSIS_MAX_THREADS))
+    limiter = RateLimiter(options.get("rate_per_minute"))
+    commit_every = options.get("commit_every", 50)
+    max_ads = options.get("max_ads")
+    last_beat = time.monotonic()
+
+    async def analyze_one(ad):
+        nonlocal last_beat
+        async with semaphore:
+            await limiter.wait()
+            analysis = await analyze_library_ad(ad)
+        # نبضة بعد كل إعلان (بحد أقصى كل BATCH_HEARTBEAT_INTERVAL): دفعة بطيئة بسبب rate_per_minute
+        # قد تتجاوز JOB_STALE_AFTER قبل الـ commit، فيحجزها عامل آخر ويحلل نفس الإعلانات مرتين
+        if time.monotonic() - last_beat >= BATCH_HEARTBEAT_INTERVAL:
+            last_beat = time.monotonic()
+            await run_in_threadpool(_heartbeat, job_id)
+        return ad, analysis
+
+    def next_chunk(size: int):
+        query = batch_ads_query(db, options)
+        if progress["checkpoint"]:
+            query = query.filter(AdLibrary.id > progress["checkpoint"])
+        return query.order_by(AdLibrary.id).limit(size).all()
+
+    def save_chunk(results):
+        for ad, analysis in results:
+            # id يُولَّد محلياً لتفادي flush لكل إعلان، فتُدرج الدفعة كاملة مرة واحدة
+            ad_request = AdRequest(
+                id=uuid.uuid4(),
+                user_id=job.user_id,
+                category_id=ad.category_id,
+                status=RequestStatus.completed,
+                input_query=f"تحليل إعلان {ad.id}",
+                payload={"batch_id": str(job_id)},
+            )
+            db.add(ad_request)
+            # بدون AdResult: only_unanalyzed يعيد هذا الإعلان في الدفعة القادمة
+            if analysis["failed"]:
+                ad_request.status = RequestStatus.failed
+                ad_request.error = "analysis failed or timed out"
+                progress["failed"] += 1
+                continue
+            db.add(AdResult(
+                ad_request_id=ad_request.id,
+                source_ad_id=ad.id,
+                analysis_json={
+                    "text": analysis["text_analysis"],
+                    "image": analysis["image_analysis"],
+                    "predicted_engagement": analysis["predicted_engagement"],
+                },
+                score=analysis["score"],
+            ))
+
+        progress["processed"] += len(results)
+        progress["checkpoint"] = str(results[-1][0].id)
+        job.payload = {**job.payload, "progress": dict(progress)}
+        job.started_at = datetime.utcnow()  # نبضة حياة حتى لا تعتبر المهمة متروكة
+        db.commit()
+        mark_write()
+        invalidate_ads_stats()
+
+    while True:
+        size = commit_every
+        if max_ads:
+            size = min(size, max_ads - progress["processed"])
+            if size <= 0:
+                break
+
+        ads = await run_in_threadpool(next_chunk, size)
+        if not ads:
+            break
+
+        results = await asyncio.gather(*(analyze_one(ad) for ad in ads))
+        await run_in_threadpool(save_chunk, results)
+        print(f"📚 Batch {job_id}: {progress['processed']} ads analyzed")
+
+    return progress
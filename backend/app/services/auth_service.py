@@ -0,0 +1,98 @@
+# backend/app/services/auth_service.py
+"""
+كاش هوية المستخدم (Principal) للمسارات المحمية.
+
+- بعد التحقق من التوكن نقرأ المستخدم من كاش قصير المدة بدل استعلام لكل طلب.
+- المفتاح هو subject التوكن (البريد أو id)، ويُمسح عند تعديل أو حذف المستخدم.
+- صلاحيات المشرف (role و is_active) تُقرأ من هذا الكاش وليس من التوكن.
+- الكاش لكل عملية: المسح عند التعديل لا يصل للعمليات الأخرى، فتبقى الصلاحية القديمة
+  هناك حتى PRINCIPAL_CACHE_TTL على الأكثر.
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+
+from backend.app.core.ttl_cache import TTLCache
+from backend.app.core.passwords import verify_and_update
+from backend.app.models import User, UserRole
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+_principals = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """نسخة للقراءة فقط من بيانات المستخدم بنفس أسماء حقول User."""
+    id: UUID
+    email: str
+    full_name: Optional[str]
+    role: UserRole
+    plan_id: Optional[UUID]
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            plan_id=user.plan_id,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """هوية مأخوذة من التوكن الموقّع فقط (بدون قاعدة البيانات)."""
+    id: Optional[UUID]
+    subject: str
+    role: str
+
+
+def get_principal(db: Session, subject, by: str = "email") -> Optional[Principal]:
+    key = f"{by}:{subject}"
+    principal = _principals.get(key)
+    if principal is not None:
+        return principal
+
+    column = User.email if by == "email" else User.id
+    user = db.query(User).filter(column == subject).first()
+    if not user:
+        return None
+
+    principal = Principal.from_user(user)
+    _principals.set(key, principal)
+    return principal
+
+
+def invalidate_principal(user: User):
+    """يُستدعى بعد تعديل أو حذف مستخدم."""
+    _principals.pop(f"email:{user.email}")
+    _principals.pop(f"id:{user.id}")
+
+
+def authenticate(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    التحقق من كلمة المرور (في مجموعة عمليات bcrypt).
+    إذا كانت التجزئة المخزنة بتكلفة قديمة تُستبدل بتجزئة جديدة بنفس الطلب.
+    """
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return None
+
+    ok, new_hash = verify_and_update(password, user.password_hash)
+    if not ok:
+        return None
+
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    return user
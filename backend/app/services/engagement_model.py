@@ -0,0 +1,355 @@
+# backend/app/services/engagement_model.py
+"""
+نموذج محلي لتوقع التفاعل (engagement_score) من نص الإعلان، بدون أي استدعاء خارجي.
+
+- الميزات: n-grams للكلمات (1 و 2) بعد التطبيع العربي (core.keywords.normalize)
+  مُجزّأة (hashing trick) في 2^bits خانة بإشارة ±1، + رمز المنصة،
+  + ميزات ai_analyzer الرقمية (text_features) بعد التوحيد (z-score).
+- النموذج: انحدار خطي Ridge يُحل بـ Conjugate Gradient على مصفوفة متفرقة (NumPy فقط).
+- يُحفظ مضغوطاً (الأوزان غير الصفرية فقط) في ENGAGEMENT_MODEL_PATH،
+  ويُحمَّل مرة واحدة داخل العملية للتوقع الدفعي.
+
+التدريب (من ads_library) وقياس الأداء:
+    python -m backend.app.services.engagement_model train [--l2 1.0] [--hash-bits 18]
+    python -m backend.app.services.engagement_model bench
+"""
+import os, re, json, time, zlib, argparse, threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+
+from backend.app.core.keywords import normalize
+from backend.app.services.ai_analyzer import TEXT_FEATURE_NAMES, text_features
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+ENGAGEMENT_MODEL_PATH = Path(os.getenv(
+    "ENGAGEMENT_MODEL_PATH",
+    Path(__file__).resolve().parent.parent.parent / "models" / "engagement_model.npz",
+))
+MODEL_VERSION = 1
+DEFAULT_HASH_BITS = 18
+_TOKEN_RE = re.compile(r"\w+")
+
+
+# =====================================================
+# 🔢 الميزات
+# =====================================================
+def tokens(text: str, platform: str | None = None) -> list:
+    words = _TOKEN_RE.findall(normalize(text))
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return grams + [f"platform={(platform or '').lower()}"]
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash(token: str) -> int:
+    # crc32 ثابت بين العمليات (بخلاف hash() في بايثون)
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def hashed_features(texts, platforms, bits: int) -> tuple:
+    """
+    مصفوفة متفرقة بصيغة (rows, cols, values): كل n-gram مرة واحدة في الإعلان
+    بقيمة ±1/√(عدد الرموز) حتى لا تطغى الإعلانات الطويلة.
+    """
+    hashes, counts = [], []
+    for text, platform in zip(texts, platforms):
+        unique = list(map(_hash, dict.fromkeys(tokens(text or "", platform))))
+        hashes.extend(unique)
+        counts.append(len(unique))
+    hashes = np.array(hashes, dtype=np.int64)
+    counts = np.array(counts, dtype=np.int64)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    weight = (1.0 / np.sqrt(counts))[rows]
+    return rows, hashes & ((1 << bits) - 1), np.where(hashes >> 31, weight, -weight)
+
+
+def dense_features(texts) -> np.ndarray:
+    return text_features(texts)
+
+
+# =====================================================
+# 🧮 التدريب
+# =====================================================
+def _ridge_cg(sparse, dense, y, dim: int, l2: float, max_iter: int = 300, tol: float = 1e-6) -> np.ndarray:
+    """
+    حل (XᵀX + l2·I) w = Xᵀy بدون بناء XᵀX: X = [متفرقة | كثيفة]،
+    وكل ضرب مصفوفة يتم بـ bincount / dot.
+    """
+    rows, cols, vals = sparse
+    n = len(y)
+
+    def matvec(w):
+        out = np.bincount(rows, weights=vals * w[:dim][cols], minlength=n)
+        return out + dense @ w[dim:]
+
+    def rmatvec(r):
+        return np.concatenate([np.bincount(cols, weights=vals * r[rows], minlength=dim), dense.T @ r])
+
+    def normal(w):
+        return rmatvec(matvec(w)) + l2 * w
+
+    w = np.zeros(dim + dense.shape[1])
+    b = rmatvec(y)
+    r = b - normal(w)
+    p = r.copy()
+    rs = r @ r
+    stop = (tol * np.linalg.norm(b)) ** 2
+    for _ in range(max_iter):
+        if rs <= stop:
+            break
+        Ap = normal(p)
+        alpha = rs / (p @ Ap)
+        w += alpha * p
+        r -= alpha * Ap
+        rs_new = r @ r
+        p = r + (rs_new / rs) * p
+        rs = rs_new
+    return w
+
+
+def _metrics(y, pred) -> dict:
+    err = pred - y
+    var = float(np.var(y))
+    return {
+        "rmse": round(float(np.sqrt(np.mean(err ** 2))), 4),
+        "mae": round(float(np.mean(np.abs(err))), 4),
+        "r2": round(1 - float(np.mean(err ** 2)) / var, 4) if var else 0.0,
+    }
+
+
+def train(texts, platforms, y, l2: float = 1.0, bits: int = DEFAULT_HASH_BITS,
+          holdout: float = 0.1, seed: int = 0) -> "EngagementModel":
+    """تدريب على (نص, منصة, engagement_score) مع تقييم على جزء محجوز (holdout)."""
+    texts, platforms, y = list(texts), list(platforms), np.asarray(y, dtype=np.float64)
+    dim = 1 << bits
+
+    dense = dense_features(texts)
+    mean, std = dense.mean(axis=0), dense.std(axis=0)
+    std[std == 0] = 1.0
+    dense = (dense - mean) / std
+
+    order = np.random.default_rng(seed).permutation(len(y))
+    n_test = int(len(y) * holdout) if len(y) >= 20 else 0
+    test, fit = order[:n_test], order[n_test:]
+
+    def subset(idx):
+        return hashed_features([texts[i] for i in idx], [platforms[i] for i in idx], bits), dense[idx], y[idx]
+
+    sparse_fit, dense_fit, y_fit = subset(fit)
+    intercept = float(y_fit.mean())
+    w = _ridge_cg(sparse_fit, dense_fit, y_fit - intercept, dim, l2)
+
+    nonzero = np.flatnonzero(w[:dim])
+    model = EngagementModel(
+        bits=bits,
+        hashed_index=nonzero.astype(np.int32),
+        hashed_weight=w[:dim][nonzero].astype(np.float32),
+        dense_weight=w[dim:].astype(np.float32),
+        dense_mean=mean, dense_std=std,
+        intercept=intercept,
+        clip=(float(y.min()), float(y.max())),
+        meta={
+            "version": MODEL_VERSION,
+            "trained_at": datetime.utcnow().isoformat(),
+            "rows": int(len(y)),
+            "l2": l2,
+            "dense_features": list(TEXT_FEATURE_NAMES),
+        },
+    )
+    if n_test:
+        y_test = y[test]
+        pred = model.predict([texts[i] for i in test], [platforms[i] for i in test])
+        model.meta["holdout"] = {
+            "rows": int(n_test),
+            "model": _metrics(y_test, pred),
+            "baseline_mean": _metrics(y_test, np.full_like(y_test, intercept)),
+        }
+    return model
+
+
+# =====================================================
+# 🔮 النموذج والتوقع
+# =====================================================
+class EngagementModel:
+    def __init__(self, bits, hashed_index, hashed_weight, dense_weight, dense_mean, dense_std,
+                 intercept, clip, meta):
+        self.bits = int(bits)
+        self.hashed_index, self.hashed_weight = hashed_index, hashed_weight
+        self.dense_weight = dense_weight
+        self.dense_mean, self.dense_std = dense_mean, dense_std
+        self.intercept = float(intercept)
+        self.clip = tuple(clip)
+        self.meta = meta
+        # أوزان كثيفة للفهرسة المباشرة عند التوقع (2^bits float32)
+        self._weights = np.zeros(1 << self.bits, dtype=np.float32)
+        self._weights[hashed_index] = hashed_weight
+
+    def predict(self, texts, platforms=None) -> np.ndarray:
+        texts = [t or "" for t in texts]
+        if not texts:
+            return np.zeros(0)
+        platforms = platforms if platforms is not None else [None] * len(texts)
+        rows, cols, vals = hashed_features(texts, platforms, self.bits)
+        dense = (dense_features(texts) - self.dense_mean) / self.dense_std
+        pred = np.bincount(rows, weights=vals * self._weights[cols], minlength=len(texts))
+        pred += dense @ self.dense_weight + self.intercept
+        return np.clip(pred, *self.clip)
+
+    def save(self, path: Path = ENGAGEMENT_MODEL_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            bits=self.bits,
+            hashed_index=self.hashed_index, hashed_weight=self.hashed_weight,
+            dense_weight=self.dense_weight, dense_mean=self.dense_mean, dense_std=self.dense_std,
+            intercept=self.intercept, clip=np.array(self.clip),
+            meta=json.dumps(self.meta, ensure_ascii=False),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = ENGAGEMENT_MODEL_PATH) -> "EngagementModel":
+        with np.load(path) as f:
+            meta = json.loads(str(f["meta"]))
+            if meta.get("version") != MODEL_VERSION:
+                raise ValueError(f"Unsupported engagement model version: {meta.get('version')}")
+            return cls(
+                bits=int(f["bits"]),
+                hashed_index=f["hashed_index"], hashed_weight=f["hashed_weight"],
+                dense_weight=f["dense_weight"], dense_mean=f["dense_mean"], dense_std=f["dense_std"],
+                intercept=float(f["intercept"]), clip=f["clip"].tolist(),
+                meta=meta,
+            )
+
+
+_model: EngagementModel | None = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def load_model(path: Path = ENGAGEMENT_MODEL_PATH) -> EngagementModel | None:
+    """تحميل النموذج مرة واحدة (عند بدء التطبيق). بدون ملف نموذج: التوقع يُرجع None."""
+    global _model, _model_loaded
+    with _model_lock:
+        try:
+            _model = EngagementModel.load(path)
+            print(f"📈 Engagement model loaded ({_model.meta.get('rows')} rows, trained {_model.meta.get('trained_at')})")
+        except FileNotFoundError:
+            _model = None
+            print(f"⚠️ No engagement model at {path}, predicted_engagement disabled")
+        except Exception as e:
+            _model = None
+            print("❌ Failed to load engagement model:", e)
+        _model_loaded = True
+    return _model
+
+
+def get_model() -> EngagementModel | None:
+    if not _model_loaded:
+        load_model()
+    return _model
+
+
+def predict_engagement(texts, platforms=None) -> list | None:
+    """توقع دفعي: [قيمة لكل نص] أو None إذا لم يُدرَّب نموذج بعد."""
+    model = get_model()
+    if model is None:
+        return None
+    return [round(float(p), 4) for p in model.predict(texts, platforms)]
+
+
+def predict_one(text: str, platform: str | None = None) -> float | None:
+    predicted = predict_engagement([text], [platform])
+    return predicted[0] if predicted else None
+
+
+# =====================================================
+# 🏋️ التدريب من ads_library + 📈 قياس الأداء
+# =====================================================
+def _load_training_rows(limit: int | None = None):
+    from backend.app.database import SessionLocal
+    from backend.app.models import AdLibrary
+
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(AdLibrary.ad_text, AdLibrary.platform, AdLibrary.engagement_score)
+            .filter(AdLibrary.engagement_score.isnot(None), AdLibrary.ad_text.isnot(None))
+            .order_by(AdLibrary.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        rows = query.all()
+    finally:
+        db.close()
+    return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+
+def _train_command(args):
+    start = time.perf_counter()
+    texts, platforms, y = _load_training_rows(args.limit)
+    if len(y) < 2:
+        raise SystemExit("❌ Not enough ads with engagement_score to train")
+    print(f"📥 Loaded {len(y)} ads in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    model = train(texts, platforms, y, l2=args.l2, bits=args.hash_bits)
+    model.save(args.out)
+    print(f"✅ Trained in {time.perf_counter() - start:.1f}s, "
+          f"{len(model.hashed_index)} non-zero hashed weights, saved to {args.out}")
+    print(json.dumps(model.meta.get("holdout"), indent=2))
+
+
+def _sample_ads(total: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    good = ["خصم", "عرض حصري", "شحن مجاني", "free shipping", "limited time", "اشتر الآن", "#sale", "🔥"]
+    neutral = ["منتج", "جديد", "متوفر", "product", "available", "في المتجر", "store", "اليوم"]
+    texts, platforms, y = [], [], []
+    for _ in range(total):
+        words = list(rng.choice(neutral, size=rng.integers(3, 12)))
+        hits = int(rng.integers(0, 4))
+        words += list(rng.choice(good, size=hits))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        platforms.append(str(rng.choice(["instagram", "facebook", "tiktok"])))
+        y.append(20 + 15 * hits + rng.normal(0, 5))
+    return texts, platforms, y
+
+
+def _bench_command(args):
+    texts, platforms, y = _sample_ads(args.rows)
+    model = get_model()
+    if model is None:
+        print("No trained model found, training one on synthetic ads for the benchmark")
+        start = time.perf_counter()
+        model = train(texts, platforms, y, bits=args.hash_bits)
+        print(f"  trained on {len(y)} synthetic ads in {time.perf_counter() - start:.2f}s, holdout {model.meta['holdout']}")
+    for batch in (1, 100, 1000, 10000):
+        batch_texts, batch_platforms = texts[:batch], platforms[:batch]
+        model.predict(batch_texts, batch_platforms)
+        runs = max(1, 20000 // batch)
+        start = time.perf_counter()
+        for _ in range(runs):
+            model.predict(batch_texts, batch_platforms)
+        per_ad = (time.perf_counter() - start) / (runs * len(batch_texts)) * 1e6
+        print(f"  batch={len(batch_texts):>5}  {per_ad:8.1f} µs/ad")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engagement model trainer / benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_parser = sub.add_parser("train", help="train on ads_library.engagement_score")
+    train_parser.add_argument("--l2", type=float, default=1.0)
+    train_parser.add_argument("--hash-bits", type=int, default=DEFAULT_HASH_BITS)
+    train_parser.add_argument("--limit", type=int, default=None)
+    train_parser.add_argument("--out", type=Path, default=ENGAGEMENT_MODEL_PATH)
+    bench_parser = sub.add_parser("bench", help="batch inference speed (µs per ad)")
+    bench_parser.add_argument("--rows", type=int, default=20000)
+    bench_parser.add_argument("--hash-bits", type=int, default=DEFAULT_HASH_BITS)
+    args = parser.parse_args()
+    _train_command(args) if args.command == "train" else _bench_command(args)
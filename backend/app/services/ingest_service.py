@@ -0,0 +1,295 @@
+# backend/app/services/ingest_service.py
+"""
+إدخال دفعي لمكتبة الإعلانات (ads_library) من جسم طلب متدفق بصيغة NDJSON أو CSV.
+
+- الجسم يُقرأ سطراً بسطر بدون تحميله كاملاً في الذاكرة.
+- الصفوف تُجمع في دفعات (INGEST_CHUNK_SIZE) وتُتحقق مقابل AdCreate.
+- الصفوف الصحيحة تُكتب عبر COPY (asyncpg) إلى جدول مؤقت ثم upsert منه
+  على (platform, platform_ad_id) — كل دفعة في معاملة مستقلة.
+- الصفوف الخاطئة تُرجع مع رقمها وسبب الخطأ بدل إفشال الطلب كله.
+"""
+import os, csv, json, uuid, traceback
+from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import select, text, table, column, func, case, or_, null, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from backend.app.database import async_engine
+from backend.app.models import AdLibrary, Category
+from backend.app.schemas.ad_schema import AdCreate
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+# أقصى عدد أخطاء تُرجع في الاستجابة (العدد الكلي يُرجع دائماً)
+INGEST_MAX_ERRORS = int(os.getenv("INGEST_MAX_ERRORS", "1000"))
+# أقصى طول للسطر الواحد: سطر أطول يُرفض كخطأ صف بدل تجميعه في الذاكرة
+INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(1024 * 1024)))
+
+COPY_COLUMNS = [
+    "id", "platform_ad_id", "platform", "ad_text", "media_url",
+    "engagement_score", "ad_metadata", "category_id", "created_at", "updated_at",
+]
+STAGING_TABLE = "ads_library_ingest"
+
+
+# =====================================================
+# 📥 قراءة السجلات من الجسم المتدفق
+# =====================================================
+def _decode_line(line: bytes, end: str):
+    try:
+        return line.decode("utf-8-sig") + end, None
+    except UnicodeDecodeError as e:
+        return None, f"Invalid UTF-8 at byte {e.start}"
+
+
+async def _iter_lines(body):
+    """(النص أو None, خطأ أو None) لكل سطر، مع رفض الأسطر الأطول من INGEST_MAX_LINE_BYTES."""
+    too_long = f"Line exceeds {INGEST_MAX_LINE_BYTES} bytes"
+    buffer, oversized = b"", False
+    async for chunk in body:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized or len(line) > INGEST_MAX_LINE_BYTES:
+                oversized = False
+                yield None, too_long
+                continue
+            yield _decode_line(line, "\n")
+        # سطر طويل بلا نهاية بعد: نتخلص من بدايته ونتجاهل الباقي حتى السطر التالي
+        if len(buffer) > INGEST_MAX_LINE_BYTES:
+            buffer, oversized = b"", True
+    if oversized:
+        yield None, too_long
+    elif buffer:
+        yield _decode_line(buffer, "")
+
+
+async def iter_ndjson(body):
+    """(رقم السطر, dict أو None, خطأ أو None)"""
+    row = 0
+    async for line, error in _iter_lines(body):
+        row += 1
+        if error:
+            yield row, None, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Each line must be a JSON object"
+            continue
+        yield row, record, None
+
+
+async def iter_csv(body):
+    """
+    السطر الأول أسماء الأعمدة (أسماء حقول AdCreate).
+    الحقول بين علامات تنصيص قد تحتوي أسطراً جديدة، لذلك نجمع الأسطر حتى تكتمل التنصيصات.
+    """
+    header = None
+    pending, quotes, row = [], 0, 0
+    async for line, error in _iter_lines(body):
+        if error:
+            # السطر التالف يُسقط السجل الذي يحتويه (حتى لو كان داخل حقل بين تنصيصات)
+            pending, quotes, row = [], 0, row + 1
+            yield row, None, error
+            continue
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text, pending, quotes = "".join(pending), [], 0
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        record = {k: (v if v != "" else None) for k, v in zip(header, values)}
+        if record.get("ad_metadata"):
+            try:
+                record["ad_metadata"] = json.loads(record["ad_metadata"])
+            except ValueError as e:
+                yield row, None, f"Invalid ad_metadata JSON: {e}"
+                continue
+        yield row, record, None
+
+    if pending:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+# =====================================================
+# ✅ التحقق والكتابة
+# =====================================================
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+async def _known_categories(conn, category_ids: set) -> set:
+    if not category_ids:
+        return set()
+    rows = await conn.execute(select(Category.id).where(Category.id.in_(category_ids)))
+    return {r[0] for r in rows}
+
+
+def _merge_duplicates(ads):
+    """
+    صفوف بنفس (platform, platform_ad_id) داخل الدفعة تُدمج في صف واحد قبل الكتابة
+    (ON CONFLICT لا يقبل تعديل نفس الصف مرتين في أمر واحد).
+    """
+    merged = {}
+    for row, ad in ads:
+        key = (ad.platform, ad.platform_ad_id)
+        values = ad.model_dump()
+        previous = merged.get(key)
+        if previous is not None:
+            meta = {**(previous[1]["ad_metadata"] or {}), **(values["ad_metadata"] or {})}
+            values = {**previous[1], **{k: v for k, v in values.items() if v is not None}}
+            values["ad_metadata"] = meta or None
+        merged[key] = (row, values)
+    return list(merged.values())
+
+
+def _merge_set(stmt):
+    """قيم الدمج عند التعارض: الحقول الجديدة غير الفارغة تفوز، و ad_metadata تُدمج (jsonb ||)."""
+    current, new = AdLibrary.__table__.c, stmt.excluded
+    empty = func.jsonb_build_object()
+    current_meta = case((func.jsonb_typeof(current.ad_metadata) == "object", current.ad_metadata), else_=empty)
+    return {
+        "ad_text": func.coalesce(new.ad_text, current.ad_text),
+        "media_url": func.coalesce(new.media_url, current.media_url),
+        "engagement_score": func.coalesce(new.engagement_score, current.engagement_score),
+        "ad_metadata": case(
+            (func.jsonb_typeof(new.ad_metadata) == "object", current_meta.op("||")(new.ad_metadata)),
+            else_=current.ad_metadata,
+        ),
+        "category_id": func.coalesce(new.category_id, current.category_id),
+    }
+
+
+def upsert_ads(stmt):
+    """
+    تحويل INSERT إلى ads_library إلى upsert على (platform, platform_ad_id).
+    الصف الموجود لا يُلمس (ولا يتغير updated_at) إلا إذا تغيّر محتواه فعلاً،
+    والـ RETURNING يُرجع (id, inserted) للصفوف المضافة أو المعدلة فقط.
+    """
+    current = AdLibrary.__table__.c
+    merged = _merge_set(stmt)
+    return stmt.on_conflict_do_update(
+        constraint="uq_ads_library_platform_ad",
+        set_={**merged, "updated_at": stmt.excluded.updated_at},
+        where=or_(*(current[col].is_distinct_from(value) for col, value in merged.items())),
+    ).returning(AdLibrary.id, literal_column("xmax = 0").label("inserted"))
+
+
+def upsert_ad_values(ad: AdCreate):
+    """upsert لإعلان واحد (create_ad)."""
+    now = datetime.utcnow()
+    values = ad.model_dump()
+    if values["ad_metadata"] is None:
+        values["ad_metadata"] = null()  # NULL وليس JSON 'null'
+    return upsert_ads(pg_insert(AdLibrary).values(id=uuid.uuid4(), created_at=now, updated_at=now, **values))
+
+
+async def _write_chunk(chunk, errors: list) -> dict:
+    """
+    التحقق من دفعة (رقم, dict) ثم COPY إلى جدول مؤقت و upsert منه إلى ads_library.
+    يُرجع عدد الصفوف المضافة والمعدلة والتي لم تتغير، والمكررة داخل الدفعة (دُمجت في صف آخر).
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "merged_duplicates": 0}
+    ads = []
+    for row, record in chunk:
+        try:
+            ads.append((row, AdCreate.model_validate(record)))
+        except ValidationError as e:
+            errors.append({"row": row, "error": _validation_message(e)})
+    if not ads:
+        return counts
+
+    errors_before = len(errors)
+    try:
+        async with async_engine.begin() as conn:
+            # COPY لا يتحقق من المفاتيح الأجنبية صفاً بصف: أي تصنيف غير موجود يُفشل الدفعة كلها
+            categories = await _known_categories(conn, {ad.category_id for _, ad in ads if ad.category_id})
+            valid = []
+            for row, ad in ads:
+                if ad.category_id and ad.category_id not in categories:
+                    errors.append({"row": row, "error": "category_id: Category not found"})
+                    continue
+                valid.append((row, ad))
+            if not valid:
+                return counts
+
+            now = datetime.utcnow()
+            records = [
+                (
+                    uuid.uuid4(), v["platform_ad_id"], v["platform"], v["ad_text"], v["media_url"],
+                    v["engagement_score"],
+                    json.dumps(v["ad_metadata"], ensure_ascii=False) if v["ad_metadata"] is not None else None,
+                    v["category_id"], now, now,
+                )
+                for _, v in _merge_duplicates(valid)
+            ]
+            counts["merged_duplicates"] = len(valid) - len(records)
+
+            await conn.execute(text(
+                f"CREATE TEMP TABLE {STAGING_TABLE} (LIKE {AdLibrary.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(STAGING_TABLE, records=records, columns=COPY_COLUMNS)
+
+            staging = table(STAGING_TABLE, *(column(c) for c in COPY_COLUMNS))
+            written = (await conn.execute(upsert_ads(
+                pg_insert(AdLibrary).from_select(COPY_COLUMNS, select(*staging.c))
+            ))).all()
+    except Exception:
+        # التفاصيل في سجل الخادم فقط، والصفوف المرفوضة مسبقاً (تصنيف غير موجود) لا تُحسب مرتين
+        print("⚠️ Bulk ingest chunk failed:", traceback.format_exc())
+        rejected = {e["row"] for e in errors[errors_before:]}
+        errors.extend({"row": row, "error": "Chunk rejected by database"} for row, _ in ads if row not in rejected)
+        return {**counts, "merged_duplicates": 0}
+
+    counts["inserted"] = sum(1 for r in written if r.inserted)
+    counts["updated"] = len(written) - counts["inserted"]
+    counts["unchanged"] = len(records) - len(written)
+    return counts
+
+
+async def ingest_ads(records) -> dict:
+    """records: مولّد غير متزامن من (رقم, dict أو None, خطأ أو None)."""
+    received, errors = 0, []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "merged_duplicates": 0}
+    chunk = []
+
+    async def flush():
+        for k, v in (await _write_chunk(chunk, errors)).items():
+            counts[k] += v
+        chunk.clear()
+
+    async for row, record, error in records:
+        received += 1
+        if error:
+            errors.append({"row": row, "error": error})
+            continue
+        chunk.append((row, record))
+        if len(chunk) >= INGEST_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "received": received,
+        **counts,
+        "failed": len(errors),
+        "errors": errors[:INGEST_MAX_ERRORS],
+    }
@@ -0,0 +1,380 @@
+# backend/app/services/job_queue.py
+"""
+طابور مهام بسيط فوق جدول ad_requests.
+
+- كل مهمة هي صف AdRequest يحمل job_type و payload.
+- الحالات: pending → processing → completed / failed.
+- العمّال يحجزون الصفوف عبر SELECT ... FOR UPDATE SKIP LOCKED،
+  لذلك يمكن تشغيل عدة عمّال في نفس العملية أو في عمليات منفصلة:
+
+    python -m backend.app.services.job_queue
+"""
+import os, asyncio, traceback
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.database import SessionLocal, mark_write
+from backend.app.models import AdRequest, AdResult, AdLibrary, GeneratedAd, RequestStatus
+from backend.app.services.ad_service import generate_enhanced, regenerate_from_ad
+from backend.app.services.analysis_service import analyze_library_ad, run_batch_analysis
+from backend.app.services.stats_service import invalidate_ads_stats
+from backend.app.services.engagement_model import predict_one
+
+# =====================================================
+# ⚙️ الإعدادات
+# =====================================================
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# عطّلها على عقد الـ API إذا كان العمّال يعملون في عملية منفصلة
+JOB_WORKERS_ENABLED = os.getenv("JOB_WORKERS_ENABLED", "1") == "1"
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# مهمة بقيت في processing أكثر من هذه المدة تعتبر متروكة (انهيار عامل)
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER_SECONDS", "600"))
+
+JOB_GENERATE = "generate_enhanced"
+JOB_REGENERATE = "regenerate"
+JOB_ANALYZE = "analyze"
+JOB_ANALYZE_BATCH = "analyze_batch"
+
+_handlers = {}
+_wakeup: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_tasks: list = []
+
+
+class PermanentJobError(Exception):
+    """خطأ لا تفيد معه إعادة المحاولة (مثل إعلان محذوف): تفشل المهمة فوراً."""
+
+
+def job_handler(job_type: str):
+    """تسجيل دالة تنفيذ لنوع مهمة معيّن."""
+    def register(fn):
+        _handlers[job_type] = fn
+        return fn
+    return register
+
+
+# =====================================================
+# 📥 إضافة مهمة
+# =====================================================
+def enqueue(db: Session, user_id, job_type: str, payload: dict, category_id=None, input_query=None) -> AdRequest:
+    if job_type not in _handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = AdRequest(
+        user_id=user_id,
+        category_id=category_id,
+        status=RequestStatus.pending,
+        input_query=input_query,
+        job_type=job_type,
+        payload=payload,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _notify()
+    return job
+
+
+def _notify():
+    # يُستدعى من threadpool، لذلك نمرر الإشارة إلى حلقة الأحداث بأمان
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+# =====================================================
+# 🔒 حجز المهمة التالية
+# =====================================================
+def claimable_jobs(db: Session, stale_before: datetime):
+    """المهام الجاهزة للحجز بترتيب وصولها (يطابق الفهرس الجزئي ix_ad_requests_queue)."""
+    return (
+        db.query(AdRequest)
+        .filter(AdRequest.job_type.isnot(None))
+        .filter(AdRequest.attempts < JOB_MAX_ATTEMPTS)
+        .filter(
+            or_(
+                AdRequest.status == RequestStatus.pending,
+                and_(AdRequest.status == RequestStatus.processing, AdRequest.started_at < stale_before),
+            )
+        )
+        .order_by(AdRequest.created_at)
+    )
+
+
+def claim_next_job():
+    db = SessionLocal()
+    try:
+        stale_before = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+        _fail_exhausted_jobs(db, stale_before)
+        job = claimable_jobs(db, stale_before).with_for_update(skip_locked=True).first()
+        if not job:
+            return None
+
+        job.status = RequestStatus.processing
+        job.started_at = datetime.utcnow()
+        job.attempts = (job.attempts or 0) + 1
+        job.error = None
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def _fail_exhausted_jobs(db: Session, stale_before: datetime):
+    """
+    مهمة متروكة في processing استنفدت محاولاتها لن تُحجز مجدداً،
+    فتُنقل إلى failed حتى لا ينتظرها العميل للأبد.
+    """
+    swept = (
+        db.query(AdRequest)
+        .filter(AdRequest.job_type.isnot(None))
+        .filter(AdRequest.status == RequestStatus.processing)
+        .filter(AdRequest.started_at < stale_before)
+        .filter(AdRequest.attempts >= JOB_MAX_ATTEMPTS)
+        .update(
+            {
+                AdRequest.status: RequestStatus.failed,
+                AdRequest.error: "Worker stopped responding (max attempts reached)",
+                AdRequest.finished_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    if swept:
+        db.commit()
+        print(f"⚠️ Marked {swept} abandoned job(s) as failed")
+
+
+def _finish_job(job_id, error: str | None = None, retry: bool = True):
+    db = SessionLocal()
+    try:
+        job = db.query(AdRequest).filter(AdRequest.id == job_id).first()
+        if not job:
+            return
+        if error is None:
+            job.status = RequestStatus.completed
+        elif not retry or job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = RequestStatus.failed
+        else:
+            job.status = RequestStatus.pending  # إعادة المحاولة لاحقاً
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        if error is None:
+            mark_write(job.finished_at)
+    finally:
+        db.close()
+
+
+async def run_job(job_id):
+    db = SessionLocal()
+    try:
+        job = await run_in_threadpool(lambda: db.query(AdRequest).filter(AdRequest.id == job_id).first())
+        handler = _handlers.get(job.job_type)
+        if handler is None:
+            raise PermanentJobError(f"Unknown job type: {job.job_type}")
+        await handler(db, job)
+        error, retry = None, True
+    except PermanentJobError as e:
+        await run_in_threadpool(db.rollback)
+        print(f"❌ Job {job_id} failed permanently: {e}")
+        error, retry = str(e), False
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"❌ Job {job_id} failed:", traceback.format_exc())
+        error, retry = str(e) or e.__class__.__name__, True
+    finally:
+        await run_in_threadpool(db.close)
+
+    await run_in_threadpool(_finish_job, job_id, error, retry)
+
+
+# =====================================================
+# 👷 العمّال
+# =====================================================
+async def worker_loop(worker_id: int):
+    while True:
+        try:
+            job_id = await run_in_threadpool(claim_next_job)
+        except Exception as e:
+            print(f"⚠️ Worker {worker_id} could not claim a job:", e)
+            job_id = None
+
+        if job_id is not None:
+            await run_job(job_id)
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_workers(count: int = JOB_WORKERS):
+    global _wakeup, _loop
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    for i in range(count):
+        _tasks.append(asyncio.create_task(worker_loop(i)))
+    print(f"👷 Started {count} job workers")
+
+
+async def stop_workers():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+# =====================================================
+# 🧩 منفذو المهام
+# =====================================================
+@job_handler(JOB_GENERATE)
+async def handle_generate_enhanced(db: Session, job: AdRequest):
+    generated = await generate_enhanced(
+        job.payload["text"], job.payload.get("platform", "instagram"), variants=job.payload.get("variants", 1)
+    )
+
+    def save():
+        db.add(GeneratedAd(
+            user_id=job.user_id,
+            ad_request_id=job.id,
+            ad_text=generated["text"],
+            design_url=generated["image_url"],
+            design_srcset=generated["image_srcset"],
+            design_formats=generated["formats"],
+            variants=generated.get("variants"),
+            generation_type="full",
+            created_at=datetime.utcnow(),
+        ))
+        db.commit()
+
+    await run_in_threadpool(save)
+
+
+@job_handler(JOB_REGENERATE)
+async def handle_regenerate(db: Session, job: AdRequest):
+    ad = await run_in_threadpool(lambda: db.query(AdLibrary).filter(AdLibrary.id == job.payload["ad_id"]).first())
+    if not ad:
+        raise PermanentJobError("Ad not found")
+
+    generated = await regenerate_from_ad(
+        ad.ad_text or "", platform=ad.platform or "instagram", variants=job.payload.get("variants", 1)
+    )
+
+    def save():
+        db.add(AdResult(
+            ad_request_id=job.id,
+            source_ad_id=ad.id,
+            generated_assets={
+                "new_ad_text": generated["new_text"],
+                "new_image_url": generated["new_image_url"],
+                "image_srcset": generated["image_srcset"],
+                "formats": generated["formats"],
+                "variants": generated.get("variants"),
+                "predicted_engagement": generated.get("predicted_engagement"),
+            },
+            score=(ad.engagement_score or 80) + 5.0,
+        ))
+        db.commit()
+        invalidate_ads_stats()
+
+    await run_in_threadpool(save)
+
+
+@job_handler(JOB_ANALYZE)
+async def handle_analyze(db: Session, job: AdRequest):
+    ad = await run_in_threadpool(lambda: db.query(AdLibrary).filter(AdLibrary.id == job.payload["ad_id"]).first())
+    if not ad:
+        raise PermanentJobError("Ad not found")
+
+    analysis = await analyze_library_ad(ad)
+    if analysis["failed"]:
+        # خطأ عابر (مهلة أو OpenAI): إعادة المحاولة بدل حفظ النتيجة الافتراضية كتحليل مكتمل
+        raise RuntimeError("Ad analysis failed or timed out")
+
+    def save():
+        db.add(AdResult(
+            ad_request_id=job.id,
+            source_ad_id=ad.id,
+            analysis_json={
+                "text": analysis["text_analysis"],
+                "image": analysis["image_analysis"],
+                "predicted_engagement": analysis["predicted_engagement"],
+            },
+            score=analysis["score"],
+        ))
+        db.commit()
+        invalidate_ads_stats()
+
+    await run_in_threadpool(save)
+
+
+@job_handler(JOB_ANALYZE_BATCH)
+async def handle_analyze_batch(db: Session, job: AdRequest):
+    await run_batch_analysis(db, job)
+
+
+# =====================================================
+# 📤 نتيجة المهمة (لمسار الاستعلام عن الحالة)
+# =====================================================
+def job_result(db: Session, job: AdRequest) -> dict | None:
+    if job.status != RequestStatus.completed:
+        return None
+
+    if job.job_type == JOB_GENERATE:
+        ad = db.query(GeneratedAd).filter(GeneratedAd.ad_request_id == job.id).first()
+        if not ad:
+            return None
+        return {
+            "text": ad.ad_text,
+            "image_url": ad.design_url,
+            "image_srcset": ad.design_srcset,
+            "formats": ad.design_formats,
+            "variants": ad.variants,
+            # النموذج المحلي فوري، فيُحسب عند الطلب بدل تخزينه
+            "predicted_engagement": predict_one(ad.ad_text or "", (job.payload or {}).get("platform")),
+            "ad_id": str(ad.id),
+        }
+
+    if job.job_type == JOB_ANALYZE_BATCH:
+        return (job.payload or {}).get("progress")
+
+    result = job.ad_result
+    if not result:
+        return None
+    if job.job_type == JOB_REGENERATE:
+        assets = result.generated_assets or {}
+        return {
+            "new_text": assets.get("new_ad_text"),
+            "new_image_url": assets.get("new_image_url"),
+            "image_srcset": assets.get("image_srcset"),
+            "formats": assets.get("formats"),
+            "variants": assets.get("variants"),
+            "predicted_engagement": assets.get("predicted_engagement"),
+            "score": result.score,
+        }
+    analysis_json = result.analysis_json or {}
+    return {
+        "ad_id": str(result.source_ad_id),
+        "score": result.score,
+        "text_analysis": analysis_json.get("text"),
+        "image_analysis": analysis_json.get("image"),
+        "predicted_engagement": analysis_json.get("predicted_engagement"),
+    }
+
+
+# =====================================================
+# ▶️ تشغيل العمّال كعملية مستقلة
+# =====================================================
+async def _run_forever():
+    start_workers()
+    await asyncio.gather(*_tasks)
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_forever())
@@ -0,0 +1,118 @@
+# backend/app/services/stats_service.py
+"""
+إحصائيات لوحات التحكم (/ads-library/stats و /admin/stats).
+
+- استعلام واحد يجمع كل الأرقام بدل عدة COUNT(*) منفصلة.
+- النتيجة تُحفظ في كاش قصير المدة ويُمسح عند الكتابة (إضافة / حذف / توليد / تحليل،
+  وإضافة أو تعديل أو حذف المستخدمين).
+- وضع تقديري اختياري يقرأ pg_class.reltuples و pg_stats للجداول الكبيرة جداً.
+"""
+import os
+from sqlalchemy import select, func, true, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.ttl_cache import TTLCache
+from backend.app.models import AdLibrary, AdResult, User
+
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL_SECONDS", "15"))
+# الوضع التقديري لا يُستخدم إلا إذا تجاوز الجدول هذا العدد من الصفوف
+STATS_ESTIMATE_MIN_ROWS = int(os.getenv("STATS_ESTIMATE_MIN_ROWS", "1000000"))
+
+_cache = TTLCache(maxsize=16, ttl=STATS_CACHE_TTL)
+
+
+def invalidate_ads_stats():
+    _cache.pop("ads:exact")
+    _cache.pop("ads:estimate")
+
+
+def invalidate_users_stats():
+    _cache.pop("users")
+
+
+# =====================================================
+# 📊 إحصائيات الإعلانات
+# =====================================================
+async def _exact_ads_stats(db: AsyncSession) -> dict:
+    results = select(
+        func.count().label("analyzed_ads"),
+        func.count().filter(AdResult.generated_assets.isnot(None)).label("generated_ads"),
+    ).subquery()
+    platforms = (
+        select(AdLibrary.platform, func.count().label("ads"))
+        .group_by(AdLibrary.platform)
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(results.c.analyzed_ads, results.c.generated_ads, platforms.c.platform, platforms.c.ads)
+        .select_from(results.outerjoin(platforms, true()))
+    )).all()
+
+    platform_counts = {r.platform: r.ads for r in rows if r.platform is not None}
+    return {
+        "total_ads": sum(platform_counts.values()),
+        "analyzed_ads": rows[0].analyzed_ads,
+        "generated_ads": rows[0].generated_ads,
+        "platforms": list(platform_counts),
+        "platform_counts": platform_counts,
+        "estimated": False,
+    }
+
+
+async def _estimated_ads_stats(db: AsyncSession) -> dict | None:
+    reltuples = dict((await db.execute(text(
+        "SELECT relname, reltuples FROM pg_class "
+        "WHERE relkind = 'r' AND relname IN ('ads_library', 'ad_results')"
+    ))).all())
+    total_ads = reltuples.get("ads_library", -1)
+    analyzed_ads = reltuples.get("ad_results", -1)
+    # reltuples = -1 يعني أن الجدول لم يُحلَّل بعد (ANALYZE)
+    if min(total_ads, analyzed_ads) < STATS_ESTIMATE_MIN_ROWS:
+        return None
+
+    column_stats = {
+        r.tablename: r
+        for r in (await db.execute(text(
+            "SELECT tablename, null_frac, most_common_vals::text::text[] AS vals, most_common_freqs AS freqs "
+            "FROM pg_stats WHERE (tablename = 'ad_results' AND attname = 'generated_assets') "
+            "OR (tablename = 'ads_library' AND attname = 'platform')"
+        ))).all()
+    }
+    generated = column_stats.get("ad_results")
+    platform = column_stats.get("ads_library")
+    platform_counts = {}
+    if platform is not None and platform.vals:
+        platform_counts = {v: int(total_ads * f) for v, f in zip(platform.vals, platform.freqs)}
+
+    return {
+        "total_ads": int(total_ads),
+        "analyzed_ads": int(analyzed_ads),
+        "generated_ads": int(analyzed_ads * (1 - generated.null_frac)) if generated is not None else None,
+        "platforms": list(platform_counts),
+        "platform_counts": platform_counts,
+        "estimated": True,
+    }
+
+
+async def ads_stats(db: AsyncSession, estimate: bool = False) -> dict:
+    key = "ads:estimate" if estimate else "ads:exact"
+    stats = _cache.get(key)
+    if stats is None:
+        stats = (await _estimated_ads_stats(db) if estimate else None) or await _exact_ads_stats(db)
+        _cache.set(key, stats)
+    return stats
+
+
+# =====================================================
+# 👥 إحصائيات المستخدمين
+# =====================================================
+async def users_stats(db: AsyncSession) -> dict:
+    stats = _cache.get("users")
+    if stats is None:
+        row = (await db.execute(select(
+            func.count().label("total_users"),
+            func.count().filter(User.is_active == True).label("active_users"),
+        ))).one()
+        stats = {"total_users": row.total_users, "active_users": row.active_users}
+        _cache.set("users", stats)
+    return stats
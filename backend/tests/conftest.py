@@ -0,0 +1,40 @@
+# backend/tests/conftest.py
+"""
+إعدادات مشتركة للاختبارات (من جذر المستودع):
+
+    python -m pytest backend/tests
+
+- اختبارات قاعدة البيانات تحتاج Postgres حقيقياً عبر DATABASE_URL وتُتخطى بدونه.
+- كل جلسة اختبار تعمل في schema مؤقت: تُطبق عليه ترحيلات Alembic ثم يُحذف،
+  فلا تُلمس جداول القاعدة نفسها.
+"""
+import os, uuid
+import pytest
+
+TEST_SCHEMA = f"test_{uuid.uuid4().hex[:12]}"
+
+if os.getenv("DATABASE_URL"):
+    # libpq يقرأ PGOPTIONS عند كل اتصال، فتتجه كل اتصالات المحرك المتزامن إلى الـ schema المؤقت
+    os.environ["PGOPTIONS"] = f"-c search_path={TEST_SCHEMA}"
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL not set")
+
+    from alembic import command
+    from sqlalchemy import text
+    from backend.app.database import engine, _alembic_config
+
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {TEST_SCHEMA}"))
+    try:
+        command.upgrade(_alembic_config(), "head")
+        yield engine
+    finally:
+        engine.dispose()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {TEST_SCHEMA} CASCADE"))
+        engine.dispose()
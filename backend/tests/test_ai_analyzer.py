@@ -0,0 +1,67 @@
+# backend/tests/test_ai_analyzer.py
+"""المسار الدفعي (NumPy) يجب أن يعطي نفس نتائج analyze_ad_text نصاً بنص."""
+import pytest
+
+from backend.app.services import ai_analyzer
+from backend.app.services.ai_analyzer import (
+    analyze_ad_text, analyze_ad_texts, score_ad_texts, text_features, TEXT_FEATURE_NAMES,
+)
+
+EDGE_CASES = [
+    None,
+    "",
+    "   ",
+    "!!!",
+    "\n\n?",
+    "Hook one! Hook two? Hook three: hook four! hook five?",
+    "first line\nsecond line: with hook\nthird!",
+    "SHOP NOW and Shop now, shop now. BUY NOW!",
+    "اشتر الآن اشتر الآن — احجز الآن! جرّب الآن؟",
+    "#a #b_c #تخفيضات #عروض_رمضان #123 #",
+    "🔥🔥🔥✨📱😀🚀🎉🎁 emoji overload",
+    "متوسط الكلمات الطويلة جداً: استراتيجياتنا التسويقية المتكاملة والاحترافية",
+    "word " * 60,
+    "a.b.c. d? e! f",
+    "Download download DOWNLOAD sign up SIGN UP learn more order now book now",
+    "mixed العربية and English! #hashtag 🔥 buy now",
+    "tab\tseparated\ttext\twith: colon",
+    "‏نص مع علامة اتجاه‏!",
+    "ﷺ ligature and ﻻ presentation forms",
+    "x" * 500,
+]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_batch_matches_scalar(text):
+    assert analyze_ad_texts([text]) == [analyze_ad_text(text)]
+
+
+def test_batch_matches_scalar_on_mixed_batch():
+    texts = EDGE_CASES + ai_analyzer._sample_texts(300)
+    expected = [analyze_ad_text(t) for t in texts]
+
+    assert analyze_ad_texts(texts) == expected
+    assert score_ad_texts(texts).tolist() == [r["score"] for r in expected]
+
+
+def test_chunk_boundaries_do_not_change_results(monkeypatch):
+    texts = ai_analyzer._sample_texts(50) + EDGE_CASES
+    expected = analyze_ad_texts(texts)
+
+    monkeypatch.setattr(ai_analyzer, "ANALYZE_BATCH_SIZE", 7)
+    assert analyze_ad_texts(texts) == expected
+
+
+def test_text_features_shape_and_score_column():
+    texts = ai_analyzer._sample_texts(40)
+    features = text_features(texts)
+
+    assert features.shape == (len(texts), len(TEXT_FEATURE_NAMES))
+    score = features[:, TEXT_FEATURE_NAMES.index("score")]
+    assert score.tolist() == [analyze_ad_text(t)["score"] for t in texts]
+
+
+def test_empty_input():
+    assert analyze_ad_texts([]) == []
+    assert score_ad_texts([]).tolist() == []
+    assert text_features([]).shape == (0, len(TEXT_FEATURE_NAMES))
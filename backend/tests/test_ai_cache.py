@@ -0,0 +1,36 @@
+# backend/tests/test_ai_cache.py
+"""
+عدّاد استخدام كاش الذكاء الاصطناعي: القراءة لا تكتب في الجدول،
+والعدّادات المتراكمة تُكتب دفعة واحدة عند flush_hits.
+"""
+import uuid
+from sqlalchemy import select
+
+
+def _row(engine, key):
+    from backend.app.models import AiCacheEntry
+
+    with engine.connect() as conn:
+        return conn.execute(
+            select(AiCacheEntry.hits, AiCacheEntry.last_hit_at).where(AiCacheEntry.key == key)
+        ).one()
+
+
+def test_hits_are_batched_until_flush(pg_engine, monkeypatch):
+    from backend.app.core import ai_cache
+
+    monkeypatch.setattr(ai_cache, "AI_CACHE_HIT_FLUSH_SECONDS", 3600)
+    ai_cache.flush_hits()
+    key = ai_cache.make_key("text", "test-model", "v1", uuid.uuid4().hex)
+    ai_cache.put(key, "text", {"analysis": "ok"})
+    stored_at = _row(pg_engine, key).last_hit_at
+
+    ai_cache._lru.pop(key)
+    assert ai_cache.get(key) == {"analysis": "ok"}  # من الجدول
+    assert ai_cache.get(key) == {"analysis": "ok"}  # من الذاكرة
+    assert _row(pg_engine, key).hits == 0
+
+    assert ai_cache.flush_hits() == 1
+    row = _row(pg_engine, key)
+    assert row.hits == 2 and row.last_hit_at >= stored_at
+    assert ai_cache.flush_hits() == 0
@@ -0,0 +1,64 @@
+# backend/tests/test_batch_analysis.py
+"""
+التحليل الدفعي: الإعلان الذي فشل تحليله (مهلة أو خطأ OpenAI) لا يُحفظ كتحليل مكتمل،
+فيبقى ضمن only_unanalyzed ويُعاد تحليله في الدفعة التالية.
+"""
+import asyncio, uuid
+import pytest
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def platform():
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def _seed(engine, platform, texts):
+    from backend.app.models import AdLibrary, User, UserRole
+
+    with Session(engine) as db:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", role=UserRole.admin)
+        db.add(user)
+        db.add_all(AdLibrary(platform=platform, platform_ad_id=t, ad_text=t) for t in texts)
+        db.commit()
+        return user.id
+
+
+def _run_batch(engine, user_id, platform):
+    from backend.app.models import AdRequest, RequestStatus
+    from backend.app.services.analysis_service import run_batch_analysis
+
+    with Session(engine) as db:
+        job = AdRequest(
+            user_id=user_id, status=RequestStatus.processing, job_type="analyze_batch",
+            payload={"platform": platform, "only_unanalyzed": True},
+        )
+        db.add(job)
+        db.commit()
+        return asyncio.run(run_batch_analysis(db, job))
+
+
+def test_failed_analysis_is_not_saved_as_completed(pg_engine, platform, monkeypatch):
+    from backend.app.models import AdRequest, AdResult, RequestStatus
+    from backend.app.services import analysis_service
+
+    def fake_analyze(ad_text, platform=None, timeout=None):
+        if ad_text == "flaky":
+            raise TimeoutError("upstream timeout")
+        return {"input_text": ad_text, "analysis": "ok", "score": 70}
+
+    monkeypatch.setattr(analysis_service, "analyze_ad_text", fake_analyze)
+    user_id = _seed(pg_engine, platform, ["good", "flaky"])
+
+    progress = _run_batch(pg_engine, user_id, platform)
+    assert (progress["processed"], progress["failed"]) == (2, 1)
+
+    with Session(pg_engine) as db:
+        pending = analysis_service.batch_ads_query(db, {"platform": platform, "only_unanalyzed": True}).all()
+        assert [ad.ad_text for ad in pending] == ["flaky"]
+
+        results = db.query(AdResult).filter(AdResult.source_ad_id == pending[0].id).count()
+        failed = db.query(AdRequest).filter(
+            AdRequest.input_query == f"تحليل إعلان {pending[0].id}", AdRequest.status == RequestStatus.failed
+        ).count()
+        assert (results, failed) == (0, 1)
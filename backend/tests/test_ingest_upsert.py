@@ -0,0 +1,92 @@
+# backend/tests/test_ingest_upsert.py
+"""
+دمج الإعلانات عند التعارض على (platform, platform_ad_id):
+نفس الـ upsert يخدم create_ad و /ads-library/bulk.
+"""
+import uuid
+import pytest
+from sqlalchemy import select
+
+
+def _upsert(engine, **fields):
+    from backend.app.schemas.ad_schema import AdCreate
+    from backend.app.services.ingest_service import upsert_ad_values
+
+    with engine.begin() as conn:
+        return conn.execute(upsert_ad_values(AdCreate(**fields))).first()
+
+
+def _stored(engine, platform_ad_id):
+    from backend.app.models import AdLibrary
+
+    with engine.connect() as conn:
+        return conn.execute(
+            select(AdLibrary.ad_text, AdLibrary.engagement_score, AdLibrary.ad_metadata)
+            .where(AdLibrary.platform == "instagram", AdLibrary.platform_ad_id == platform_ad_id)
+        ).one()
+
+
+@pytest.fixture
+def ad_id():
+    return f"ad-{uuid.uuid4().hex}"
+
+
+def test_insert_then_update_reports_inserted_flag(pg_engine, ad_id):
+    first = _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="v1")
+    second = _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="v2")
+
+    assert first.inserted and not second.inserted
+    assert first.id == second.id
+    assert _stored(pg_engine, ad_id).ad_text == "v2"
+
+
+def test_unchanged_row_is_not_rewritten(pg_engine, ad_id):
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="same", ad_metadata={"a": 1})
+    assert _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="same", ad_metadata={"a": 1}) is None
+
+
+def test_missing_fields_keep_stored_values(pg_engine, ad_id):
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="kept", engagement_score=42.0)
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_metadata={"likes": 3})
+
+    stored = _stored(pg_engine, ad_id)
+    assert (stored.ad_text, stored.engagement_score) == ("kept", 42.0)
+
+
+def test_metadata_merges_into_null_metadata(pg_engine, ad_id):
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="x")
+    assert _stored(pg_engine, ad_id).ad_metadata is None
+
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_metadata={"likes": 3})
+    assert _stored(pg_engine, ad_id).ad_metadata == {"likes": 3}
+
+
+def test_metadata_keys_are_merged_and_overwritten(pg_engine, ad_id):
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_metadata={"likes": 3, "lang": "ar"})
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_metadata={"likes": 5, "shares": 1})
+
+    assert _stored(pg_engine, ad_id).ad_metadata == {"likes": 5, "lang": "ar", "shares": 1}
+
+
+def test_null_metadata_does_not_clear_stored_metadata(pg_engine, ad_id):
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_metadata={"likes": 3})
+    _upsert(pg_engine, platform="instagram", platform_ad_id=ad_id, ad_text="new text")
+
+    assert _stored(pg_engine, ad_id).ad_metadata == {"likes": 3}
+
+
+def test_duplicates_within_chunk_are_merged(pg_engine):
+    from backend.app.schemas.ad_schema import AdCreate
+    from backend.app.services.ingest_service import _merge_duplicates
+
+    rows = [
+        (1, AdCreate(platform="instagram", platform_ad_id="dup", ad_text="first", ad_metadata={"a": 1})),
+        (2, AdCreate(platform="instagram", platform_ad_id="other")),
+        (3, AdCreate(platform="instagram", platform_ad_id="dup", engagement_score=7.0, ad_metadata={"b": 2})),
+    ]
+    merged = dict(_merge_duplicates(rows))
+
+    assert sorted(merged) == [2, 3]
+    assert merged[3]["ad_text"] == "first"
+    assert merged[3]["engagement_score"] == 7.0
+    assert merged[3]["ad_metadata"] == {"a": 1, "b": 2}
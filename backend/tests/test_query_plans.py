@@ -0,0 +1,125 @@
+# backend/tests/test_query_plans.py
+"""
+اختبار انحدار لخطط الاستعلامات الساخنة: على بيانات مزروعة بحجم معقول
+يجب أن يصل كل استعلام إلى صفوفه عبر الفهرس المصمم له (وليس Seq Scan).
+"""
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_engine):
+    """مستخدمون وإعلانات ونتائج وطلبات: نسبة صغيرة فقط مولدة أو في الطابور، كما في الإنتاج."""
+    with pg_engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, email, role, is_active, created_at)
+            SELECT gen_random_uuid(), 'user' || i || '@example.com', 'user'::userrole, true, now() - i * interval '1 minute'
+            FROM generate_series(1, 200) i
+        """))
+        conn.execute(text("""
+            INSERT INTO ads_library (id, platform_ad_id, platform, ad_text, created_at, updated_at)
+            SELECT gen_random_uuid(), 'ad-' || i, 'instagram', 'ad text ' || i, now(), now()
+            FROM generate_series(1, 20000) i
+        """))
+        conn.execute(text("""
+            INSERT INTO ad_results (id, source_ad_id, generated_assets, analysis_json, score, created_at)
+            SELECT gen_random_uuid(), a.id,
+                   CASE WHEN i % 20 = 0 THEN '{"new_ad_text": "x"}'::jsonb END,
+                   CASE WHEN i % 20 <> 0 THEN '{"text": {}}'::jsonb END,
+                   80, now() - i * interval '1 second'
+            FROM generate_series(1, 60000) i
+            JOIN (SELECT id, row_number() OVER () AS n FROM ads_library) a ON a.n = 1 + i % 20000
+        """))
+        conn.execute(text("""
+            INSERT INTO generated_ads (id, user_id, generation_type, ad_text, created_at)
+            SELECT gen_random_uuid(), u.id, 'full'::generationtype, 'generated ' || i, now() - i * interval '1 second'
+            FROM generate_series(1, 60000) i
+            JOIN (SELECT id, row_number() OVER () AS n FROM users) u ON u.n = 1 + i % 200
+        """))
+        conn.execute(text("""
+            INSERT INTO ad_requests (id, user_id, status, job_type, attempts, created_at)
+            SELECT gen_random_uuid(), (SELECT id FROM users LIMIT 1),
+                   CASE WHEN i <= 20 THEN 'pending' ELSE 'completed' END::requeststatus,
+                   'analyze', 1, now() - i * interval '1 second'
+            FROM generate_series(1, 60000) i
+        """))
+    with pg_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return pg_engine
+
+
+def plan_nodes(engine, stmt) -> list:
+    """كل عقد خطة EXPLAIN (FORMAT JSON) للاستعلام بقيمه الحرفية."""
+    sql = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+
+    nodes, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get("Plans", []))
+    return nodes
+
+
+def assert_uses_index(engine, stmt, table: str, index: str):
+    nodes = plan_nodes(engine, stmt)
+    scans = [n for n in nodes if n.get("Relation Name") == table or n.get("Index Name") == index]
+    assert not any(n["Node Type"] == "Seq Scan" for n in scans), f"Seq Scan on {table}: {nodes}"
+    assert any(n["Node Type"] in INDEX_SCANS and n.get("Index Name") == index for n in scans), (
+        f"{index} not used: {nodes}"
+    )
+
+
+def _first_id(engine, table: str):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT id FROM {table} ORDER BY id LIMIT 1")).scalar()
+
+
+@pytest.mark.parametrize("with_cursor", [False, True])
+def test_generated_results_page_uses_partial_index(seeded, with_cursor):
+    """/ads-library/all و /latest: النتائج المولدة فقط، الأحدث أولاً."""
+    from backend.app.core.pagination import PageParams, _keyset, encode_cursor
+    from backend.app.models import AdResult
+
+    cursor = encode_cursor(datetime.utcnow(), uuid.uuid4()) if with_cursor else None
+    stmt = _keyset(
+        select(AdResult.id, AdResult.created_at, AdResult.generated_assets).where(AdResult.generated_assets.isnot(None)),
+        AdResult.created_at, AdResult.id, PageParams(cursor=cursor, limit=50),
+    )
+    assert_uses_index(seeded, stmt, "ad_results", "ix_ad_results_generated_created_at_id")
+
+
+def test_user_generated_ads_page_uses_composite_index(seeded):
+    """/ads-library/user و /users/my-ads: إعلانات مستخدم واحد، الأحدث أولاً."""
+    from backend.app.core.pagination import PageParams, _keyset
+    from backend.app.models import GeneratedAd
+
+    stmt = _keyset(
+        select(GeneratedAd.id, GeneratedAd.ad_text, GeneratedAd.created_at)
+        .where(GeneratedAd.user_id == _first_id(seeded, "users")),
+        GeneratedAd.created_at, GeneratedAd.id, PageParams(cursor=None, limit=50),
+    )
+    assert_uses_index(seeded, stmt, "generated_ads", "ix_generated_ads_user_created_at_id")
+
+
+def test_results_by_source_ad_use_index(seeded):
+    """حذف إعلان وفحص "تم تحليله" في التحليل الدفعي."""
+    from backend.app.models import AdResult
+
+    stmt = select(AdResult.id).where(AdResult.source_ad_id == _first_id(seeded, "ads_library"))
+    assert_uses_index(seeded, stmt, "ad_results", "ix_ad_results_source_ad_id")
+
+
+def test_job_claim_uses_queue_index(seeded):
+    """claim_next_job: أقدم مهمة pending (أو processing متروكة) من بين طلبات كثيرة منتهية."""
+    from backend.app.services.job_queue import claimable_jobs
+
+    with Session(seeded) as db:
+        query = claimable_jobs(db, datetime.utcnow()).with_for_update(skip_locked=True).limit(1)
+    assert_uses_index(seeded, query.statement, "ad_requests", "ix_ad_requests_queue")
@@ -8,3 +8,37 @@ export async function getLatestGeneratedAd() {
   const res = await api.get(`${API_BASE}/ads-library/latest`);
   return res.data;
 }
+
+// =====================================================
+// ⏳ متابعة المهام غير المتزامنة (202 + request_id)
+// =====================================================
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+export interface JobStatus<T = any> {
+  request_id: string;
+  job_type: string;
+  status: "pending" | "processing" | "completed" | "failed";
+  attempts: number;
+  error: string | null;
+  result: T | null;
+}
+
+// إرسال طلب يعيد 202 ثم انتظار نتيجته عبر /ads-library/jobs/{request_id}
+export async function submitAndWait<T = any>(url: string, body?: unknown): Promise<T> {
+  const res = await api.post(url, body);
+  // مسار متزامن (لا يوجد request_id): النتيجة جاهزة مباشرة
+  if (res.status !== 202 || !res.data?.request_id) return res.data as T;
+  return waitForJob<T>(res.data.request_id);
+}
+
+export async function waitForJob<T = any>(requestId: string): Promise<T> {
+  const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const { data } = await api.get<JobStatus<T>>(`/ads-library/jobs/${requestId}`);
+    if (data.status === "completed" && data.result) return data.result;
+    if (data.status === "failed") throw new Error(data.error || "فشلت المهمة.");
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+  throw new Error("انتهت مهلة انتظار النتيجة، حاول مرة أخرى.");
+}
@@ -0,0 +1,23 @@
+export default function LoadMoreButton({
+  hasMore,
+  loading,
+  onClick,
+}: {
+  hasMore: boolean;
+  loading: boolean;
+  onClick: () => void;
+}) {
+  if (!hasMore) return null;
+
+  return (
+    <div className="flex justify-center mt-8">
+      <button
+        onClick={onClick}
+        disabled={loading}
+        className="px-6 py-2 rounded-xl bg-indigo-600 hover:bg-indigo-700 text-white shadow-lg transition disabled:opacity-60 disabled:cursor-not-allowed"
+      >
+        {loading ? "⏳ جاري التحميل..." : "تحميل المزيد"}
+      </button>
+    </div>
+  );
+}
@@ -0,0 +1,61 @@
+import { useCallback, useEffect, useState } from "react";
+import type { AxiosInstance } from "axios";
+
+// مؤشر الصفحة التالية يأتي في الهيدر (axios يحوّل أسماء الهيدرات لأحرف صغيرة)
+const NEXT_CURSOR_HEADER = "x-next-cursor";
+
+// قائمة مرقّمة بالمؤشر: الصفحة الأولى عند التحميل، والصفحات التالية عبر loadMore
+export function useCursorList<T>(client: AxiosInstance, url: string) {
+  const [items, setItems] = useState<T[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState<any>(null);
+
+  const fetchPage = useCallback(
+    async (cursor: string | null) => {
+      const res = await client.get<T[]>(url, { params: cursor ? { cursor } : undefined });
+      return { rows: res.data || [], next: (res.headers[NEXT_CURSOR_HEADER] as string | undefined) || null };
+    },
+    [client, url]
+  );
+
+  // إعادة التحميل من الصفحة الأولى (مثلاً بعد إضافة عنصر)
+  const reload = useCallback(async () => {
+    setLoading(true);
+    setError(null);
+    try {
+      const { rows, next } = await fetchPage(null);
+      setItems(rows);
+      setNextCursor(next);
+    } catch (err) {
+      console.error(`❌ فشل في جلب ${url}:`, err);
+      setError(err);
+      setItems([]);
+      setNextCursor(null);
+    } finally {
+      setLoading(false);
+    }
+  }, [fetchPage, url]);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const { rows, next } = await fetchPage(nextCursor);
+      setItems((prev) => [...prev, ...rows]);
+      setNextCursor(next);
+    } catch (err) {
+      console.error(`❌ فشل في جلب المزيد من ${url}:`, err);
+      alert("حدث خطأ أثناء تحميل المزيد");
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [fetchPage, nextCursor, loadingMore, url]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  return { items, setItems, loading, loadingMore, hasMore: nextCursor !== null, loadMore, reload, error };
+}
@@ -1,7 +1,8 @@
-import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import { Trash2 } from "lucide-react";
 import api from "@/api/axiosInstance";
+import { useCursorList } from "@/lib/useCursorList";
+import LoadMoreButton from "../components/LoadMoreButton";
 
 interface Ad {
   id: string;
@@ -12,23 +13,9 @@ interface Ad {
 }
 
 export default function AdsLibrary() {
-  const [ads, setAds] = useState<Ad[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  // جلب الإعلانات من الـ API
-  useEffect(() => {
-    const fetchAds = async () => {
-      try {
-        const res = await api.get("/ads-library/all");
-        setAds(res.data || []);
-      } catch (err) {
-        console.error("❌ فشل في جلب الإعلانات:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAds();
-  }, []);
+  // جلب الإعلانات من الـ API (صفحة بعد صفحة)
+  const { items: ads, setItems: setAds, loading, loadingMore, hasMore, loadMore } =
+    useCursorList<Ad>(api, "/ads-library/all");
 
   const handleDelete = async (id: string) => {
     if (!window.confirm("هل تريد حذف هذا الإعلان؟")) return;
@@ -99,6 +86,8 @@ export default function AdsLibrary() {
           </motion.div>
         ))}
       </div>
+
+      <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 }
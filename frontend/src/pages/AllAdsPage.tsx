@@ -1,7 +1,8 @@
-import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import api from "@/api/axiosInstance";
+import { useCursorList } from "@/lib/useCursorList";
 import AdPostCard from "../components/AdPostCard";
+import LoadMoreButton from "../components/LoadMoreButton";
 import { normalizeImage } from "../utils/normalizeImage";
 
 interface Ad {
@@ -12,22 +13,8 @@ interface Ad {
 }
 
 export default function AllAdsPage() {
-  const [ads, setAds] = useState<Ad[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchAds = async () => {
-      try {
-        const res = await api.get("/ads-library/all");
-        setAds(res.data || []);
-      } catch (err) {
-        console.error("❌ فشل في جلب الإعلانات:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAds();
-  }, []);
+  const { items: ads, setItems: setAds, loading, loadingMore, hasMore, loadMore } =
+    useCursorList<Ad>(api, "/ads-library/all");
 
   // ======== دالة حذف الإعلان ========
   async function handleDelete(adId: string) {
@@ -58,30 +45,33 @@ export default function AllAdsPage() {
     );
 
   return (
-    <div className="p-6 grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6 bg-gray-50 min-h-screen">
-      {ads.map((ad, index) => (
-        <motion.div
-          key={ad.id || index}
-          initial={{ opacity: 0, y: 30 }}
-          animate={{ opacity: 1, y: 0 }}
-          transition={{ delay: index * 0.05 }}
-          className="relative group"
-        >
-          <AdPostCard
-            image={normalizeImage(ad.image_url)}
-            text={`${ad.text}\n\nScore: ${ad.score}`}
-            platform="instagram"
-          />
-
-          {/* زر الحذف */}
-          <button
-            onClick={() => handleDelete(ad.id)}
-            className="absolute top-3 right-3 bg-red-600 text-white text-xs px-3 py-1.5 rounded-lg shadow hover:bg-red-700 opacity-0 group-hover:opacity-100 transition"
+    <div className="p-6 bg-gray-50 min-h-screen">
+      <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
+        {ads.map((ad, index) => (
+          <motion.div
+            key={ad.id || index}
+            initial={{ opacity: 0, y: 30 }}
+            animate={{ opacity: 1, y: 0 }}
+            transition={{ delay: index * 0.05 }}
+            className="relative group"
           >
-            🗑 حذف
-          </button>
-        </motion.div>
-      ))}
+            <AdPostCard
+              image={normalizeImage(ad.image_url)}
+              text={`${ad.text}\n\nScore: ${ad.score}`}
+              platform="instagram"
+            />
+
+            {/* زر الحذف */}
+            <button
+              onClick={() => handleDelete(ad.id)}
+              className="absolute top-3 right-3 bg-red-600 text-white text-xs px-3 py-1.5 rounded-lg shadow hover:bg-red-700 opacity-0 group-hover:opacity-100 transition"
+            >
+              🗑 حذف
+            </button>
+          </motion.div>
+        ))}
+      </div>
+      <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 }
@@ -1,7 +1,8 @@
-import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import api from "@/api/axiosInstance";
+import { useCursorList } from "@/lib/useCursorList";
 import { BarChart3 } from "lucide-react";
+import LoadMoreButton from "../components/LoadMoreButton";
 
 interface AdResult {
   ad_id: string;
@@ -14,22 +15,8 @@ interface AdResult {
 }
 
 export default function AnalyticsPage() {
-  const [results, setResults] = useState<AdResult[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchAnalytics = async () => {
-      try {
-        const res = await api.get("/ads-library/analytics/all");
-        setResults(res.data || []);
-      } catch (err) {
-        console.error("❌ فشل في جلب التحليلات:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAnalytics();
-  }, []);
+  const { items: results, loading, loadingMore, hasMore, loadMore } =
+    useCursorList<AdResult>(api, "/ads-library/analytics/all");
 
   if (loading)
     return (
@@ -100,6 +87,8 @@ export default function AnalyticsPage() {
           </motion.div>
         ))}
       </div>
+
+      <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 }
@@ -1,6 +1,6 @@
 import { useState } from "react";
 import { motion } from "framer-motion";
-import api from "@/api/axiosInstance"; // ✅ استخدام axios المهيأ بالتوكن
+import { submitAndWait } from "@/api/adsApi"; // ✅ طلب التوليد + انتظار نتيجة المهمة
 
 export default function GenerateAdPage() {
   const [platform, setPlatform] = useState("instagram");
@@ -20,14 +20,15 @@ export default function GenerateAdPage() {
     setResult(null);
 
     try {
-      const res = await api.post("/ads-library/generate-enhanced", {
+      // الخادم يعيد 202 + request_id، والنتيجة تُجلب من /ads-library/jobs/{request_id}
+      const data = await submitAndWait("/ads-library/generate-enhanced", {
         text: adText,
         platform,
       });
-      setResult(res.data);
+      setResult(data);
     } catch (err: any) {
       console.error("❌ فشل في توليد الإعلان:", err);
-      setError(err?.response?.data?.detail || "حدث خطأ غير متوقع أثناء التوليد.");
+      setError(err?.response?.data?.detail || err?.message || "حدث خطأ غير متوقع أثناء التوليد.");
     } finally {
       setLoading(false);
     }
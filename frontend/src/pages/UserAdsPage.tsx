@@ -1,5 +1,6 @@
-import { useEffect, useState } from "react";
 import api from "../lib/axios";
+import { useCursorList } from "../lib/useCursorList";
+import LoadMoreButton from "../components/LoadMoreButton";
 import { motion } from "framer-motion";
 import { Loader2, Megaphone } from "lucide-react";
 
@@ -12,27 +13,9 @@ interface UserAd {
 }
 
 export default function UserAdsPage() {
-  const [ads, setAds] = useState<UserAd[]>([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState("");
-
-  useEffect(() => {
-    const fetchAds = async () => {
-      setLoading(true);
-      setError("");
-      try {
-        const res = await api.get("/ads-library/user");
-        console.log("✅ Ads fetched:", res.data);
-        setAds(res.data);
-      } catch (err: any) {
-        console.error("❌ Failed to fetch ads:", err);
-        setError(err.response?.data?.detail || "حدث خطأ أثناء جلب الإعلانات.");
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAds();
-  }, []);
+  const { items: ads, loading, loadingMore, hasMore, loadMore, error: fetchError } =
+    useCursorList<UserAd>(api, "/ads-library/user");
+  const error = fetchError ? fetchError.response?.data?.detail || "حدث خطأ أثناء جلب الإعلانات." : "";
 
   if (loading)
     return (
@@ -87,6 +70,8 @@ export default function UserAdsPage() {
             ))}
           </div>
         )}
+
+        <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
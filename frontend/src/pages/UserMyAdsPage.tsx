@@ -1,5 +1,6 @@
-import { useEffect, useState } from "react";
 import api from "../lib/axios";
+import { useCursorList } from "../lib/useCursorList";
+import LoadMoreButton from "../components/LoadMoreButton";
 import { motion } from "framer-motion";
 import { Image, Loader2, Calendar } from "lucide-react";
 
@@ -12,22 +13,7 @@ interface Ad {
 }
 
 export default function UserMyAdsPage() {
-  const [ads, setAds] = useState<Ad[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchAds = async () => {
-      try {
-        const res = await api.get("/users/my-ads");
-        setAds(res.data);
-      } catch (err) {
-        console.error("❌ فشل في جلب الإعلانات:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAds();
-  }, []);
+  const { items: ads, loading, loadingMore, hasMore, loadMore } = useCursorList<Ad>(api, "/users/my-ads");
 
   if (loading)
     return (
@@ -79,6 +65,8 @@ export default function UserMyAdsPage() {
           </motion.div>
         ))}
       </div>
+
+      <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 }
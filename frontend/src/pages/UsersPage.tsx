@@ -1,5 +1,7 @@
-import { useEffect, useMemo, useState } from "react";
+import { useMemo, useState } from "react";
 import api from "../lib/axios";
+import { useCursorList } from "../lib/useCursorList";
+import LoadMoreButton from "../components/LoadMoreButton";
 import { motion } from "framer-motion";
 import { UserPlus, Search, ShieldCheck, User, Loader2, X } from "lucide-react";
 
@@ -15,8 +17,16 @@ interface UserRow {
 }
 
 export default function UsersPage() {
-  const [rows, setRows] = useState<UserRow[]>([]);
-  const [loading, setLoading] = useState(true);
+  // جلب المستخدمين (صفحة بعد صفحة)
+  const {
+    items: rows,
+    setItems: setRows,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    reload: fetchUsers,
+  } = useCursorList<UserRow>(api, "/users/all");
   const [q, setQ] = useState("");
   const [roleFilter, setRoleFilter] = useState<"all" | Role>("all");
   const [showForm, setShowForm] = useState(false);
@@ -27,20 +37,6 @@ export default function UsersPage() {
     role: "user" as Role,
   });
 
-  // جلب المستخدمين
-  const fetchUsers = async () => {
-    setLoading(true);
-    try {
-      const res = await api.get("/users/all");
-      setRows(res.data || []);
-    } catch (e) {
-      console.error("❌ Failed to fetch users", e);
-      setRows([]);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   // إنشاء مستخدم جديد
   const createUser = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -65,9 +61,6 @@ export default function UsersPage() {
     }
   };
 
-  useEffect(() => {
-    fetchUsers();
-  }, []);
 const handleDelete = async (userId: string) => {
   if (!confirm("هل أنت متأكد أنك تريد حذف هذا المستخدم؟")) return;
   try {
@@ -199,6 +192,10 @@ const handleDelete = async (userId: string) => {
             </table>
           </div>
         )}
+
+        {!loading && (
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
+        )}
       </div>
 
       {/* ✅ Modal for Adding User */}